@@ -0,0 +1,61 @@
+# ProManufakt - Döviz Kurları (Currency Rates)
+# Kur geçmişi sıralı dizilerde tutulur; herhangi bir andaki kur ikili aramayla bulunur
+
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from timestamps import parse_timestamp
+
+BASE_CURRENCY = "TRY"
+# currency_rates field holding each currency's rate to TRY
+RATE_FIELDS = {"USD": "usd_to_try", "EUR": "eur_to_try"}
+# Used until the first rate is entered
+DEFAULT_RATES = {"USD": 33.0, "EUR": 36.5}
+
+
+class RateHistory:
+    """Every recorded rate as parallel arrays sorted by updated_at. Treat it as
+    immutable."""
+
+    def __init__(self, docs: List[dict]):
+        self.docs = sorted(docs, key=lambda doc: parse_timestamp(doc["updated_at"]))
+        self._timestamps = [parse_timestamp(doc["updated_at"]) for doc in self.docs]
+        self.timestamps = np.array(self._timestamps, dtype=float)
+        self.rates = {
+            currency: np.array([float(doc.get(field) or DEFAULT_RATES[currency]) for doc in self.docs], dtype=float)
+            for currency, field in RATE_FIELDS.items()
+        }
+
+    @property
+    def latest(self) -> Optional[dict]:
+        return self.docs[-1] if self.docs else None
+
+    def rates_at(self, when: str) -> Dict[str, float]:
+        """Rate of each currency to TRY in effect at `when` (ISO timestamp)"""
+        if not self.docs:
+            return {BASE_CURRENCY: 1.0, **DEFAULT_RATES}
+        # Before the first record the earliest rate is the best estimate
+        i = max(bisect_right(self._timestamps, parse_timestamp(when)) - 1, 0)
+        return {BASE_CURRENCY: 1.0, **{currency: float(values[i]) for currency, values in self.rates.items()}}
+
+    def rates_for(self, currencies: Sequence[str], timestamps: Sequence[str]) -> np.ndarray:
+        """Rate to TRY for each (currency, timestamp) pair in one vectorised
+        search; unknown currencies are taken at 1.0 like TRY"""
+        result = np.ones(len(currencies), dtype=float)
+        if not len(currencies):
+            return result
+        currencies = np.asarray(currencies, dtype=object)
+        if self.docs:
+            points = np.array([parse_timestamp(t) for t in timestamps], dtype=float)
+            index = np.maximum(np.searchsorted(self.timestamps, points, side="right") - 1, 0)
+        for currency in RATE_FIELDS:
+            mask = currencies == currency
+            if mask.any():
+                result[mask] = self.rates[currency][index[mask]] if self.docs else DEFAULT_RATES[currency]
+        return result
+
+    def convert_many(self, amounts: Sequence[float], currencies: Sequence[str], timestamps: Sequence[str]) -> np.ndarray:
+        """Amounts in TRY, each at the rate in effect at its own timestamp"""
+        return np.asarray(amounts, dtype=float) * self.rates_for(currencies, timestamps)
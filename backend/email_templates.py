@@ -0,0 +1,146 @@
+# ProManufakt - E-posta Şablonları (E-mail Templates)
+# Şablonlar yüklemede bir kez derlenir; ortak alanlar bir kez, alıcıya özgü alanlar her alıcı için doldurulur
+
+import html
+import re
+from typing import List, Union
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class Markup(str):
+    """A value that is already HTML and must not be escaped"""
+
+
+class Field(str):
+    """Name of a placeholder that has not been filled in yet"""
+
+
+class CompiledTemplate:
+    """HTML with {{ name }} placeholders, split once into literal text and
+    fields. Values are HTML-escaped unless wrapped in Markup."""
+
+    def __init__(self, chunks: List[Union[str, Field]]):
+        self.chunks = chunks
+
+    @classmethod
+    def compile(cls, source: str) -> "CompiledTemplate":
+        chunks = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            chunks.append(source[position:match.start()])
+            chunks.append(Field(match.group(1)))
+            position = match.end()
+        chunks.append(source[position:])
+        return cls(chunks)
+
+    @property
+    def fields(self) -> set:
+        return {chunk for chunk in self.chunks if isinstance(chunk, Field)}
+
+    def partial(self, **values) -> "CompiledTemplate":
+        """Fill in the given fields and merge the text around them; the result
+        only contains the fields left out"""
+        chunks = []
+        for chunk in self.chunks:
+            if isinstance(chunk, Field):
+                if chunk not in values:
+                    chunks.append(chunk)
+                    continue
+                chunk = _escape(values[chunk])
+            if chunks and not isinstance(chunks[-1], Field):
+                chunks[-1] += chunk
+            else:
+                chunks.append(chunk)
+        return CompiledTemplate(chunks)
+
+    def render(self, **values) -> str:
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"Missing template fields: {', '.join(sorted(missing))}")
+        return "".join(_escape(values[chunk]) if isinstance(chunk, Field) else chunk for chunk in self.chunks)
+
+
+def _escape(value) -> str:
+    if isinstance(value, Markup):
+        return str(value)
+    # str() like the f-string templates this replaced, so None still reads "None"
+    return html.escape(str(value))
+
+
+# Per-supplier fields: contact_name, form_link, form_token
+QUOTE_REQUEST_HTML = CompiledTemplate.compile("""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <style>
+        body { font-family: 'Segoe UI', Arial, sans-serif; line-height: 1.6; color: #333; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        .header { background: #1F4E79; color: white; padding: 20px; text-align: center; }
+        .content { padding: 20px; background: #f9f9f9; }
+        .section { background: white; padding: 15px; margin: 10px 0; border-left: 4px solid #1F4E79; }
+        .label { color: #666; font-size: 12px; text-transform: uppercase; }
+        .value { font-weight: bold; font-size: 16px; }
+        .button { display: inline-block; background: #F97316; color: white; padding: 15px 30px; text-decoration: none; border-radius: 5px; font-weight: bold; margin: 20px 0; }
+        .footer { text-align: center; padding: 20px; color: #666; font-size: 12px; }
+        table { width: 100%; border-collapse: collapse; }
+        td { padding: 8px; border-bottom: 1px solid #eee; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>TEKLİF TALEBİ</h1>
+            <p>{{ company_name }}</p>
+        </div>
+        
+        <div class="content">
+            <p>Sayın <strong>{{ contact_name }}</strong>,</p>
+            
+            <p>Aşağıdaki işlem için fiyat teklifinizi talep ediyoruz:</p>
+            
+            <div class="section">
+                <p class="label">PROJE</p>
+                <p class="value">{{ project_name }} ({{ project_code }})</p>
+            </div>
+            
+            <div class="section">
+                <p class="label">PARÇA BİLGİLERİ</p>
+                <table>
+                    <tr><td>Parça Adı:</td><td><strong>{{ part_name }}</strong></td></tr>
+                    <tr><td>Parça Kodu:</td><td><strong>{{ part_code }}</strong></td></tr>
+                    <tr><td>Miktar:</td><td><strong>{{ quantity }} adet</strong></td></tr>
+                    <tr><td>Malzeme:</td><td><strong>{{ material_name }}</strong></td></tr>
+                </table>
+            </div>
+            
+            <div class="section">
+                <p class="label">İSTENEN İŞLEM</p>
+                <p class="value">{{ method_code }} - {{ method_name }}</p>
+                <p style="color: #666; font-size: 14px;">{{ method_description }}</p>
+            </div>
+            
+            <div class="section">
+                <p class="label">TERMİN</p>
+                <p class="value">Teklif Son Tarih: {{ deadline }}</p>
+            </div>
+            
+            <center>
+                <a href="{{ form_link }}" class="button">TEKLİF FORMUNU DOLDUR</a>
+            </center>
+            
+            <p style="text-align: center; color: #666; font-size: 12px;">
+                Form Şifresi: <strong>{{ form_token }}</strong>
+            </p>
+            
+            {{ notes }}
+        </div>
+        
+        <div class="footer">
+            <p>{{ company_name }}</p>
+            <p>{{ company_email }} | {{ company_phone }}</p>
+            <p>{{ company_address }}</p>
+        </div>
+    </div>
+</body>
+</html>""")
@@ -0,0 +1,190 @@
+# ProManufakt - Excel Dışa/İçe Aktarma (Excel Import/Export)
+# Bu modüldeki fonksiyonlar olay döngüsü dışında, işçi thread'lerinde çalışır
+
+import io
+from typing import Callable, List, Tuple
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+PARTS_HEADERS = ["Parça Kodu", "Parça Adı", "Adet", "Malzeme", "Form Tipi", "Ölçü 1", "Ölçü 2", "Ölçü 3", "İmalat 1", "İmalat 2", "İmalat 3", "İmalat 4", "İmalat 5", "Notlar"]
+COLUMN_WIDTH = 15
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+
+class ExportCancelled(Exception):
+    """Raised inside the worker when the client went away mid-export"""
+
+
+class ChunkWriter(io.RawIOBase):
+    """Write-only, unseekable file object that hands fixed-size chunks to `emit`"""
+
+    def __init__(self, emit: Callable[[bytes], None], chunk_size: int = OUTPUT_CHUNK_SIZE):
+        super().__init__()
+        self._emit = emit
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer.extend(data)
+        while len(self._buffer) >= self._chunk_size:
+            self._emit(bytes(self._buffer[:self._chunk_size]))
+            del self._buffer[:self._chunk_size]
+        return len(data)
+
+    def close(self):
+        if not self.closed and self._buffer:
+            self._emit(bytes(self._buffer))
+            self._buffer.clear()
+        super().close()
+
+
+def _named_styles() -> List[NamedStyle]:
+    thin = Side(style='thin')
+    thin_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    header = NamedStyle(
+        name="parts_header",
+        fill=PatternFill(start_color="1F4E79", end_color="1F4E79", fill_type="solid"),
+        font=Font(color="FFFFFF", bold=True),
+        alignment=Alignment(horizontal='center'),
+        border=thin_border
+    )
+    cell = NamedStyle(name="parts_cell", border=thin_border)
+    return [header, cell]
+
+
+def part_row(part: dict) -> list:
+    dims = part.get("dimensions", {}) or {}
+    methods = part.get("manufacturing_methods", [])
+
+    # Get dimension values based on form type
+    form_type = part.get("form_type", "")
+    if form_type == "prizmatik":
+        dim_values = [dims.get("width"), dims.get("height"), dims.get("length")]
+    elif form_type == "silindirik":
+        dim_values = [dims.get("diameter"), dims.get("length"), None]
+    elif form_type == "boru":
+        dim_values = [dims.get("outer_diameter"), dims.get("inner_diameter"), dims.get("length")]
+    else:
+        dim_values = [None, None, None]
+
+    method_values = [methods[i] if len(methods) > i else None for i in range(5)]
+
+    return [
+        part.get("code", ""),
+        part.get("name", ""),
+        part.get("quantity", 0),
+        part.get("material", ""),
+        form_type,
+        *dim_values,
+        *method_values,
+        part.get("notes", "")
+    ]
+
+
+def write_parts_workbook(fetch_batch: Callable[[], list], emit: Callable[[bytes], None]):
+    """Build the parts sheet in write-only mode from batches returned by
+    `fetch_batch` (empty list = done) and stream the xlsx bytes to `emit`"""
+    wb = openpyxl.Workbook(write_only=True)
+    for style in _named_styles():
+        wb.add_named_style(style)
+    ws = wb.create_sheet("Parça Listesi")
+
+    for col in range(1, len(PARTS_HEADERS) + 1):
+        ws.column_dimensions[get_column_letter(col)].width = COLUMN_WIDTH
+
+    def styled_row(values, style_name):
+        row = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style_name
+            row.append(cell)
+        return row
+
+    ws.append(styled_row(PARTS_HEADERS, "parts_header"))
+
+    while True:
+        parts = fetch_batch()
+        if not parts:
+            break
+        for part in parts:
+            ws.append(styled_row(part_row(part), "parts_cell"))
+
+    writer = ChunkWriter(emit)
+    wb.save(writer)
+    writer.close()
+
+
+PARTS_IMPORT_COLUMNS = 14
+
+
+def _parse_part_row(row: tuple) -> dict:
+    code = str(row[0]).strip()
+    name = str(row[1]).strip()
+    quantity = int(row[2]) if row[2] else 1
+    material = str(row[3]).strip() if row[3] else None
+    form_type = str(row[4]).strip().lower() if row[4] else None
+
+    # Parse dimensions based on form type
+    dimensions = {}
+    if form_type == "prizmatik":
+        dimensions = {
+            "width": float(row[5]) if row[5] else None,
+            "height": float(row[6]) if row[6] else None,
+            "length": float(row[7]) if row[7] else None
+        }
+    elif form_type == "silindirik":
+        dimensions = {
+            "diameter": float(row[5]) if row[5] else None,
+            "length": float(row[6]) if row[6] else None
+        }
+    elif form_type == "boru":
+        dimensions = {
+            "outer_diameter": float(row[5]) if row[5] else None,
+            "inner_diameter": float(row[6]) if row[6] else None,
+            "length": float(row[7]) if row[7] else None
+        }
+
+    # Parse manufacturing methods
+    methods = [str(row[i]).strip() for i in range(8, 13) if row[i]]
+
+    notes = str(row[13]).strip() if row[13] else None
+
+    return {
+        "code": code,
+        "name": name,
+        "quantity": quantity,
+        "material": material,
+        "form_type": form_type,
+        "dimensions": dimensions,
+        "manufacturing_methods": methods,
+        "notes": notes
+    }
+
+
+def parse_parts_workbook(contents: bytes) -> Tuple[List[Tuple[int, dict]], List[Tuple[int, str]]]:
+    """Read the import template in read-only mode; returns (row number, part
+    fields) pairs for valid rows and (row number, error message) for the rest"""
+    wb = openpyxl.load_workbook(io.BytesIO(contents), read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows = []
+        errors = []
+        for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
+            row = tuple(row[:PARTS_IMPORT_COLUMNS]) + (None,) * (PARTS_IMPORT_COLUMNS - len(row))
+            if not row[0] or not row[1] or not row[2]:
+                continue  # Skip empty rows
+            try:
+                rows.append((row_idx, _parse_part_row(row)))
+            except Exception as e:
+                errors.append((row_idx, f"Satır {row_idx}: {str(e)}"))
+        return rows, errors
+    finally:
+        wb.close()
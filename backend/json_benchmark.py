@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+ProManufakt JSON response benchmark
+Serialization time of each list route's page (1000 documents by default):
+  JSONResponse     - FastAPI default: jsonable_encoder, then json.dumps
+  fast + encoder   - FastJSONResponse on a route that still goes through jsonable_encoder
+  fast direct      - FastJSONResponse returned by the route (what the list routes do)
+
+Usage: python json_benchmark.py [documents] [repeat]
+"""
+
+import json
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from json_io import JSON_SERIALIZER, USE_ORJSON, FastJSONResponse
+
+
+def timestamp(i: int) -> str:
+    return (datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=i)).isoformat()
+
+
+def project(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()), "code": f"PRJ-2026-{i:04d}", "name": f"Proje {i}",
+        "customer_name": "Örnek Makina A.Ş.", "start_date": "2026-01-01", "end_date": "2026-06-30",
+        "status": "in_progress", "notes": "Müşteri onayı bekleniyor", "created_at": timestamp(i), "updated_at": timestamp(i)
+    }
+
+
+def part(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()), "project_id": str(uuid.uuid4()), "name": f"Flanş {i}", "code": f"P-{i:05d}",
+        "quantity": 12, "material": "st37", "form_type": "round_bar",
+        "dimensions": {"width": None, "height": None, "length": 120.5, "diameter": 80.0, "outer_diameter": None, "inner_diameter": None},
+        "manufacturing_methods": ["turning", "milling", "heat_treatment"], "status": "pending",
+        "notes": "Yüzey pürüzlülüğü Ra 1.6", "technical_drawing_url": None,
+        "technical_drawing_filename": f"{uuid.uuid4().hex}.pdf", "technical_drawing_original_name": f"teknik-resim-{i}.pdf",
+        "technical_drawing_size": 482113, "technical_drawing_sha256": uuid.uuid4().hex * 2,
+        "technical_drawing_uploaded_at": timestamp(i),
+        "additional_documents": [
+            {"id": str(uuid.uuid4()), "filename": f"{uuid.uuid4().hex}.step", "original_name": f"model-{i}-{n}.step",
+             "size": 1048576, "sha256": uuid.uuid4().hex * 2, "uploaded_at": timestamp(i)}
+            for n in range(3)
+        ],
+        "created_at": timestamp(i)
+    }
+
+
+def supplier(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()), "name": f"Tedarikçi {i}", "contact_person": "Ayşe Yılmaz", "email": f"satis{i}@example.com",
+        "phone": "+90 212 555 00 00", "address": "Organize Sanayi Bölgesi, İstanbul", "tax_id": "1234567890",
+        "specializations": ["turning", "milling"], "payment_terms": 30,
+        "performance": {"total_orders": 42, "on_time_deliveries": 39, "quality_rejections": 1, "average_price_ratio": 1.02,
+                        "delivery_score": 37.1, "quality_score": 29.3, "price_score": 14.7, "payment_score": 10.0, "total_score": 91.1},
+        "notes": None, "created_at": timestamp(i)
+    }
+
+
+def quote_request(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()), "part_id": str(uuid.uuid4()), "supplier_ids": [str(uuid.uuid4()) for _ in range(4)],
+        "manufacturing_method": "turning", "deadline": "2026-02-01", "status": "requested", "notes": None,
+        "created_at": timestamp(i),
+        "form_tokens": [{"token": uuid.uuid4().hex, "supplier_id": str(uuid.uuid4()), "used": False} for _ in range(4)]
+    }
+
+
+def order(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()), "code": f"ORD-2026-{i:04d}", "quote_response_id": str(uuid.uuid4()),
+        "part_id": str(uuid.uuid4()), "supplier_id": str(uuid.uuid4()), "quantity": 12, "unit_price": 1450.75,
+        "currency": "TRY", "total_price": 17409.0, "expected_delivery": "2026-03-01", "actual_delivery": None,
+        "status": "pending", "notes": None, "created_at": timestamp(i)
+    }
+
+
+ROUTES = {
+    "/api/projects": project,
+    "/api/parts": part,
+    "/api/suppliers": supplier,
+    "/api/quote-requests": quote_request,
+    "/api/orders": order,
+}
+
+
+def best_of(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    serializer = "orjson" if USE_ORJSON else "json"
+    print(f"{count} documents per route, best of {repeat}, JSON_SERIALIZER={JSON_SERIALIZER} ({serializer})")
+    print(f"{'route':<22}{'JSONResponse':>14}{'fast + encoder':>16}{'fast direct':>13}{'speedup':>10}")
+
+    for route, build in ROUTES.items():
+        docs = [build(i) for i in range(count)]
+        before = best_of(lambda: JSONResponse(jsonable_encoder(docs)), repeat)
+        encoded = best_of(lambda: FastJSONResponse(jsonable_encoder(docs)), repeat)
+        direct = best_of(lambda: FastJSONResponse(docs), repeat)
+        # Same document either way, only the bytes may differ
+        assert json.loads(JSONResponse(jsonable_encoder(docs)).body) == json.loads(FastJSONResponse(docs).body)
+        print(f"{route:<22}{before:>11.2f} ms{encoded:>13.2f} ms{direct:>10.2f} ms{before / direct:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# ProManufakt - JSON Çıktısı (JSON Serialization)
+# Yanıtlar orjson ile (yoksa standart json ile) doğrudan UTF-8 baytlara yazılır
+
+import json
+import os
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON_SERIALIZER=json forces the standard library even when orjson is installed
+JSON_SERIALIZER = os.environ.get('JSON_SERIALIZER', 'orjson').lower()
+if JSON_SERIALIZER not in ("orjson", "json"):
+    raise ValueError(f"Unknown JSON_SERIALIZER: {JSON_SERIALIZER}")
+USE_ORJSON = JSON_SERIALIZER == "orjson" and orjson is not None
+
+
+def dumps(data: Any) -> bytes:
+    """Compact UTF-8 JSON; types JSON has no form for (ObjectId, Decimal...)
+    are written as strings"""
+    if USE_ORJSON:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """App-wide response class. Routes that already hold JSON-native data
+    (documents read with {"_id": 0}) return it directly, which also skips
+    FastAPI's jsonable_encoder pass over every nested field."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
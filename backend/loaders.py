@@ -0,0 +1,79 @@
+# ProManufakt - Toplu Kayıt Yükleyici (Batched Entity Loader)
+# Aynı olay döngüsü turunda istenen id'ler koleksiyon başına tek bir $in sorgusunda toplanır
+
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+
+class EntityLoader:
+    """DataLoader for one collection: `load` calls made in the same event-loop
+    tick go out as a single {"id": {"$in": [...]}} query, and each id is
+    fetched at most once for the lifetime of the loader (one request).
+    Returned documents are shared between callers; copy before mutating."""
+
+    def __init__(self, collection, projection: Optional[dict] = None):
+        self.collection = collection
+        # Must keep the `id` field, results are matched on it
+        self.projection = projection or {"_id": 0}
+        self._cache: Dict[str, asyncio.Future] = {}
+        self._queue: List[str] = []
+        self._fetches: set = set()
+
+    def load(self, entity_id: str) -> asyncio.Future:
+        """Future resolving to the document, or None if it does not exist"""
+        future = self._cache.get(entity_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._cache[entity_id] = future
+            if not self._queue:
+                # Wait for the rest of this tick's loads before querying
+                loop.call_soon(self._dispatch)
+            self._queue.append(entity_id)
+        return future
+
+    async def load_many(self, entity_ids: Iterable[str]) -> List[Optional[dict]]:
+        return list(await asyncio.gather(*(self.load(entity_id) for entity_id in entity_ids)))
+
+    async def load_map(self, entity_ids: Iterable[str]) -> Dict[str, dict]:
+        """Existing documents keyed by id"""
+        docs = await self.load_many(dict.fromkeys(entity_ids))
+        return {doc["id"]: doc for doc in docs if doc is not None}
+
+    def _dispatch(self):
+        entity_ids, self._queue = self._queue, []
+        task = asyncio.ensure_future(self._fetch(entity_ids))
+        self._fetches.add(task)
+        task.add_done_callback(self._fetches.discard)
+
+    async def _fetch(self, entity_ids: List[str]):
+        try:
+            docs = await self.collection.find({"id": {"$in": entity_ids}}, self.projection).to_list(None)
+        except Exception as e:
+            for entity_id in entity_ids:
+                # Forget the failure so a later load can retry
+                future = self._cache.pop(entity_id)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        found = {doc["id"]: doc for doc in docs}
+        for entity_id in entity_ids:
+            future = self._cache[entity_id]
+            if not future.done():
+                future.set_result(found.get(entity_id))
+
+
+class Loaders:
+    """One EntityLoader per collection, created on first use: `loaders.parts.load(id)`"""
+
+    def __init__(self, db):
+        self._db = db
+        self._loaders: Dict[str, EntityLoader] = {}
+
+    def __getattr__(self, collection_name: str) -> EntityLoader:
+        if collection_name.startswith("_"):
+            raise AttributeError(collection_name)
+        loader = self._loaders.get(collection_name)
+        if loader is None:
+            loader = self._loaders[collection_name] = EntityLoader(self._db[collection_name])
+        return loader
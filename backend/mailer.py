@@ -0,0 +1,135 @@
+# ProManufakt - E-posta Gönderimi (Mail Transport)
+# Sağlayıcıya özgü kısımlar: gönderim taşıyıcıları, hız sınırı ve yeniden deneme aralıkları
+
+import asyncio
+import os
+import random
+import time
+from typing import List, Optional, Tuple
+
+import resend
+from resend.exceptions import RateLimitError, ResendError
+
+# HTTP status codes worth retrying; anything else from the provider is final
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+# Largest batch the Resend batch endpoint accepts
+MAX_BATCH_SIZE = 100
+
+
+class TransientMailError(Exception):
+    """Sending failed but may succeed later"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PermanentMailError(Exception):
+    """The provider rejected the message; retrying will not help"""
+
+
+def _retry_after(headers: dict) -> Optional[float]:
+    value = (headers or {}).get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class ResendTransport:
+    """Sends through the Resend API"""
+
+    name = "resend"
+
+    @property
+    def configured(self) -> bool:
+        return bool(resend.api_key)
+
+    async def _call(self, function, *args):
+        """Run a blocking SDK call, mapping its errors to transient/permanent"""
+        try:
+            return await asyncio.to_thread(function, *args)
+        except RateLimitError as e:
+            raise TransientMailError(str(e), retry_after=_retry_after(e.headers))
+        except ResendError as e:
+            try:
+                code = int(e.code)
+            except (TypeError, ValueError):
+                code = None
+            if code in RETRYABLE_STATUS_CODES:
+                raise TransientMailError(str(e), retry_after=_retry_after(e.headers))
+            raise PermanentMailError(str(e))
+        except OSError as e:
+            # Connection errors and timeouts from the HTTP client
+            raise TransientMailError(str(e))
+
+    async def send(self, message: dict, idempotency_key: Optional[str] = None) -> Optional[str]:
+        options = {"idempotency_key": idempotency_key} if idempotency_key else None
+        result = await self._call(resend.Emails.send, message, options)
+        return result.get("id")
+
+    async def send_batch(self, messages: List[dict], idempotency_key: Optional[str] = None) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Send up to MAX_BATCH_SIZE messages in one API call. Returns a
+        (provider id, error) pair per message; in permissive mode the provider
+        rejects invalid messages individually instead of the whole batch."""
+        options = {"batch_validation": "permissive"}
+        if idempotency_key:
+            options["idempotency_key"] = idempotency_key
+        result = await self._call(resend.Batch.send, messages, options)
+        errors = {error["index"]: error["message"] for error in result.get("errors") or []}
+        ids = iter(item.get("id") for item in result.get("data") or [])
+        return [(None, errors[i]) if i in errors else (next(ids, None), None) for i in range(len(messages))]
+
+
+class MemoryTransport:
+    """Keeps messages in memory instead of sending them (local development and tests)"""
+
+    name = "memory"
+    configured = True
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message: dict, idempotency_key: Optional[str] = None) -> Optional[str]:
+        self.sent.append(message)
+        return f"memory-{len(self.sent)}"
+
+    async def send_batch(self, messages: List[dict], idempotency_key: Optional[str] = None) -> List[Tuple[Optional[str], Optional[str]]]:
+        return [(await self.send(message), None) for message in messages]
+
+
+def create_transport():
+    """Pick the transport from MAIL_TRANSPORT (resend | memory)"""
+    transport = os.environ.get('MAIL_TRANSPORT', 'resend').lower()
+    if transport == "memory":
+        return MemoryTransport()
+    if transport != "resend":
+        raise ValueError(f"Unknown MAIL_TRANSPORT: {transport}")
+    return ResendTransport()
+
+
+class RateLimiter:
+    """Spaces out calls to at most `rate` per second across all workers"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold back every caller, e.g. after the provider answered 429"""
+        self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+
+def retry_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with jitter for the given (1-based) attempt"""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
@@ -0,0 +1,70 @@
+# ProManufakt - Önizleme (Thumbnails / Previews)
+# Resimler ve PDF'in ilk sayfası için küçük WebP önizlemeler; işlem havuzunda çalışır
+
+import io
+from pathlib import Path
+from typing import Union
+
+THUMBNAIL_SIZES = (128, 256, 512)
+DEFAULT_THUMBNAIL_SIZE = 256
+PREVIEWABLE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.pdf'}
+WEBP_QUALITY = 80
+
+
+class PreviewUnavailable(Exception):
+    """The file type cannot be previewed or the imaging libraries are missing"""
+
+
+def _open_image(source: Union[str, bytes], extension: str):
+    from PIL import Image
+
+    if extension == '.pdf':
+        try:
+            import pymupdf
+        except ImportError:
+            raise PreviewUnavailable("PyMuPDF kurulu değil")
+        document = pymupdf.open(source) if isinstance(source, str) else pymupdf.open(stream=source, filetype="pdf")
+        try:
+            if document.page_count == 0:
+                raise PreviewUnavailable("PDF boş")
+            page = document.load_page(0)
+            # Rasterize at roughly the largest thumbnail size, not at full resolution
+            zoom = max(THUMBNAIL_SIZES) / max(page.rect.width, page.rect.height, 1)
+            pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+        finally:
+            document.close()
+
+    image = Image.open(source if isinstance(source, str) else io.BytesIO(source))
+    image.draft("RGB", (max(THUMBNAIL_SIZES), max(THUMBNAIL_SIZES)))  # cheap JPEG downscale on decode
+    return image
+
+
+def render_thumbnail(source: Union[str, bytes], extension: str, size: int) -> bytes:
+    """Render a WebP thumbnail that fits in size x size. `source` is a local
+    path or the file's bytes. Runs in a worker process."""
+    if extension not in PREVIEWABLE_EXTENSIONS:
+        raise PreviewUnavailable(f"{extension} için önizleme yok")
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        raise PreviewUnavailable("Pillow kurulu değil")
+
+    image = _open_image(source, extension)
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((size, size), Image.LANCZOS)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    output = io.BytesIO()
+    image.save(output, format="WEBP", quality=WEBP_QUALITY, method=4)
+    return output.getvalue()
+
+
+def thumbnail_key(key: str, size: int) -> str:
+    """Thumbnails are cached next to the original"""
+    return f"{key}.thumb-{size}.webp"
+
+
+def is_previewable(filename: str) -> bool:
+    return Path(filename).suffix.lower() in PREVIEWABLE_EXTENSIONS
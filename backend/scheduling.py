@@ -0,0 +1,172 @@
+# ProManufakt - Üretim Planlama (Production Scheduling)
+# Parça operasyonları kapasiteli kaynaklara (imalat kategorileri) yığın tabanlı liste çizelgelemesiyle yerleştirilir
+
+import heapq
+from typing import Dict, List, Optional
+
+# Parallel work centres per method category; overridable through settings.resource_capacity.
+# 0 means unlimited: purchased material only waits for the supplier.
+DEFAULT_CAPACITY = {
+    "Metal Şekillendirme": 2,
+    "Kaynak": 2,
+    "Talaşlı İmalat": 3,
+    "3D Baskı": 1,
+    "Yüzey İşlemi": 1,
+    "Hazır Malzeme": 0,
+}
+# Categories without a configured capacity
+FALLBACK_CAPACITY = 1
+DEFAULT_DURATION_DAYS = 2
+
+
+def resolve_capacity(capacity: Optional[dict]) -> Dict[str, int]:
+    resolved = dict(DEFAULT_CAPACITY)
+    if capacity:
+        resolved.update({k: max(int(v), 0) for k, v in capacity.items() if v is not None})
+    return resolved
+
+
+def schedule_parts(parts: List[dict], methods: Dict[str, dict], capacity: Optional[dict] = None) -> dict:
+    """Schedule every part's manufacturing_methods, in order, on the work
+    centres of each method's category. Non-delay list scheduling: whenever a
+    work centre frees up it takes the ready operation with the most remaining
+    work on its part. Times are whole days from the project start.
+
+    Slack is how many days an operation can slip without moving the project
+    end, given the sequence chosen on each work centre; zero-slack operations
+    form the critical path."""
+    capacity = resolve_capacity(capacity)
+
+    # Operations as parallel lists; the operations of a part are consecutive.
+    # Categories are numbered so the hot loop indexes lists instead of dicts.
+    operations: List[tuple] = []
+    categories: Dict[str, int] = {}
+    resources: List[int] = []
+    durations: List[int] = []
+    prev_op: List[int] = []
+    next_op: List[int] = []
+    first_ops: List[int] = []
+    for part in parts:
+        previous = -1
+        seen: Dict[str, int] = {}
+        for method_code in part.get("manufacturing_methods") or []:
+            method = methods.get(method_code)
+            if not method:
+                continue
+            i = len(operations)
+            repeat = seen.get(method_code, 0)
+            seen[method_code] = repeat + 1
+            operations.append((part, method_code, method, repeat))
+            resources.append(categories.setdefault(method["category"], len(categories)))
+            durations.append(max(int(method.get("duration_days", DEFAULT_DURATION_DAYS)), 0))
+            prev_op.append(previous)
+            next_op.append(-1)
+            if previous < 0:
+                first_ops.append(i)
+            else:
+                next_op[previous] = i
+            previous = i
+
+    n = len(operations)
+    # Priority: work left on the part from this operation on (successors have higher indexes)
+    tail = [0] * n
+    for i in range(n - 1, -1, -1):
+        tail[i] = durations[i] + (tail[next_op[i]] if next_op[i] >= 0 else 0)
+
+    limits = [capacity.get(category, FALLBACK_CAPACITY) for category in categories]
+    ready: List[list] = [[] for _ in categories]
+    # Free work centres per category as (lane, last operation on it)
+    free: List[list] = [[(k, -1) for k in range(limit)] for limit in limits]
+    start = [0] * n
+    finish = [0] * n
+    lane = [0] * n
+    machine_prev = [-1] * n
+    order: List[int] = []
+    events: list = []
+    heappush, heappop = heapq.heappush, heapq.heappop
+
+    for i in first_ops:
+        heappush(ready[resources[i]], (-tail[i], i))
+    dirty = set(resources[i] for i in first_ops)
+
+    now = 0
+    while True:
+        for resource in dirty:
+            queue = ready[resource]
+            lanes = free[resource]
+            unlimited = not limits[resource]
+            while queue and (unlimited or lanes):
+                _, i = heappop(queue)
+                if not unlimited:
+                    lane[i], machine_prev[i] = heappop(lanes)
+                start[i] = now
+                finish[i] = end = now + durations[i]
+                order.append(i)
+                heappush(events, (end, i))
+        dirty.clear()
+        if not events:
+            break
+        now = events[0][0]
+        while events and events[0][0] == now:
+            _, i = heappop(events)
+            resource = resources[i]
+            if limits[resource]:
+                heappush(free[resource], (lane[i], i))
+                dirty.add(resource)
+            following = next_op[i]
+            if following >= 0:
+                heappush(ready[resources[following]], (-tail[following], following))
+                dirty.add(resources[following])
+
+    # Backward pass over part and work-centre successors; reverse start order is topological
+    makespan = max(finish, default=0)
+    machine_next = [-1] * n
+    for i in order:
+        if machine_prev[i] >= 0:
+            machine_next[machine_prev[i]] = i
+    latest_start = [0] * n
+    for i in reversed(order):
+        latest_finish = makespan
+        if next_op[i] >= 0 and latest_start[next_op[i]] < latest_finish:
+            latest_finish = latest_start[next_op[i]]
+        if machine_next[i] >= 0 and latest_start[machine_next[i]] < latest_finish:
+            latest_finish = latest_start[machine_next[i]]
+        latest_start[i] = latest_finish - durations[i]
+
+    names = list(categories)
+    tasks = [
+        {
+            "id": f"{part['id']}_{method_code}" + (f"_{repeat + 1}" if repeat else ""),
+            "part_id": part["id"],
+            "part_name": part["name"],
+            "part_code": part["code"],
+            "method_code": method_code,
+            "method_name": method["name"],
+            "category": method["category"],
+            "lane": lane[i],
+            "start_day": start[i],
+            "end_day": finish[i],
+            "duration_days": durations[i],
+            "slack_days": latest_start[i] - start[i],
+            "critical": latest_start[i] == start[i]
+        }
+        for i, (part, method_code, method, repeat) in enumerate(operations)
+    ]
+
+    # Walk back from an operation ending the project through the predecessors it waited for
+    critical_path: List[str] = []
+    current = next((i for i in reversed(order) if finish[i] == makespan and latest_start[i] == start[i]), -1)
+    while current >= 0:
+        critical_path.append(tasks[current]["id"])
+        current = next(
+            (p for p in (prev_op[current], machine_prev[current]) if p >= 0 and finish[p] == start[current]),
+            -1
+        )
+    critical_path.reverse()
+
+    return {
+        "tasks": tasks,
+        "makespan_days": makespan,
+        "critical_path": critical_path,
+        "capacity": dict(zip(names, limits))
+    }
@@ -0,0 +1,100 @@
+# ProManufakt - Teklif Puanlama (Quote Scoring)
+# Fiyat, termin, kalite ve ödeme vadesi puanları tüm teklifler için tek seferde hesaplanır
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from timestamps import parse_timestamp
+
+# Maximum points per criterion; overridable through settings.quote_weights
+DEFAULT_WEIGHTS = {"price": 40.0, "delivery": 30.0, "quality": 20.0, "payment": 10.0}
+
+# Delivery: +2 points per early day (max +6), -3 points per late day, on a 30 point scale
+DELIVERY_EARLY_BONUS_PER_DAY = 2 / 30
+DELIVERY_EARLY_BONUS_MAX = 6 / 30
+DELIVERY_LATE_PENALTY_PER_DAY = 3 / 30
+
+# Supplier quality_score is kept on a 30 point scale, 24 when unknown
+QUALITY_SCALE = 30.0
+QUALITY_DEFAULT = 24.0
+
+# Payment terms (days) thresholds and the share of the payment weight they earn
+PAYMENT_THRESHOLDS = np.array([30, 60, 90])
+PAYMENT_FACTORS = np.array([0.3, 0.5, 0.8, 1.0])
+
+
+def resolve_weights(weights: Optional[dict]) -> Dict[str, float]:
+    resolved = dict(DEFAULT_WEIGHTS)
+    if weights:
+        resolved.update({k: float(v) for k, v in weights.items() if k in DEFAULT_WEIGHTS and v is not None})
+    return resolved
+
+
+def supplier_quality(supplier: Optional[dict]) -> float:
+    performance = (supplier or {}).get("performance")
+    if not performance:
+        return QUALITY_DEFAULT
+    return float(performance.get("quality_score", QUALITY_DEFAULT))
+
+
+def score_arrays(price_try: np.ndarray, days_diff: np.ndarray, quality: np.ndarray,
+                 payment_terms: np.ndarray, weights: Dict[str, float]) -> Dict[str, np.ndarray]:
+    """Score every response at once; all inputs are aligned 1-D arrays"""
+    min_price = price_try.min() if price_try.size else 0.0
+    if min_price > 0:
+        price_score = (min_price / price_try) * weights["price"]
+    else:
+        price_score = np.full(price_try.shape, weights["price"])
+
+    early_bonus = np.minimum(-days_diff * DELIVERY_EARLY_BONUS_PER_DAY, DELIVERY_EARLY_BONUS_MAX)
+    late_factor = np.maximum(1 - days_diff * DELIVERY_LATE_PENALTY_PER_DAY, 0)
+    delivery_score = np.where(days_diff <= 0, 1 + early_bonus, late_factor) * weights["delivery"]
+
+    quality_score = quality / QUALITY_SCALE * weights["quality"]
+
+    bracket = np.searchsorted(PAYMENT_THRESHOLDS, payment_terms, side="right")
+    payment_score = PAYMENT_FACTORS[bracket] * weights["payment"]
+
+    return {
+        "price": price_score,
+        "delivery": delivery_score,
+        "quality": quality_score,
+        "payment": payment_score,
+        "total": price_score + delivery_score + quality_score + payment_score
+    }
+
+
+def rank_quotes(responses: List[dict], suppliers: Dict[str, dict], deadline: str,
+                exchange_rates: Sequence[float], weights: Optional[dict] = None) -> List[dict]:
+    """Build the comparison list for a quote request, best total score first.
+    `exchange_rates` holds each response's rate to TRY, aligned with `responses`."""
+    if not responses:
+        return []
+    weights = resolve_weights(weights)
+
+    totals = np.array([r["total_price"] for r in responses], dtype=float)
+    currency_rate = np.asarray(exchange_rates, dtype=float)
+    price_try = totals * currency_rate
+
+    deadline_ts = parse_timestamp(deadline)
+    delivery_ts = np.array([parse_timestamp(r["delivery_date"]) for r in responses], dtype=float)
+    days_diff = np.floor((delivery_ts - deadline_ts) / 86400)
+
+    quality = np.array([supplier_quality(suppliers.get(r["supplier_id"])) for r in responses], dtype=float)
+    payment_terms = np.array([r.get("payment_terms", 30) for r in responses], dtype=float)
+
+    scores = score_arrays(price_try, days_diff, quality, payment_terms, weights)
+    rounded = {name: np.round(values, 1) for name, values in scores.items()}
+
+    comparison = []
+    for i in np.argsort(-rounded["total"], kind="stable"):
+        resp = responses[i]
+        comparison.append({
+            "response": resp,
+            "supplier": suppliers.get(resp["supplier_id"]),
+            "price_try": float(price_try[i]),
+            "exchange_rate": float(currency_rate[i]),
+            "scores": {name: float(values[i]) for name, values in rounded.items()}
+        })
+    return comparison
@@ -1,13 +1,24 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, UpdateOne, ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import OperationFailure, DuplicateKeyError, BulkWriteError
 import os
+import re
+import json
+import time
+import hashlib
+import html
+import base64
 import logging
 import asyncio
-import shutil
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional, Dict, Any
@@ -16,13 +27,30 @@ from datetime import datetime, timezone, timedelta
 from io import BytesIO
 import resend
 import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.styles import Font, PatternFill
 from openpyxl.utils import get_column_letter
 
+from uploads import receive_file, discard_file, sweep_temp_files, write_chunk, hash_file, etag_matches, conditional_file_response
+from storage import LocalStorage, create_storage
+from previews import (
+    THUMBNAIL_SIZES, DEFAULT_THUMBNAIL_SIZE, PreviewUnavailable,
+    render_thumbnail, thumbnail_key, is_previewable
+)
+from excel_io import XLSX_MEDIA_TYPE, ExportCancelled, write_parts_workbook, parse_parts_workbook
 from data import (
     MATERIALS, FORM_TYPES, MANUFACTURING_METHODS,
     PROJECT_STATUSES, PART_STATUSES, ORDER_STATUSES, QUOTE_STATUSES, CURRENCIES
 )
+from scoring import DEFAULT_WEIGHTS, rank_quotes
+from scheduling import schedule_parts
+from currency import RateHistory
+from mailer import (
+    MAX_BATCH_SIZE as MAIL_MAX_BATCH_SIZE, TransientMailError, PermanentMailError,
+    RateLimiter, create_transport, retry_delay
+)
+from email_templates import Markup, QUOTE_REQUEST_HTML
+from loaders import Loaders
+from json_io import FastJSONResponse, dumps as dump_json
 
 ROOT_DIR = Path(__file__).parent
 UPLOADS_DIR = ROOT_DIR / "uploads"
@@ -40,8 +68,12 @@ resend_api_key = os.environ.get('RESEND_API_KEY')
 if resend_api_key:
     resend.api_key = resend_api_key
 SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'onboarding@resend.dev')
+mail_transport = create_transport()
 
-app = FastAPI(title="ProManufakt API", version="1.0.0")
+app = FastAPI(title="ProManufakt API", version="1.0.0", default_response_class=FastJSONResponse)
+
+# Strong references to fire-and-forget tasks so they are not garbage collected
+background_tasks = set()
 api_router = APIRouter(prefix="/api")
 
 # Configure logging
@@ -67,6 +99,8 @@ class Project(BaseModel):
     end_date: str
     status: str = "planning"
     notes: Optional[str] = None
+    # Bumped by every write to the project or its parts; keys the derived-view cache
+    version: int = 0
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     updated_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
@@ -236,11 +270,19 @@ class CurrencyRate(BaseModel):
     updated_by: str = "manual"
 
 # Settings Models
+class QuoteScoreWeights(BaseModel):
+    price: float = Field(DEFAULT_WEIGHTS["price"], ge=0)
+    delivery: float = Field(DEFAULT_WEIGHTS["delivery"], ge=0)
+    quality: float = Field(DEFAULT_WEIGHTS["quality"], ge=0)
+    payment: float = Field(DEFAULT_WEIGHTS["payment"], ge=0)
+
 class SettingsUpdate(BaseModel):
     company_name: Optional[str] = None
     company_email: Optional[str] = None
     company_phone: Optional[str] = None
     company_address: Optional[str] = None
+    quote_weights: Optional[QuoteScoreWeights] = None
+    resource_capacity: Optional[Dict[str, int]] = None
 
 class Settings(BaseModel):
     id: str = "settings"
@@ -248,6 +290,9 @@ class Settings(BaseModel):
     company_email: str = ""
     company_phone: str = ""
     company_address: str = ""
+    quote_weights: QuoteScoreWeights = Field(default_factory=QuoteScoreWeights)
+    # Parallel work centres per manufacturing category; missing categories use the scheduler defaults
+    resource_capacity: Dict[str, int] = {}
 
 # Email Models
 class EmailRequest(BaseModel):
@@ -255,17 +300,482 @@ class EmailRequest(BaseModel):
     subject: str
     html_content: str
 
+# ===================== DATABASE INDEXES =====================
+
+# Notifications older than this are removed by a TTL index; 0 keeps them forever
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', '90'))
+NOTIFICATION_TTL_INDEX = "created_on_ttl"
+
+# Every index the routes rely on, per collection. Names are explicit so the
+# usage report and manual drops stay readable.
+COLLECTION_INDEXES = {
+    "projects": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("code", ASCENDING)], name="code"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="status_created_at_id"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+    ],
+    "parts": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("project_id", ASCENDING), ("code", ASCENDING)], name="project_id_code", unique=True),
+        IndexModel([("project_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="project_id_created_at_id"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="status_created_at_id"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+    ],
+    "suppliers": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("specializations", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="specializations_created_at_id"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+    ],
+    "quote_requests": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("part_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="part_id_created_at_id"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="status_created_at_id"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+    ],
+    "quote_responses": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("quote_request_id", ASCENDING), ("supplier_id", ASCENDING)], name="quote_request_id_supplier_id"),
+        IndexModel([("quote_request_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="quote_request_id_created_at_id"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+    ],
+    "orders": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("code", ASCENDING)], name="code"),
+        IndexModel([("status", ASCENDING), ("expected_delivery", ASCENDING)], name="status_expected_delivery"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="status_created_at_id"),
+        IndexModel([("supplier_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="supplier_id_created_at_id"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+    ],
+    "notifications": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("is_read", ASCENDING), ("created_at", DESCENDING)], name="is_read_created_at"),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+        *([IndexModel(
+            [("created_on", ASCENDING)],
+            name=NOTIFICATION_TTL_INDEX,
+            expireAfterSeconds=NOTIFICATION_RETENTION_DAYS * 86400
+        )] if NOTIFICATION_RETENTION_DAYS > 0 else []),
+    ],
+    "currency_rates": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("updated_at", DESCENDING)], name="updated_at"),
+    ],
+    "settings": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "counters": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "migrations": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "blobs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "upload_sessions": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at"),
+    ],
+    "email_jobs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "email_outbox": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt_at"),
+        IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)], name="status_locked_until"),
+        IndexModel([("claim_id", ASCENDING)], name="claim_id"),
+        IndexModel([("batch_key", ASCENDING)], name="batch_key"),
+        IndexModel([("job_id", ASCENDING), ("created_at", ASCENDING)], name="job_id_created_at"),
+    ],
+}
+
+# Server error codes for an index that exists with a different definition
+INDEX_CONFLICT_CODES = {85, 86}  # IndexOptionsConflict, IndexKeySpecsConflict
+INDEX_REBUILD_LEASE_SECONDS = 600
+
+async def acquire_lease(name: str, seconds: float) -> bool:
+    """Cross-worker mutual exclusion that expires if its holder dies"""
+    now = datetime.now(timezone.utc)
+    expires_at = (now + timedelta(seconds=seconds)).isoformat()
+    try:
+        await db.leases.insert_one({"_id": name, "expires_at": expires_at})
+        return True
+    except DuplicateKeyError:
+        result = await db.leases.update_one(
+            {"_id": name, "expires_at": {"$lt": now.isoformat()}},
+            {"$set": {"expires_at": expires_at}}
+        )
+        return result.modified_count == 1
+
+async def release_lease(name: str):
+    await db.leases.delete_one({"_id": name})
+
+def renamed_index(index: IndexModel, name: str) -> IndexModel:
+    document = dict(index.document)
+    keys = list(document.pop("key").items())
+    document["name"] = name
+    return IndexModel(keys, **document)
+
+async def find_duplicate_key(collection, index: IndexModel) -> Optional[dict]:
+    """A key value held by more than one document, which a unique index would reject"""
+    fields = list(index.document["key"])
+    pipeline = []
+    if index.document.get("partialFilterExpression"):
+        pipeline.append({"$match": index.document["partialFilterExpression"]})
+    pipeline += [
+        {"$group": {"_id": {f"k{i}": f"${field}" for i, field in enumerate(fields)}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": 1}
+    ]
+    rows = await collection.aggregate(pipeline, allowDiskUse=True).to_list(1)
+    if not rows:
+        return None
+    return {field: rows[0]["_id"].get(f"k{i}") for i, field in enumerate(fields)}
+
+async def rebuild_index(collection, index: IndexModel):
+    """Replace an index whose definition changed. The old index stays until
+    the new definition has been built under a temporary name, so a failed
+    build (e.g. duplicates under a new unique index) never leaves the
+    collection without it."""
+    name = index.document["name"]
+    if index.document.get("unique"):
+        duplicate = await find_duplicate_key(collection, index)
+        if duplicate is not None:
+            logger.error(f"Index {name} on {collection.name} not rebuilt, duplicate key {duplicate}; the old index is kept")
+            return
+    
+    temporary_name = f"{name}_rebuild"
+    try:
+        await collection.create_indexes([renamed_index(index, temporary_name)])
+    except OperationFailure as e:
+        if e.code not in INDEX_CONFLICT_CODES:
+            logger.error(f"Index {name} rebuild failed on {collection.name}, old index kept: {str(e)}")
+            return
+        # Same keys with other options can't coexist: swap in place. The
+        # duplicate check above is what keeps this build from failing.
+        await collection.drop_index(name)
+        await collection.create_indexes([index])
+        return
+    
+    await collection.drop_index(name)
+    await collection.create_indexes([index])
+    await collection.drop_index(temporary_name)
+
+async def ensure_indexes():
+    """Create all declared indexes; existing ones are left untouched"""
+    for collection_name, indexes in COLLECTION_INDEXES.items():
+        collection = db[collection_name]
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                await collection.create_indexes([index])
+            except OperationFailure as e:
+                if e.code not in INDEX_CONFLICT_CODES:
+                    # A duplicate-violating index must not keep the API down
+                    logger.error(f"Index {name} creation failed on {collection_name}: {str(e)}")
+                    continue
+                # Definition changed (e.g. made unique): one worker rebuilds it
+                lease = f"index_rebuild:{collection_name}.{name}"
+                if not await acquire_lease(lease, INDEX_REBUILD_LEASE_SECONDS):
+                    logger.info(f"Index {name} on {collection_name} is being rebuilt by another worker")
+                    continue
+                logger.info(f"Rebuilding index {name} on {collection_name}")
+                try:
+                    await rebuild_index(collection, index)
+                except OperationFailure as e:
+                    logger.error(f"Index {name} rebuild failed on {collection_name}: {str(e)}")
+                finally:
+                    await release_lease(lease)
+        logger.info(f"Indexes ensured on {collection_name}")
+
 # ===================== HELPER FUNCTIONS =====================
 
-async def generate_project_code():
+# Document code prefixes and the collection holding the codes
+CODE_PREFIXES = {
+    "PRJ": "projects",
+    "SIP": "orders",
+}
+
+def format_code(prefix: str, year: int, seq: int) -> str:
+    return f"{prefix}-{year}-{str(seq).zfill(3)}"
+
+async def allocate_codes(prefix: str, count: int = 1) -> List[str]:
+    """Atomically reserve `count` consecutive codes for the current year"""
     year = datetime.now().year
-    count = await db.projects.count_documents({"code": {"$regex": f"^PRJ-{year}"}})
-    return f"PRJ-{year}-{str(count + 1).zfill(3)}"
+    counter_id = f"{prefix}-{year}"
+    try:
+        counter = await db.counters.find_one_and_update(
+            {"id": counter_id},
+            {"$inc": {"seq": count}, "$setOnInsert": {"prefix": prefix, "year": year}},
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Two first-of-the-year upserts raced; the counter exists now
+        counter = await db.counters.find_one_and_update(
+            {"id": counter_id},
+            {"$inc": {"seq": count}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+    last = counter["seq"]
+    return [format_code(prefix, year, seq) for seq in range(last - count + 1, last + 1)]
+
+async def generate_project_code():
+    codes = await allocate_codes("PRJ")
+    return codes[0]
 
 async def generate_order_code():
-    year = datetime.now().year
-    count = await db.orders.count_documents({"code": {"$regex": f"^SIP-{year}"}})
-    return f"SIP-{year}-{str(count + 1).zfill(3)}"
+    codes = await allocate_codes("SIP")
+    return codes[0]
+
+async def is_migration_applied(migration_id: str) -> bool:
+    return await db.migrations.find_one({"id": migration_id}) is not None
+
+async def record_migration(migration_id: str):
+    try:
+        await db.migrations.insert_one({
+            "id": migration_id,
+            "applied_at": datetime.now(timezone.utc).isoformat()
+        })
+    except DuplicateKeyError:
+        pass  # another worker finished the same migration first
+
+async def seed_code_counters():
+    """One-time migration: start counters from the highest existing code per year"""
+    if await is_migration_applied("seed_code_counters"):
+        return
+    
+    for prefix, collection_name in CODE_PREFIXES.items():
+        pipeline = [
+            {"$match": {"code": {"$regex": f"^{prefix}-[0-9]{{4}}-[0-9]+$"}}},
+            {"$project": {"parts": {"$split": ["$code", "-"]}}},
+            {"$group": {
+                "_id": {"$toInt": {"$arrayElemAt": ["$parts", 1]}},
+                "max_seq": {"$max": {"$toInt": {"$arrayElemAt": ["$parts", 2]}}}
+            }}
+        ]
+        async for row in db[collection_name].aggregate(pipeline):
+            year = row["_id"]
+            # $max keeps any counter that already moved past the seeded value
+            await db.counters.update_one(
+                {"id": f"{prefix}-{year}"},
+                {"$max": {"seq": row["max_seq"]}, "$setOnInsert": {"prefix": prefix, "year": year}},
+                upsert=True
+            )
+            logger.info(f"Code counter {prefix}-{year} seeded at {row['max_seq']}")
+    
+    await record_migration("seed_code_counters")
+
+# Keyset pagination over (created_at, id), newest first
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 1000
+KEYSET_SORT = [("created_at", DESCENDING), ("id", DESCENDING)]
+
+def encode_cursor(doc: dict) -> str:
+    raw = json.dumps([doc.get("created_at"), doc.get("id")], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Geçersiz sayfa imleci")
+    # The values go straight into the query; anything else could carry operators
+    if not isinstance(created_at, str) or not isinstance(doc_id, str):
+        raise HTTPException(status_code=400, detail="Geçersiz sayfa imleci")
+    return created_at, doc_id
+
+def keyset_query(query: dict, cursor: Optional[str]) -> dict:
+    """Restrict a query to the documents after the cursor position"""
+    if not cursor:
+        return query
+    created_at, doc_id = decode_cursor(cursor)
+    after = {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": doc_id}}
+    ]}
+    return {"$and": [query, after]} if query else after
+
+async def paginate(collection, query: dict, limit: int, cursor: Optional[str] = None) -> FastJSONResponse:
+    """Fetch one page with the X-Has-More / X-Next-Cursor headers. The documents
+    are JSON-native already, so they are serialized as-is without jsonable_encoder."""
+    docs = await collection.find(keyset_query(query, cursor), {"_id": 0}).sort(KEYSET_SORT).limit(limit + 1).to_list(limit + 1)
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    headers = {"X-Has-More": "true" if has_more else "false"}
+    if has_more:
+        headers["X-Next-Cursor"] = encode_cursor(docs[-1])
+    return FastJSONResponse(docs, headers=headers)
+
+NDJSON_BATCH_SIZE = 500
+
+async def stream_ndjson(collection, query: dict):
+    """Yield documents as NDJSON lines straight from the cursor, batch by batch"""
+    cursor = collection.find(query, {"_id": 0}).sort(KEYSET_SORT).batch_size(NDJSON_BATCH_SIZE)
+    async for doc in cursor:
+        yield dump_json(doc) + b"\n"
+
+async def list_documents(collection, query: dict, limit: int, cursor: Optional[str] = None, stream: Optional[str] = None):
+    """Shared list route body: a keyset page, or the full result as NDJSON"""
+    if stream == "ndjson":
+        return StreamingResponse(
+            stream_ndjson(collection, keyset_query(query, cursor)),
+            media_type="application/x-ndjson"
+        )
+    return await paginate(collection, query, limit, cursor)
+
+def get_loaders() -> Loaders:
+    """Request-scoped batching loaders (FastAPI dependency)"""
+    return Loaders(db)
+
+class StaleWhileRevalidateCache:
+    """In-process cache: entries are fresh for `ttl` seconds, then served stale
+    for up to `max_stale` seconds while a single background task refreshes them"""
+    
+    def __init__(self, ttl: float, max_stale: float):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries: Dict[Any, tuple] = {}
+        self._refreshing: Dict[Any, asyncio.Task] = {}
+        # Bumped by set/invalidate so a load that started earlier doesn't overwrite them
+        self._versions: Dict[Any, int] = {}
+    
+    async def get(self, key, loader):
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry:
+            value, loaded_at = entry
+            age = now - loaded_at
+            if age < self.ttl:
+                return value
+            if age < self.ttl + self.max_stale:
+                if key not in self._refreshing:
+                    self._refreshing[key] = asyncio.create_task(self._refresh(key, loader))
+                return value
+        return await self._load(key, loader)
+    
+    async def _load(self, key, loader):
+        version = self._versions.get(key, 0)
+        value = await loader()
+        if self._versions.get(key, 0) == version:
+            self._entries[key] = (value, time.monotonic())
+        return value
+    
+    async def _refresh(self, key, loader):
+        try:
+            await self._load(key, loader)
+        except Exception as e:
+            logger.error(f"Cache refresh error for {key}: {str(e)}")
+        finally:
+            self._refreshing.pop(key, None)
+    
+    def set(self, key, value):
+        """Write-through: store a value the caller has just persisted"""
+        self._versions[key] = self._versions.get(key, 0) + 1
+        self._entries[key] = (value, time.monotonic())
+    
+    def invalidate(self, key=None):
+        keys = list(self._entries) if key is None else [key]
+        for k in keys:
+            self._versions[k] = self._versions.get(k, 0) + 1
+            self._entries.pop(k, None)
+
+class DerivedViewCache:
+    """Per-project computed views keyed by (view, project_id, project version,
+    extra). A version never changes meaning, so entries need no TTL: only the
+    newest version of each view is kept, least recently used first out."""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._latest: Dict[tuple, tuple] = {}
+        self._pending: Dict[tuple, asyncio.Task] = {}
+    
+    async def get(self, view: str, project_id: str, version: int, loader, extra: Any = None):
+        key = (view, project_id, version, extra)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        # Concurrent misses share one computation. It runs in its own task so
+        # a caller that goes away (client disconnect) doesn't cancel it for the rest.
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.ensure_future(self._compute(key, loader))
+        return await asyncio.shield(task)
+    
+    async def _compute(self, key: tuple, loader):
+        try:
+            value = await loader()
+        finally:
+            self._pending.pop(key, None)
+        self._store(key, value)
+        return value
+    
+    def _store(self, key: tuple, value):
+        view, project_id, version, _ = key
+        previous = self._latest.get((view, project_id))
+        if previous is not None and previous[2] > version:
+            return  # computed from data that is already outdated
+        if previous is not None:
+            self._entries.pop(previous, None)
+        self._latest[(view, project_id)] = key
+        self._entries[key] = value
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._latest.pop(evicted[:2], None)
+    
+    def discard_project(self, project_id: str):
+        for key in [key for key in self._entries if key[1] == project_id]:
+            del self._entries[key]
+            self._latest.pop(key[:2], None)
+
+class EventHub:
+    """In-process pub/sub: every subscriber gets its own bounded queue. A
+    subscriber that falls behind is disconnected instead of slowing publishers."""
+    
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        # True while an external feed (a change stream) publishes every change
+        self.fed_externally = False
+        self._subscribers: set = set()
+    
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+    
+    def publish(self, event: str, data: dict):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # The client reconnects and reloads; None ends its stream
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+NOTIFICATION_STREAM_QUEUE_SIZE = 100
+notification_hub = EventHub(NOTIFICATION_STREAM_QUEUE_SIZE)
+
+def publish_notification_created(doc: dict, local: bool = True):
+    """`local` changes are skipped while the change stream delivers them to every worker"""
+    if local and notification_hub.fed_externally:
+        return
+    notification_hub.publish("notification", doc)
+    if not doc.get("is_read"):
+        notification_hub.publish("unread", {"delta": 1})
+
+def publish_notifications_read(count: int, local: bool = True):
+    if count and not (local and notification_hub.fed_externally):
+        notification_hub.publish("unread", {"delta": -count})
 
 async def create_notification(notification_type: str, title: str, message: str, ref_type: str = None, ref_id: str = None):
     notification = Notification(
@@ -275,9 +785,80 @@ async def create_notification(notification_type: str, title: str, message: str,
         reference_type=ref_type,
         reference_id=ref_id
     )
-    await db.notifications.insert_one(notification.model_dump())
+    doc = notification.model_dump()
+    # BSON date twin of created_at for the retention TTL index
+    doc["created_on"] = datetime.fromisoformat(doc["created_at"])
+    await db.notifications.insert_one(doc)
+    await db.counters.update_one({"id": NOTIFICATION_STATE_ID}, {"$inc": {"unread": 1}}, upsert=True)
+    doc.pop("_id", None)
+    doc.pop("created_on", None)
+    publish_notification_created(doc)
     return notification
 
+# Unread count and read-all watermark live in one counters document, so
+# neither counting nor "read all" has to touch the notifications themselves.
+# A notification is read if is_read is set or it is not newer than the watermark.
+NOTIFICATION_STATE_ID = "notifications"
+NOTIFICATION_BACKFILL_BATCH = 1000
+NOTIFICATION_PROJECTION = {"_id": 0, "created_on": 0}
+
+async def get_notification_state() -> dict:
+    state = await db.counters.find_one({"id": NOTIFICATION_STATE_ID}, {"_id": 0}) or {}
+    # "" sorts before every ISO timestamp: nothing read in bulk yet
+    return {"unread": max(state.get("unread", 0), 0), "read_watermark": state.get("read_watermark", "")}
+
+def unread_notifications_query(read_watermark: str) -> dict:
+    return {"is_read": False, "created_at": {"$gt": read_watermark}}
+
+async def reconcile_unread_notifications():
+    """Recount unread notifications; corrects drift from TTL deletions and
+    from a notification created while "read all" was running"""
+    state = await get_notification_state()
+    unread = await db.notifications.count_documents(unread_notifications_query(state["read_watermark"]))
+    await db.counters.update_one({"id": NOTIFICATION_STATE_ID}, {"$set": {"unread": unread}}, upsert=True)
+
+async def backfill_notification_dates():
+    """One-time migration: add created_on to notifications stored before retention existed"""
+    if await is_migration_applied("notification_created_on"):
+        return
+    
+    operations = []
+    async for doc in db.notifications.find({"created_on": {"$exists": False}}, {"_id": 1, "created_at": 1}):
+        try:
+            created_on = datetime.fromisoformat(doc["created_at"])
+        except (KeyError, TypeError, ValueError):
+            created_on = datetime.now(timezone.utc)
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"created_on": created_on}}))
+        if len(operations) >= NOTIFICATION_BACKFILL_BATCH:
+            await db.notifications.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await db.notifications.bulk_write(operations, ordered=False)
+    
+    await reconcile_unread_notifications()
+    await record_migration("notification_created_on")
+
+NOTIFICATION_MAINTENANCE_INTERVAL = 3600  # seconds
+
+async def notification_maintenance():
+    """Apply the retention setting and keep the unread counter honest"""
+    if NOTIFICATION_RETENTION_DAYS <= 0:
+        try:
+            await db.notifications.drop_index(NOTIFICATION_TTL_INDEX)
+            logger.info("Notification retention disabled, TTL index dropped")
+        except OperationFailure:
+            pass  # no TTL index
+    try:
+        await backfill_notification_dates()
+    except Exception as e:
+        logger.error(f"Notification date backfill error: {str(e)}")
+    while True:
+        await asyncio.sleep(NOTIFICATION_MAINTENANCE_INTERVAL)
+        try:
+            await reconcile_unread_notifications()
+        except Exception as e:
+            logger.error(f"Unread notification recount error: {str(e)}")
+
 def calculate_supplier_score(performance: dict) -> dict:
     total_orders = performance.get("total_orders", 0)
     on_time = performance.get("on_time_deliveries", 0)
@@ -335,31 +916,83 @@ def calculate_supplier_score(performance: dict) -> dict:
 async def root():
     return {"message": "ProManufakt API", "version": "1.0.0"}
 
+# --- Derived Views ---
+DERIVED_VIEW_CACHE_SIZE = int(os.environ.get('DERIVED_VIEW_CACHE_SIZE', '256'))
+derived_views = DerivedViewCache(DERIVED_VIEW_CACHE_SIZE)
+
+async def bump_project_version(*project_ids: Optional[str]):
+    """Mark the derived views (Gantt, parts export) of these projects outdated.
+    Call after every write to a project or its parts."""
+    project_ids = [project_id for project_id in dict.fromkeys(project_ids) if project_id]
+    if not project_ids:
+        return
+    await db.projects.update_many({"id": {"$in": project_ids}}, {"$inc": {"version": 1}})
+    for project_id in project_ids:
+        derived_views.discard_project(project_id)
+
 # --- Static Data Routes ---
+# The catalogs only change with a deploy: they are serialized once at import
+# and clients may cache them, revalidating with the content-hash ETag
+CATALOG_CACHE_CONTROL = "public, max-age=86400"
+
+def content_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+def json_bytes_response(request: Request, body: bytes, etag: str, cache_control: str) -> Response:
+    """Already-encoded JSON, or 304 when the client's copy is current"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+CATALOGS = {
+    "materials": MATERIALS,
+    "form_types": FORM_TYPES,
+    "manufacturing_methods": MANUFACTURING_METHODS,
+    "statuses": {
+        "project": PROJECT_STATUSES,
+        "part": PART_STATUSES,
+        "order": ORDER_STATUSES,
+        "quote": QUOTE_STATUSES
+    },
+    "currencies": CURRENCIES
+}
+CATALOG_BODIES = {name: dump_json(data) for name, data in CATALOGS.items()}
+CATALOG_ETAGS = {name: content_etag(body) for name, body in CATALOG_BODIES.items()}
+# All catalogs as the members of one JSON object, without the braces
+CATALOG_MEMBERS = dump_json(CATALOGS)[1:-1]
+
+def catalog_response(request: Request, name: str) -> Response:
+    return json_bytes_response(request, CATALOG_BODIES[name], CATALOG_ETAGS[name], CATALOG_CACHE_CONTROL)
+
 @api_router.get("/materials")
-async def get_materials():
-    return MATERIALS
+async def get_materials(request: Request):
+    return catalog_response(request, "materials")
 
 @api_router.get("/form-types")
-async def get_form_types():
-    return FORM_TYPES
+async def get_form_types(request: Request):
+    return catalog_response(request, "form_types")
 
 @api_router.get("/manufacturing-methods")
-async def get_manufacturing_methods():
-    return MANUFACTURING_METHODS
+async def get_manufacturing_methods(request: Request):
+    return catalog_response(request, "manufacturing_methods")
 
 @api_router.get("/statuses")
-async def get_statuses():
-    return {
-        "project": PROJECT_STATUSES,
-        "part": PART_STATUSES,
-        "order": ORDER_STATUSES,
-        "quote": QUOTE_STATUSES
-    }
+async def get_statuses(request: Request):
+    return catalog_response(request, "statuses")
 
 @api_router.get("/currencies")
-async def get_currencies():
-    return CURRENCIES
+async def get_currencies(request: Request):
+    return catalog_response(request, "currencies")
+
+@api_router.get("/bootstrap")
+async def get_bootstrap(request: Request):
+    """Every catalog plus settings and current currency rates in one round trip"""
+    settings, rates = await asyncio.gather(get_settings(), get_currency_rates())
+    body = b"{" + CATALOG_MEMBERS + b',"settings":' + dump_json(settings) + b',"currency_rates":' + dump_json(rates) + b"}"
+    # Settings and rates can change at any time, so always revalidate
+    return json_bytes_response(request, body, content_etag(body), "no-cache")
 
 # --- Project Routes ---
 @api_router.post("/projects", response_model=Project)
@@ -372,12 +1005,16 @@ async def create_project(data: ProjectCreate):
     return project
 
 @api_router.get("/projects")
-async def get_projects(status: Optional[str] = None):
+async def get_projects(
+    status: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^ndjson$")
+):
     query = {}
     if status:
         query["status"] = status
-    projects = await db.projects.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    return projects
+    return await list_documents(db.projects, query, limit, cursor, stream)
 
 @api_router.get("/projects/{project_id}")
 async def get_project(project_id: str):
@@ -388,10 +1025,13 @@ async def get_project(project_id: str):
 
 @api_router.put("/projects/{project_id}")
 async def update_project(project_id: str, data: dict):
+    # The client may echo the version back; only writes move it
+    data.pop("version", None)
     data["updated_at"] = datetime.now(timezone.utc).isoformat()
-    result = await db.projects.update_one({"id": project_id}, {"$set": data})
+    result = await db.projects.update_one({"id": project_id}, {"$set": data, "$inc": {"version": 1}})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Proje bulunamadı")
+    derived_views.discard_project(project_id)
     return await db.projects.find_one({"id": project_id}, {"_id": 0})
 
 @api_router.delete("/projects/{project_id}")
@@ -399,7 +1039,18 @@ async def delete_project(project_id: str):
     result = await db.projects.delete_one({"id": project_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Proje bulunamadı")
+    
+    # Release the files of every part before dropping the parts
+    cursor = db.parts.find(
+        {"project_id": project_id},
+        {"_id": 0, "technical_drawing_filename": 1, "additional_documents.filename": 1}
+    )
+    async for part in cursor:
+        for filename in part_filenames(part):
+            await release_file(filename)
     await db.parts.delete_many({"project_id": project_id})
+    derived_views.discard_project(project_id)
+    await discard_cached_exports(project_id)
     return {"message": "Proje silindi"}
 
 # --- Part Routes ---
@@ -414,18 +1065,27 @@ async def create_part(data: PartCreate):
     doc = part.model_dump()
     if doc.get("dimensions"):
         doc["dimensions"] = doc["dimensions"]
-    await db.parts.insert_one(doc)
+    try:
+        await db.parts.insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail=f"'{part.code}' kodu bu projede zaten mevcut")
+    await bump_project_version(part.project_id)
     return part
 
 @api_router.get("/parts")
-async def get_parts(project_id: Optional[str] = None, status: Optional[str] = None):
+async def get_parts(
+    project_id: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^ndjson$")
+):
     query = {}
     if project_id:
         query["project_id"] = project_id
     if status:
         query["status"] = status
-    parts = await db.parts.find(query, {"_id": 0}).to_list(1000)
-    return parts
+    return await list_documents(db.parts, query, limit, cursor, stream)
 
 @api_router.get("/parts/{part_id}")
 async def get_part(part_id: str):
@@ -436,111 +1096,290 @@ async def get_part(part_id: str):
 
 @api_router.put("/parts/{part_id}")
 async def update_part(part_id: str, data: dict):
-    result = await db.parts.update_one({"id": part_id}, {"$set": data})
-    if result.matched_count == 0:
+    try:
+        # The previous project_id: a moved part changes both projects
+        previous = await db.parts.find_one_and_update(
+            {"id": part_id}, {"$set": data}, projection={"_id": 0, "project_id": 1}
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail=f"'{data.get('code')}' kodu bu projede zaten mevcut")
+    if previous is None:
         raise HTTPException(status_code=404, detail="Parça bulunamadı")
+    await bump_project_version(previous.get("project_id"), data.get("project_id"))
     return await db.parts.find_one({"id": part_id}, {"_id": 0})
 
 @api_router.delete("/parts/{part_id}")
 async def delete_part(part_id: str):
     # Get part to delete associated files
     part = await db.parts.find_one({"id": part_id}, {"_id": 0})
-    if part:
-        # Delete technical drawing file if exists
-        if part.get("technical_drawing_filename"):
-            file_path = UPLOADS_DIR / part["technical_drawing_filename"]
-            if file_path.exists():
-                file_path.unlink()
-        # Delete additional documents
-        for doc_file in part.get("additional_documents", []):
-            if doc_file.get("filename"):
-                file_path = UPLOADS_DIR / doc_file["filename"]
-                if file_path.exists():
-                    file_path.unlink()
     
     result = await db.parts.delete_one({"id": part_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Parça bulunamadı")
+    
+    await bump_project_version(part.get("project_id"))
+    
+    # Drop this part's references to its technical drawing and documents
+    for filename in part_filenames(part):
+        await release_file(filename)
     return {"message": "Parça silindi"}
 
 # --- File Upload Routes ---
 ALLOWED_EXTENSIONS = {'.pdf', '.dwg', '.dxf', '.step', '.stp', '.iges', '.igs', '.png', '.jpg', '.jpeg'}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
-
-@api_router.post("/upload/technical-drawing/{part_id}")
-async def upload_technical_drawing(part_id: str, file: UploadFile = File(...)):
-    """Upload technical drawing for a part (PDF, DWG, DXF, STEP, etc.)"""
-    part = await db.parts.find_one({"id": part_id}, {"_id": 0})
+CONTENT_TYPES = {
+    '.pdf': 'application/pdf',
+    '.dwg': 'image/vnd.dwg',
+    '.dxf': 'image/vnd.dxf',
+    '.step': 'model/step',
+    '.stp': 'model/step',
+    '.iges': 'model/iges',
+    '.igs': 'model/iges',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+}
+# Blob contents never change under their name; legacy files must be revalidated
+BLOB_CACHE_CONTROL = "public, max-age=31536000, immutable"
+LEGACY_CACHE_CONTROL = "no-cache"
+
+# Where upload bytes live: local UPLOADS_DIR or an S3-compatible bucket.
+# UPLOADS_DIR is always used for staging (temp files, resumable sessions).
+storage = create_storage(UPLOADS_DIR)
+# Legacy flat files were only ever written to UPLOADS_DIR. They are read and
+# deleted there, whatever the backend, until migrate_uploads_to_blobs adopts them.
+legacy_storage = LocalStorage(UPLOADS_DIR)
+
+# Uploads are stored once per content hash under blobs/<sha[:2]>/<sha> and
+# referenced from parts as "<sha256><ext>"; blobs.ref_count tracks the references
+BLOB_FILENAME_PATTERN = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]+)?$")
+
+def blob_key(sha256: str) -> str:
+    return f"blobs/{sha256[:2]}/{sha256}"
+
+def resolve_upload(filename: str) -> Optional[tuple]:
+    """Map a stored filename to (backend, key): blobs live in `storage`,
+    legacy flat files in UPLOADS_DIR"""
+    if Path(filename).name != filename or filename.startswith("."):
+        return None
+    match = BLOB_FILENAME_PATTERN.match(filename)
+    if match:
+        return storage, blob_key(match.group(1))
+    return legacy_storage, filename
+
+def content_type_for(filename: str) -> str:
+    return CONTENT_TYPES.get(Path(filename).suffix.lower(), "application/octet-stream")
+
+def part_filenames(part: Optional[dict]) -> List[str]:
     if not part:
-        raise HTTPException(status_code=404, detail="Parça bulunamadı")
-    
-    # Validate file extension
-    file_ext = Path(file.filename).suffix.lower()
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Desteklenmeyen dosya formatı. İzin verilen: {', '.join(ALLOWED_EXTENSIONS)}"
+        return []
+    filenames = []
+    if part.get("technical_drawing_filename"):
+        filenames.append(part["technical_drawing_filename"])
+    for doc_file in part.get("additional_documents", []):
+        if doc_file.get("filename"):
+            filenames.append(doc_file["filename"])
+    return filenames
+
+# A blob record with deleting_at is having its bytes removed and counts as absent
+BLOB_DELETE_POLL_INTERVAL = 0.05
+# A deletion older than this was abandoned by a crashed worker
+BLOB_DELETE_STALE_SECONDS = 600
+
+async def acquire_blob(sha256: str, size: int):
+    """Add one reference to a blob, creating its record if needed. If the
+    blob is being deleted, wait for that to finish and start a new record, so
+    the caller's existence check sees the bytes as gone."""
+    update = {
+        "$inc": {"ref_count": 1},
+        "$setOnInsert": {"size": size, "created_at": datetime.now(timezone.utc).isoformat()}
+    }
+    while True:
+        try:
+            await db.blobs.update_one({"id": sha256, "deleting_at": {"$exists": False}}, update, upsert=True)
+            return
+        except DuplicateKeyError:
+            pass
+        # Lost an insert race (retry at once) or the record is being deleted
+        blob = await db.blobs.find_one({"id": sha256}, {"_id": 0, "deleting_at": 1})
+        if not blob or not blob.get("deleting_at"):
+            continue
+        stale_before = (datetime.now(timezone.utc) - timedelta(seconds=BLOB_DELETE_STALE_SECONDS)).isoformat()
+        if blob["deleting_at"] < stale_before:
+            await db.blobs.delete_one({"id": sha256, "deleting_at": blob["deleting_at"]})
+        else:
+            await asyncio.sleep(BLOB_DELETE_POLL_INTERVAL)
+
+async def store_blob(received: dict) -> str:
+    """Move a received upload into the blob store and return its filename"""
+    sha256 = received["sha256"]
+    await acquire_blob(sha256, received["size"])
+    key = blob_key(sha256)
+    if await storage.exists(key):
+        # Identical content is already stored
+        await discard_file(received)
+    else:
+        await storage.put_file(received["temp_path"], key, content_type_for(received["extension"]))
+    return f"{sha256}{received['extension']}"
+
+async def release_file(filename: str):
+    """Drop one reference to a stored file; the bytes go with the last one"""
+    match = BLOB_FILENAME_PATTERN.match(filename)
+    if not match:
+        # Legacy file stored per part
+        resolved = resolve_upload(filename)
+        if resolved:
+            backend, key = resolved
+            await backend.delete(key)
+            for size in THUMBNAIL_SIZES:
+                await backend.delete(thumbnail_key(key, size))
+        return
+    
+    sha256 = match.group(1)
+    blob = await db.blobs.find_one_and_update(
+        {"id": sha256},
+        {"$inc": {"ref_count": -1}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if blob and blob["ref_count"] <= 0:
+        # Claim the deletion first: an acquire that got in before keeps the
+        # blob alive, and one that comes after waits until the bytes are gone
+        deleting_at = datetime.now(timezone.utc).isoformat()
+        result = await db.blobs.update_one(
+            {"id": sha256, "ref_count": {"$lte": 0}, "deleting_at": {"$exists": False}},
+            {"$set": {"deleting_at": deleting_at}}
         )
+        if result.modified_count:
+            key = blob_key(sha256)
+            await storage.delete(key)
+            for size in THUMBNAIL_SIZES:
+                await storage.delete(thumbnail_key(key, size))
+            await db.blobs.delete_one({"id": sha256, "deleting_at": deleting_at})
+
+async def adopt_legacy_file(filename: str) -> Optional[dict]:
+    """Move a legacy per-part file from UPLOADS_DIR into the blob store
+    (one new reference)"""
+    legacy_path = UPLOADS_DIR / filename
+    try:
+        sha256, size = await asyncio.to_thread(hash_file, legacy_path)
+    except FileNotFoundError:
+        return None
+    await acquire_blob(sha256, size)
+    key = blob_key(sha256)
+    try:
+        if await storage.exists(key):
+            await asyncio.to_thread(legacy_path.unlink)
+        else:
+            await storage.put_file(legacy_path, key, content_type_for(filename))
+    except FileNotFoundError:
+        pass  # a concurrent migration moved it already
+    return {
+        "filename": f"{sha256}{Path(filename).suffix.lower()}",
+        "sha256": sha256,
+        "size": size
+    }
+
+async def migrate_uploads_to_blobs():
+    """One-time migration: move per-part upload files into the blob store"""
+    if await is_migration_applied("uploads_to_blobs"):
+        return
     
-    # Generate unique filename
-    unique_filename = f"{part_id}_drawing_{uuid.uuid4().hex[:8]}{file_ext}"
-    file_path = UPLOADS_DIR / unique_filename
-    
-    # Delete old file if exists
-    if part.get("technical_drawing_filename"):
-        old_file = UPLOADS_DIR / part["technical_drawing_filename"]
-        if old_file.exists():
-            old_file.unlink()
+    cursor = db.parts.find(
+        {"$or": [{"technical_drawing_filename": {"$exists": True}}, {"additional_documents.0": {"$exists": True}}]},
+        {"_id": 0, "id": 1, "technical_drawing_filename": 1, "additional_documents": 1}
+    )
+    migrated = 0
+    async for part in cursor:
+        legacy = part.get("technical_drawing_filename")
+        if legacy and not BLOB_FILENAME_PATTERN.match(legacy):
+            blob = await adopt_legacy_file(legacy)
+            if blob:
+                # Conditional on the old name so a concurrent run cannot count it twice
+                result = await db.parts.update_one(
+                    {"id": part["id"], "technical_drawing_filename": legacy},
+                    {"$set": {
+                        "technical_drawing_filename": blob["filename"],
+                        "technical_drawing_sha256": blob["sha256"],
+                        "technical_drawing_size": blob["size"]
+                    }}
+                )
+                if result.modified_count:
+                    migrated += 1
+                else:
+                    await release_file(blob["filename"])
+        
+        for doc_file in part.get("additional_documents", []):
+            legacy = doc_file.get("filename")
+            if not legacy or BLOB_FILENAME_PATTERN.match(legacy):
+                continue
+            blob = await adopt_legacy_file(legacy)
+            if not blob:
+                continue
+            result = await db.parts.update_one(
+                {"id": part["id"], "additional_documents": {"$elemMatch": {"id": doc_file.get("id"), "filename": legacy}}},
+                {"$set": {
+                    "additional_documents.$.filename": blob["filename"],
+                    "additional_documents.$.sha256": blob["sha256"],
+                    "additional_documents.$.size": blob["size"]
+                }}
+            )
+            if result.modified_count:
+                migrated += 1
+            else:
+                await release_file(blob["filename"])
     
-    # Save file
+    logger.info(f"Upload migration moved {migrated} files into the blob store")
+    await record_migration("uploads_to_blobs")
+
+async def attach_technical_drawing(part: dict, received: dict) -> dict:
+    """Store a received file as the part's technical drawing"""
+    # Save file (deduplicated by content hash)
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        unique_filename = await store_blob(received)
     except Exception as e:
+        await discard_file(received)
         logger.error(f"File upload error: {str(e)}")
         raise HTTPException(status_code=500, detail="Dosya yüklenemedi")
     
-    # Update part with file info
-    await db.parts.update_one(
-        {"id": part_id},
+    # Swap in the new drawing; the replaced one is read from the same update, so
+    # concurrent replacements each release the drawing they actually replaced
+    replaced = await db.parts.find_one_and_update(
+        {"id": part["id"]},
         {"$set": {
             "technical_drawing_filename": unique_filename,
-            "technical_drawing_original_name": file.filename,
+            "technical_drawing_original_name": received["original_name"],
+            "technical_drawing_size": received["size"],
+            "technical_drawing_sha256": received["sha256"],
             "technical_drawing_uploaded_at": datetime.now(timezone.utc).isoformat()
-        }}
+        }},
+        projection={"_id": 0, "id": 1, "technical_drawing_filename": 1},
+        return_document=ReturnDocument.BEFORE
     )
+    if replaced is None:
+        await release_file(unique_filename)
+        raise HTTPException(status_code=404, detail="Parça bulunamadı")
+    if replaced.get("technical_drawing_filename"):
+        await release_file(replaced["technical_drawing_filename"])
+    
+    schedule_thumbnail(unique_filename)
+    await bump_project_version(part.get("project_id"))
     
     return {
         "success": True,
         "filename": unique_filename,
-        "original_name": file.filename,
+        "original_name": received["original_name"],
+        "sha256": received["sha256"],
         "message": "Teknik resim başarıyla yüklendi"
     }
 
-@api_router.post("/upload/document/{part_id}")
-async def upload_additional_document(part_id: str, file: UploadFile = File(...)):
-    """Upload additional document for a part"""
-    part = await db.parts.find_one({"id": part_id}, {"_id": 0})
-    if not part:
-        raise HTTPException(status_code=404, detail="Parça bulunamadı")
-    
-    # Validate file extension
-    file_ext = Path(file.filename).suffix.lower()
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Desteklenmeyen dosya formatı. İzin verilen: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
-    
-    # Generate unique filename
-    unique_filename = f"{part_id}_doc_{uuid.uuid4().hex[:8]}{file_ext}"
-    file_path = UPLOADS_DIR / unique_filename
-    
-    # Save file
+async def attach_document(part: dict, received: dict) -> dict:
+    """Store a received file as an additional document of the part"""
+    # Save file (deduplicated by content hash)
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        unique_filename = await store_blob(received)
     except Exception as e:
+        await discard_file(received)
         logger.error(f"File upload error: {str(e)}")
         raise HTTPException(status_code=500, detail="Dosya yüklenemedi")
     
@@ -548,14 +1387,18 @@ async def upload_additional_document(part_id: str, file: UploadFile = File(...))
     doc_info = {
         "id": str(uuid.uuid4()),
         "filename": unique_filename,
-        "original_name": file.filename,
+        "original_name": received["original_name"],
+        "size": received["size"],
+        "sha256": received["sha256"],
         "uploaded_at": datetime.now(timezone.utc).isoformat()
     }
     
     await db.parts.update_one(
-        {"id": part_id},
+        {"id": part["id"]},
         {"$push": {"additional_documents": doc_info}}
     )
+    await bump_project_version(part.get("project_id"))
+    schedule_thumbnail(unique_filename)
     
     return {
         "success": True,
@@ -563,18 +1406,118 @@ async def upload_additional_document(part_id: str, file: UploadFile = File(...))
         "message": "Döküman başarıyla yüklendi"
     }
 
+@api_router.post("/upload/technical-drawing/{part_id}")
+async def upload_technical_drawing(part_id: str, request: Request):
+    """Upload technical drawing for a part (PDF, DWG, DXF, STEP, etc.)"""
+    part = await db.parts.find_one({"id": part_id}, {"_id": 0})
+    if not part:
+        raise HTTPException(status_code=404, detail="Parça bulunamadı")
+    
+    # Stream the body to a temp file; size and extension are checked on the way
+    received = await receive_file(request, UPLOADS_DIR, MAX_FILE_SIZE, ALLOWED_EXTENSIONS)
+    return await attach_technical_drawing(part, received)
+
+@api_router.post("/upload/document/{part_id}")
+async def upload_additional_document(part_id: str, request: Request):
+    """Upload additional document for a part"""
+    part = await db.parts.find_one({"id": part_id}, {"_id": 0})
+    if not part:
+        raise HTTPException(status_code=404, detail="Parça bulunamadı")
+    
+    # Stream the body to a temp file; size and extension are checked on the way
+    received = await receive_file(request, UPLOADS_DIR, MAX_FILE_SIZE, ALLOWED_EXTENSIONS)
+    return await attach_document(part, received)
+
+# Thumbnails are rendered in worker processes; PREVIEW_WORKERS bounds the CPU they take
+PREVIEW_WORKERS = int(os.environ.get('PREVIEW_WORKERS', '2'))
+# Workers come from a fork server: forking this process directly would copy
+# locks held by its threads (Motor, to_thread, logging) into the children
+preview_executor = ProcessPoolExecutor(max_workers=PREVIEW_WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+# Renders in progress, so concurrent requests for one thumbnail share the work
+preview_jobs: Dict[str, asyncio.Future] = {}
+
+async def ensure_thumbnail(filename: str, size: int) -> tuple:
+    """Return (backend, key) of the cached thumbnail, rendering it if needed.
+    Thumbnails are kept next to their original."""
+    backend, key = resolve_upload(filename)
+    thumb_key = thumbnail_key(key, size)
+    if await backend.exists(thumb_key):
+        return backend, thumb_key
+    
+    job = preview_jobs.get(thumb_key)
+    if job is None:
+        job = asyncio.ensure_future(render_and_store_thumbnail(backend, key, Path(filename).suffix.lower(), size, thumb_key))
+        preview_jobs[thumb_key] = job
+        job.add_done_callback(lambda _: preview_jobs.pop(thumb_key, None))
+    await asyncio.shield(job)
+    return backend, thumb_key
+
+async def render_and_store_thumbnail(backend, key: str, extension: str, size: int, thumb_key: str):
+    # Local files are opened by path in the worker; remote ones are shipped as bytes
+    source = backend.local_path(key) or await backend.get_bytes(key)
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(preview_executor, render_thumbnail, source, extension, size)
+    await backend.put_bytes(thumb_key, data, "image/webp")
+
+async def generate_default_thumbnail(filename: str):
+    try:
+        await ensure_thumbnail(filename, DEFAULT_THUMBNAIL_SIZE)
+    except PreviewUnavailable:
+        pass
+    except Exception as e:
+        logger.error(f"Thumbnail error for {filename}: {str(e)}")
+
+def schedule_thumbnail(filename: str):
+    """Render the default thumbnail in the background after an upload"""
+    if not is_previewable(filename):
+        return
+    task = asyncio.create_task(generate_default_thumbnail(filename))
+    background_tasks.add(task)
+    task.add_done_callback(forget_background_task)
+
 @api_router.get("/files/{filename}")
-async def get_file(filename: str):
-    """Download a file"""
-    file_path = UPLOADS_DIR / filename
-    if not file_path.exists():
+async def get_file(filename: str, request: Request):
+    """Download a file (supports Range and conditional requests; redirects to
+    a presigned URL when files are kept in S3)"""
+    resolved = resolve_upload(filename)
+    if not resolved or not await resolved[0].exists(resolved[1]):
         raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+    backend, key = resolved
     
-    return FileResponse(
-        path=file_path,
-        filename=filename,
-        media_type="application/octet-stream"
-    )
+    match = BLOB_FILENAME_PATTERN.match(filename)
+    if match:
+        etag = f'"{match.group(1)}"'
+        cache_control = BLOB_CACHE_CONTROL
+    else:
+        etag = None  # derived from the file's mtime and size
+        cache_control = LEGACY_CACHE_CONTROL
+    
+    return await backend.download_response(request, key, filename, content_type_for(filename), etag, cache_control)
+
+@api_router.get("/files/{filename}/thumbnail")
+async def get_file_thumbnail(filename: str, request: Request, size: int = DEFAULT_THUMBNAIL_SIZE):
+    """WebP preview of an image or the first page of a PDF"""
+    if size not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail=f"Geçersiz boyut. İzin verilen: {', '.join(map(str, THUMBNAIL_SIZES))}")
+    resolved = resolve_upload(filename)
+    if not resolved or not await resolved[0].exists(resolved[1]):
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+    if not is_previewable(filename):
+        raise HTTPException(status_code=404, detail="Bu dosya türü için önizleme yok")
+    
+    try:
+        backend, thumb_key = await ensure_thumbnail(filename, size)
+    except PreviewUnavailable as e:
+        raise HTTPException(status_code=404, detail=f"Önizleme oluşturulamadı: {str(e)}")
+    except Exception as e:
+        logger.error(f"Thumbnail error for {filename}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Önizleme oluşturulamadı")
+    
+    match = BLOB_FILENAME_PATTERN.match(filename)
+    etag = f'"{match.group(1)}-{size}"' if match else None
+    cache_control = BLOB_CACHE_CONTROL if match else LEGACY_CACHE_CONTROL
+    download_name = f"{Path(filename).stem}_{size}.webp"
+    return await backend.download_response(request, thumb_key, download_name, "image/webp", etag, cache_control)
 
 @api_router.delete("/files/{part_id}/{filename}")
 async def delete_file(part_id: str, filename: str):
@@ -583,20 +1526,20 @@ async def delete_file(part_id: str, filename: str):
     if not part:
         raise HTTPException(status_code=404, detail="Parça bulunamadı")
     
-    file_path = UPLOADS_DIR / filename
-    
     # Check if it's the technical drawing
     if part.get("technical_drawing_filename") == filename:
-        if file_path.exists():
-            file_path.unlink()
         await db.parts.update_one(
             {"id": part_id},
             {"$unset": {
                 "technical_drawing_filename": "",
                 "technical_drawing_original_name": "",
+                "technical_drawing_size": "",
+                "technical_drawing_sha256": "",
                 "technical_drawing_uploaded_at": ""
             }}
         )
+        await bump_project_version(part.get("project_id"))
+        await release_file(filename)
         return {"success": True, "message": "Teknik resim silindi"}
     
     # Check if it's an additional document
@@ -608,16 +1551,228 @@ async def delete_file(part_id: str, filename: str):
             break
     
     if doc_to_remove:
-        if file_path.exists():
-            file_path.unlink()
+        # The same blob may be attached twice; remove only this entry
+        match = {"id": doc_to_remove["id"]} if doc_to_remove.get("id") else {"filename": filename}
         await db.parts.update_one(
             {"id": part_id},
-            {"$pull": {"additional_documents": {"filename": filename}}}
+            {"$pull": {"additional_documents": match}}
         )
+        await bump_project_version(part.get("project_id"))
+        await release_file(filename)
         return {"success": True, "message": "Döküman silindi"}
     
     raise HTTPException(status_code=404, detail="Dosya bu parçaya ait değil")
 
+# --- Resumable Upload Routes ---
+UPLOAD_SESSIONS_DIR = UPLOADS_DIR / "sessions"
+UPLOAD_SESSIONS_DIR.mkdir(exist_ok=True)
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # 5MB
+UPLOAD_SESSION_TTL = timedelta(hours=24)
+UPLOAD_SESSION_SWEEP_INTERVAL = 3600  # seconds
+UPLOAD_CHUNK_LEASE = timedelta(minutes=10)  # a chunk write held longer than this may be taken over
+UPLOAD_TEMP_MAX_AGE = 3600  # seconds; older temp files of direct uploads are leftovers
+UPLOAD_KINDS = {"drawing", "document"}
+
+def upload_session_path(session_id: str) -> Path:
+    return UPLOAD_SESSIONS_DIR / f"{session_id}.part"
+
+def upload_session_status(session: dict) -> dict:
+    return {
+        "id": session["id"],
+        "part_id": session["part_id"],
+        "kind": session["kind"],
+        "original_name": session["original_name"],
+        "size": session["size"],
+        "chunk_size": session["chunk_size"],
+        "total_chunks": session["total_chunks"],
+        "next_chunk": session["next_chunk"],
+        "received": session["received"],
+        "expires_at": session["expires_at"]
+    }
+
+async def get_upload_session(session_id: str) -> dict:
+    session = await db.upload_sessions.find_one({"id": session_id}, {"_id": 0})
+    if not session:
+        raise HTTPException(status_code=404, detail="Yükleme oturumu bulunamadı")
+    return session
+
+async def discard_upload_session(session_id: str):
+    await db.upload_sessions.delete_one({"id": session_id})
+    await asyncio.to_thread(upload_session_path(session_id).unlink, missing_ok=True)
+
+async def sweep_upload_sessions():
+    """Delete abandoned sessions and their partial files"""
+    now = datetime.now(timezone.utc)
+    cursor = db.upload_sessions.find({"expires_at": {"$lt": now.isoformat()}}, {"_id": 0, "id": 1})
+    expired = [session["id"] async for session in cursor]
+    for session_id in expired:
+        await discard_upload_session(session_id)
+    
+    # Partial files whose session record is gone (e.g. crash between the two deletes)
+    cutoff = (now - UPLOAD_SESSION_TTL).timestamp()
+    for path in await asyncio.to_thread(lambda: list(UPLOAD_SESSIONS_DIR.glob("*.part"))):
+        try:
+            stale = path.stat().st_mtime < cutoff
+        except FileNotFoundError:
+            continue
+        if stale and not await db.upload_sessions.find_one({"id": path.stem}, {"_id": 1}):
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+    
+    if expired:
+        logger.info(f"Removed {len(expired)} abandoned upload sessions")
+    
+    # Temp files of direct uploads whose worker died before it could remove them
+    removed = await asyncio.to_thread(sweep_temp_files, UPLOADS_DIR, UPLOAD_TEMP_MAX_AGE)
+    if removed:
+        logger.info(f"Removed {removed} abandoned upload temp files")
+
+async def upload_session_sweeper():
+    while True:
+        try:
+            await sweep_upload_sessions()
+        except Exception as e:
+            logger.error(f"Upload session sweep error: {str(e)}")
+        await asyncio.sleep(UPLOAD_SESSION_SWEEP_INTERVAL)
+
+class UploadSessionCreate(BaseModel):
+    part_id: str
+    kind: str = "drawing"
+    filename: str
+    size: int = Field(gt=0)
+
+@api_router.post("/uploads/sessions")
+async def create_upload_session(data: UploadSessionCreate):
+    """Start a resumable upload; chunks are then sent with PATCH"""
+    part = await db.parts.find_one({"id": data.part_id}, {"_id": 0, "id": 1})
+    if not part:
+        raise HTTPException(status_code=404, detail="Parça bulunamadı")
+    if data.kind not in UPLOAD_KINDS:
+        raise HTTPException(status_code=400, detail=f"Geçersiz yükleme türü. İzin verilen: {', '.join(sorted(UPLOAD_KINDS))}")
+    
+    file_ext = Path(data.filename).suffix.lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Desteklenmeyen dosya formatı. İzin verilen: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    if data.size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail=f"Dosya boyutu sınırı aşıldı (en fazla {MAX_FILE_SIZE // (1024 * 1024)} MB)")
+    
+    now = datetime.now(timezone.utc)
+    session = {
+        "id": str(uuid.uuid4()),
+        "part_id": data.part_id,
+        "kind": data.kind,
+        "original_name": data.filename,
+        "extension": file_ext,
+        "size": data.size,
+        "chunk_size": UPLOAD_CHUNK_SIZE,
+        "total_chunks": -(-data.size // UPLOAD_CHUNK_SIZE),
+        "next_chunk": 0,
+        "received": 0,
+        "created_at": now.isoformat(),
+        "expires_at": (now + UPLOAD_SESSION_TTL).isoformat()
+    }
+    await db.upload_sessions.insert_one(dict(session))
+    return upload_session_status(session)
+
+@api_router.get("/uploads/sessions/{session_id}")
+async def get_upload_session_status(session_id: str):
+    """Report how far an upload got, so the client can resume from next_chunk"""
+    return upload_session_status(await get_upload_session(session_id))
+
+@api_router.patch("/uploads/sessions/{session_id}/chunks/{index}")
+async def upload_session_chunk(session_id: str, index: int, request: Request):
+    """Receive chunk `index` (0-based) as the raw request body"""
+    session = await get_upload_session(session_id)
+    if index < session["next_chunk"]:
+        # Retry of a chunk that already arrived
+        return upload_session_status(session)
+    if index > session["next_chunk"] or index >= session["total_chunks"]:
+        raise HTTPException(status_code=409, detail=f"Beklenen parça: {session['next_chunk']}")
+    
+    offset = index * session["chunk_size"]
+    expected = min(session["chunk_size"], session["size"] - offset)
+    
+    # Claim the offset first: two requests writing the same chunk would interleave in the file
+    now = datetime.now(timezone.utc)
+    claim_id = str(uuid.uuid4())
+    claimed = await db.upload_sessions.update_one(
+        {
+            "id": session_id,
+            "received": offset,
+            "$or": [{"writing_until": None}, {"writing_until": {"$lt": now.isoformat()}}]
+        },
+        {"$set": {"writing_claim": claim_id, "writing_until": (now + UPLOAD_CHUNK_LEASE).isoformat()}}
+    )
+    if not claimed.modified_count:
+        raise HTTPException(status_code=409, detail=f"Parça {index} şu anda başka bir istekle yükleniyor")
+    
+    written = 0
+    try:
+        written = await write_chunk(request, upload_session_path(session_id), offset, expected)
+    finally:
+        if written != expected:
+            await db.upload_sessions.update_one(
+                {"id": session_id, "writing_claim": claim_id},
+                {"$set": {"writing_claim": None, "writing_until": None}}
+            )
+    if written != expected:
+        raise HTTPException(status_code=400, detail=f"Parça boyutu hatalı: {expected} bayt bekleniyordu")
+    
+    session = await db.upload_sessions.find_one_and_update(
+        {"id": session_id, "writing_claim": claim_id},
+        {"$set": {
+            "next_chunk": index + 1,
+            "received": offset + written,
+            "writing_claim": None,
+            "writing_until": None,
+            "expires_at": (datetime.now(timezone.utc) + UPLOAD_SESSION_TTL).isoformat()
+        }},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not session:
+        # The session was aborted, or the claim expired and was taken over
+        session = await get_upload_session(session_id)
+    return upload_session_status(session)
+
+@api_router.post("/uploads/sessions/{session_id}/complete")
+async def complete_upload_session(session_id: str):
+    """Attach the fully received file to the part"""
+    session = await get_upload_session(session_id)
+    if session["received"] != session["size"]:
+        raise HTTPException(status_code=409, detail=f"Yükleme tamamlanmadı: {session['received']}/{session['size']} bayt")
+    
+    # Claim the session so a repeated request cannot attach the file twice
+    claimed = await db.upload_sessions.delete_one({"id": session_id})
+    if not claimed.deleted_count:
+        raise HTTPException(status_code=404, detail="Yükleme oturumu bulunamadı")
+    
+    part = await db.parts.find_one({"id": session["part_id"]}, {"_id": 0})
+    path = upload_session_path(session_id)
+    if not part:
+        await asyncio.to_thread(path.unlink, missing_ok=True)
+        raise HTTPException(status_code=404, detail="Parça bulunamadı")
+    
+    sha256, size = await asyncio.to_thread(hash_file, path)
+    received = {
+        "temp_path": path,
+        "original_name": session["original_name"],
+        "extension": session["extension"],
+        "size": size,
+        "sha256": sha256
+    }
+    if session["kind"] == "drawing":
+        return await attach_technical_drawing(part, received)
+    return await attach_document(part, received)
+
+@api_router.delete("/uploads/sessions/{session_id}")
+async def abort_upload_session(session_id: str):
+    await get_upload_session(session_id)
+    await discard_upload_session(session_id)
+    return {"message": "Yükleme iptal edildi"}
+
 # --- Supplier Routes ---
 @api_router.post("/suppliers", response_model=Supplier)
 async def create_supplier(data: SupplierCreate):
@@ -627,12 +1782,16 @@ async def create_supplier(data: SupplierCreate):
     return supplier
 
 @api_router.get("/suppliers")
-async def get_suppliers(specialization: Optional[str] = None):
+async def get_suppliers(
+    specialization: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^ndjson$")
+):
     query = {}
     if specialization:
         query["specializations"] = specialization
-    suppliers = await db.suppliers.find(query, {"_id": 0}).to_list(1000)
-    return suppliers
+    return await list_documents(db.suppliers, query, limit, cursor, stream)
 
 @api_router.get("/suppliers/{supplier_id}")
 async def get_supplier(supplier_id: str):
@@ -657,15 +1816,17 @@ async def delete_supplier(supplier_id: str):
 
 # --- Quote Routes ---
 @api_router.post("/quote-requests", response_model=QuoteRequest)
-async def create_quote_request(data: QuoteRequestCreate):
+async def create_quote_request(data: QuoteRequestCreate, loaders: Loaders = Depends(get_loaders)):
     quote_request = QuoteRequest(**data.model_dump())
     doc = quote_request.model_dump()
     await db.quote_requests.insert_one(doc)
     
     # Create notifications for each supplier
-    part = await db.parts.find_one({"id": data.part_id}, {"_id": 0})
-    for supplier_id in data.supplier_ids:
-        supplier = await db.suppliers.find_one({"id": supplier_id}, {"_id": 0})
+    part, suppliers = await asyncio.gather(
+        loaders.parts.load(data.part_id),
+        loaders.suppliers.load_many(data.supplier_ids)
+    )
+    for supplier in suppliers:
         if supplier and part:
             await create_notification(
                 "quote_request",
@@ -678,14 +1839,19 @@ async def create_quote_request(data: QuoteRequestCreate):
     return quote_request
 
 @api_router.get("/quote-requests")
-async def get_quote_requests(part_id: Optional[str] = None, status: Optional[str] = None):
+async def get_quote_requests(
+    part_id: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^ndjson$")
+):
     query = {}
     if part_id:
         query["part_id"] = part_id
     if status:
         query["status"] = status
-    requests = await db.quote_requests.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    return requests
+    return await list_documents(db.quote_requests, query, limit, cursor, stream)
 
 @api_router.post("/quote-responses", response_model=QuoteResponse)
 async def create_quote_response(data: QuoteResponseCreate):
@@ -702,105 +1868,53 @@ async def create_quote_response(data: QuoteResponseCreate):
     return quote_response
 
 @api_router.get("/quote-responses")
-async def get_quote_responses(quote_request_id: Optional[str] = None):
+async def get_quote_responses(
+    quote_request_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^ndjson$")
+):
     query = {}
     if quote_request_id:
         query["quote_request_id"] = quote_request_id
-    responses = await db.quote_responses.find(query, {"_id": 0}).to_list(1000)
-    return responses
+    return await list_documents(db.quote_responses, query, limit, cursor, stream)
 
 @api_router.get("/quote-comparison/{quote_request_id}")
-async def get_quote_comparison(quote_request_id: str):
+async def get_quote_comparison(quote_request_id: str, loaders: Loaders = Depends(get_loaders)):
     """Compare quotes for a specific request with scoring"""
-    quote_request = await db.quote_requests.find_one({"id": quote_request_id}, {"_id": 0})
+    quote_request, responses, history, settings = await asyncio.gather(
+        loaders.quote_requests.load(quote_request_id),
+        db.quote_responses.find({"quote_request_id": quote_request_id}, {"_id": 0}).to_list(None),
+        currency_history(),
+        loaders.settings.load("settings")
+    )
     if not quote_request:
         raise HTTPException(status_code=404, detail="Teklif talebi bulunamadı")
+    settings = settings or {}
     
-    responses = await db.quote_responses.find({"quote_request_id": quote_request_id}, {"_id": 0}).to_list(100)
-    
-    # Get currency rates
-    rates = await db.currency_rates.find_one({}, {"_id": 0}, sort=[("updated_at", -1)])
-    usd_rate = rates.get("usd_to_try", 33.0) if rates else 33.0
-    eur_rate = rates.get("eur_to_try", 36.5) if rates else 36.5
+    # Load every quoting supplier in one query
+    suppliers_by_id = await loaders.suppliers.load_map(resp["supplier_id"] for resp in responses)
     
-    # Calculate comparison data
-    comparison = []
-    min_price_try = float('inf')
-    
-    for resp in responses:
-        supplier = await db.suppliers.find_one({"id": resp["supplier_id"]}, {"_id": 0})
-        
-        # Convert to TRY
-        if resp["currency"] == "USD":
-            price_try = resp["total_price"] * usd_rate
-        elif resp["currency"] == "EUR":
-            price_try = resp["total_price"] * eur_rate
-        else:
-            price_try = resp["total_price"]
-        
-        if price_try < min_price_try:
-            min_price_try = price_try
-        
-        comparison.append({
-            "response": resp,
-            "supplier": supplier,
-            "price_try": price_try
-        })
-    
-    # Calculate scores
-    deadline = datetime.fromisoformat(quote_request["deadline"].replace("Z", "+00:00"))
-    
-    for item in comparison:
-        resp = item["response"]
-        supplier = item["supplier"]
-        
-        # Price score (40%)
-        if min_price_try > 0:
-            price_ratio = min_price_try / item["price_try"]
-            price_score = price_ratio * 40
-        else:
-            price_score = 40
-        
-        # Delivery score (30%)
-        delivery_date = datetime.fromisoformat(resp["delivery_date"].replace("Z", "+00:00"))
-        days_diff = (delivery_date - deadline).days
-        if days_diff <= 0:
-            delivery_score = 30 + min(abs(days_diff) * 2, 6)  # Bonus for early
-        else:
-            delivery_score = max(30 - days_diff * 3, 0)
-        
-        # Quality score (20%) - from supplier performance
-        if supplier and supplier.get("performance"):
-            quality_score = supplier["performance"].get("quality_score", 24) * 20 / 30
-        else:
-            quality_score = 16
-        
-        # Payment score (10%)
-        payment_terms = resp.get("payment_terms", 30)
-        if payment_terms >= 90:
-            payment_score = 10
-        elif payment_terms >= 60:
-            payment_score = 8
-        elif payment_terms >= 30:
-            payment_score = 5
-        else:
-            payment_score = 3
-        
-        item["scores"] = {
-            "price": round(price_score, 1),
-            "delivery": round(delivery_score, 1),
-            "quality": round(quality_score, 1),
-            "payment": round(payment_score, 1),
-            "total": round(price_score + delivery_score + quality_score + payment_score, 1)
-        }
-    
-    # Sort by total score
-    comparison.sort(key=lambda x: x["scores"]["total"], reverse=True)
+    # Each quote is converted at the rate in effect when it was received
+    now = datetime.now(timezone.utc).isoformat()
+    exchange_rates = history.rates_for(
+        [resp.get("currency", "TRY") for resp in responses],
+        [resp.get("created_at") or now for resp in responses]
+    )
+    current_rates = history.rates_at(now)
+    
+    comparison = rank_quotes(
+        responses,
+        suppliers_by_id,
+        quote_request["deadline"],
+        exchange_rates,
+        settings.get("quote_weights")
+    )
     
     return {
         "quote_request": quote_request,
         "comparison": comparison,
-        "currency_rates": {"usd": usd_rate, "eur": eur_rate}
+        "currency_rates": {"usd": current_rates["USD"], "eur": current_rates["EUR"]}
     }
 
 # --- Order Routes ---
@@ -818,10 +1932,12 @@ async def create_order(data: OrderCreate):
     )
     
     # Update part status
-    await db.parts.update_one(
+    updated_part = await db.parts.find_one_and_update(
         {"id": data.part_id},
-        {"$set": {"status": "in_production"}}
+        {"$set": {"status": "in_production"}},
+        projection={"_id": 0, "project_id": 1}
     )
+    await bump_project_version((updated_part or {}).get("project_id"))
     
     # Create notification
     supplier = await db.suppliers.find_one({"id": data.supplier_id}, {"_id": 0})
@@ -837,14 +1953,19 @@ async def create_order(data: OrderCreate):
     return order
 
 @api_router.get("/orders")
-async def get_orders(status: Optional[str] = None, supplier_id: Optional[str] = None):
+async def get_orders(
+    status: Optional[str] = None,
+    supplier_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^ndjson$")
+):
     query = {}
     if status:
         query["status"] = status
     if supplier_id:
         query["supplier_id"] = supplier_id
-    orders = await db.orders.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    return orders
+    return await list_documents(db.orders, query, limit, cursor, stream)
 
 @api_router.get("/orders/{order_id}")
 async def get_order(order_id: str):
@@ -886,10 +2007,12 @@ async def update_order(order_id: str, data: dict):
             )
         
         # Update part status
-        await db.parts.update_one(
+        updated_part = await db.parts.find_one_and_update(
             {"id": order["part_id"]},
-            {"$set": {"status": "completed"}}
+            {"$set": {"status": "completed"}},
+            projection={"_id": 0, "project_id": 1}
         )
+        await bump_project_version((updated_part or {}).get("project_id"))
     
     return order
 
@@ -903,26 +2026,156 @@ async def delete_order(order_id: str):
 # --- Notification Routes ---
 @api_router.get("/notifications")
 async def get_notifications(is_read: Optional[bool] = None):
+    watermark = (await get_notification_state())["read_watermark"]
     query = {}
-    if is_read is not None:
-        query["is_read"] = is_read
-    notifications = await db.notifications.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return notifications
+    if is_read is False:
+        query = unread_notifications_query(watermark)
+    elif is_read is True:
+        query = {"$or": [{"is_read": True}, {"created_at": {"$lte": watermark}}]}
+    notifications = await db.notifications.find(query, NOTIFICATION_PROJECTION).sort("created_at", -1).to_list(100)
+    for notification in notifications:
+        if notification["created_at"] <= watermark:
+            notification["is_read"] = True
+    return FastJSONResponse(notifications)
+
+@api_router.get("/notifications/unread-count")
+async def get_unread_notification_count():
+    return {"unread": (await get_notification_state())["unread"]}
 
 @api_router.put("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: str):
-    await db.notifications.update_one({"id": notification_id}, {"$set": {"is_read": True}})
+    watermark = (await get_notification_state())["read_watermark"]
+    result = await db.notifications.update_one(
+        {"id": notification_id, **unread_notifications_query(watermark)},
+        {"$set": {"is_read": True}}
+    )
+    if result.modified_count:
+        await db.counters.update_one({"id": NOTIFICATION_STATE_ID}, {"$inc": {"unread": -1}})
+        publish_notifications_read(1)
     return {"message": "Bildirim okundu olarak işaretlendi"}
 
 @api_router.put("/notifications/read-all")
 async def mark_all_notifications_read():
-    await db.notifications.update_many({}, {"$set": {"is_read": True}})
+    # Moves the watermark instead of rewriting every notification; `cleared`
+    # keeps the count for the change stream
+    state = await db.counters.find_one_and_update(
+        {"id": NOTIFICATION_STATE_ID},
+        [{"$set": {
+            "cleared": {"$max": [{"$ifNull": ["$unread", 0]}, 0]},
+            "unread": 0,
+            "read_watermark": datetime.now(timezone.utc).isoformat()
+        }}],
+        upsert=True,
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    publish_notifications_read(state["cleared"])
     return {"message": "Tüm bildirimler okundu olarak işaretlendi"}
 
+NOTIFICATION_STREAM_HEARTBEAT = 15  # seconds; keeps proxies from closing an idle stream
+NOTIFICATION_STREAM_RETRY = 5000  # milliseconds before the browser reconnects
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {dump_json(data).decode()}\n\n"
+
+@api_router.get("/notifications/stream")
+async def stream_notifications(request: Request):
+    """Server-Sent Events: `notification` for each new notification and
+    `unread` with the change in the unread count ({"delta": n})"""
+    queue = notification_hub.subscribe()
+    
+    async def events():
+        try:
+            yield f"retry: {NOTIFICATION_STREAM_RETRY}\n\n"
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), NOTIFICATION_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                if item is None:
+                    break
+                yield format_sse(*item)
+        finally:
+            notification_hub.unsubscribe(queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Server error codes: change streams need a replica set; resume point aged out of the oplog
+CHANGE_STREAM_UNSUPPORTED_CODES = {40573}
+CHANGE_STREAM_HISTORY_LOST = 286
+NOTIFICATION_CHANGE_STREAM_RETRY = 30  # seconds
+
+async def tail_notification_changes():
+    """Feed the hub from a MongoDB change stream, so subscribers on every API
+    worker see notifications created or read through any of them. Without a
+    replica set the hub only carries this process's own changes."""
+    pipeline = [{"$match": {"$or": [
+        {"ns.coll": "notifications", "operationType": {"$in": ["insert", "update"]}},
+        # "Read all" only moves the watermark in the counters document
+        {"ns.coll": "counters", "operationType": "update",
+         "updateDescription.updatedFields.read_watermark": {"$exists": True}}
+    ]}}]
+    resume_token = None
+    while True:
+        try:
+            # updateLookup: `cleared` is missing from updatedFields when it equals the previous value
+            async with db.watch(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+                notification_hub.fed_externally = True
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    if change["ns"]["coll"] == "counters":
+                        publish_notifications_read((change.get("fullDocument") or {}).get("cleared", 0), local=False)
+                    elif change["operationType"] == "insert":
+                        doc = change["fullDocument"]
+                        doc.pop("_id", None)
+                        doc.pop("created_on", None)
+                        publish_notification_created(doc, local=False)
+                    elif change["updateDescription"]["updatedFields"].get("is_read") is True:
+                        publish_notifications_read(1, local=False)
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if e.code in CHANGE_STREAM_UNSUPPORTED_CODES:
+                logger.info("Change streams unavailable, notification stream is per-process")
+                return
+            if e.code == CHANGE_STREAM_HISTORY_LOST:
+                resume_token = None
+            logger.error(f"Notification change stream error: {str(e)}")
+        except Exception as e:
+            logger.error(f"Notification change stream error: {str(e)}")
+        finally:
+            notification_hub.fed_externally = False
+        await asyncio.sleep(NOTIFICATION_CHANGE_STREAM_RETRY)
+
 # --- Currency Rate Routes ---
+# The full rate history is kept in memory for as-of conversions. The worker
+# that writes a new rate drops its copy immediately; other workers pick it
+# up within CURRENCY_RATES_CACHE_TTL.
+CURRENCY_RATES_CACHE_TTL = 30  # seconds
+CURRENCY_RATES_CACHE_MAX_STALE = 300  # seconds
+currency_rates_cache = StaleWhileRevalidateCache(CURRENCY_RATES_CACHE_TTL, CURRENCY_RATES_CACHE_MAX_STALE)
+
+async def load_currency_history() -> RateHistory:
+    docs = await db.currency_rates.find({}, {"_id": 0}).sort("updated_at", ASCENDING).to_list(None)
+    return RateHistory(docs)
+
+async def currency_history() -> RateHistory:
+    return await currency_rates_cache.get("history", load_currency_history)
+
+async def latest_currency_rates() -> Optional[dict]:
+    """Most recent currency_rates document (None if there is none yet)"""
+    return (await currency_history()).latest
+
 @api_router.get("/currency-rates")
 async def get_currency_rates():
-    rates = await db.currency_rates.find_one({}, {"_id": 0}, sort=[("updated_at", -1)])
+    rates = await latest_currency_rates()
     if not rates:
         return {"usd_to_try": 33.0, "eur_to_try": 36.5, "updated_at": datetime.now(timezone.utc).isoformat()}
     return rates
@@ -937,13 +2190,17 @@ async def update_currency_rates(data: CurrencyRateUpdate):
         doc = rate.model_dump()
         await db.currency_rates.insert_one(doc)
         # Return without _id
-        return {
+        saved = {
             "id": doc["id"],
             "usd_to_try": doc["usd_to_try"],
             "eur_to_try": doc["eur_to_try"],
             "updated_at": doc["updated_at"],
             "updated_by": doc["updated_by"]
         }
+        # Reloaded from the database on the next read: the cached history may
+        # already be missing rates other workers wrote
+        currency_rates_cache.invalidate("history")
+        return saved
     except Exception as e:
         logger.error(f"Currency rate update error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Döviz kuru güncellenemedi: {str(e)}")
@@ -969,7 +2226,7 @@ async def update_settings(data: SettingsUpdate):
 # --- Email Routes ---
 @api_router.post("/send-email")
 async def send_email(request: EmailRequest):
-    if not resend_api_key:
+    if not mail_transport.configured:
         raise HTTPException(status_code=500, detail="E-posta servisi yapılandırılmamış")
     
     params = {
@@ -980,191 +2237,433 @@ async def send_email(request: EmailRequest):
     }
     
     try:
-        email = await asyncio.to_thread(resend.Emails.send, params)
+        email_id = await mail_transport.send(params)
         return {
             "status": "success",
             "message": f"E-posta {request.recipient_email} adresine gönderildi",
-            "email_id": email.get("id")
+            "email_id": email_id
         }
     except Exception as e:
         logger.error(f"E-posta gönderme hatası: {str(e)}")
         raise HTTPException(status_code=500, detail=f"E-posta gönderilemedi: {str(e)}")
 
-# --- Dashboard Routes ---
-@api_router.get("/dashboard/stats")
-async def get_dashboard_stats():
-    # Project stats
-    total_projects = await db.projects.count_documents({})
-    active_projects = await db.projects.count_documents({"status": {"$in": ["planning", "in_progress"]}})
-    
-    # Part stats
-    total_parts = await db.parts.count_documents({})
-    parts_in_production = await db.parts.count_documents({"status": "in_production"})
-    
-    # Order stats
-    total_orders = await db.orders.count_documents({})
-    pending_orders = await db.orders.count_documents({"status": {"$in": ["pending", "confirmed", "in_production"]}})
-    
-    # Supplier stats
-    total_suppliers = await db.suppliers.count_documents({})
+# --- Email Outbox ---
+# Bulk e-mails are queued in email_outbox and sent by a pool of workers, so
+# the request that queues them returns immediately and survives restarts
+MAIL_WORKERS = int(os.environ.get('MAIL_WORKERS', '4'))
+MAIL_RATE_LIMIT = float(os.environ.get('MAIL_RATE_LIMIT', '2'))  # API calls per second (Resend default)
+MAIL_BATCH_SIZE = min(int(os.environ.get('MAIL_BATCH_SIZE', str(MAIL_MAX_BATCH_SIZE))), MAIL_MAX_BATCH_SIZE)
+MAIL_MAX_ATTEMPTS = int(os.environ.get('MAIL_MAX_ATTEMPTS', '5'))
+MAIL_RETRY_BASE = 30  # seconds
+MAIL_RETRY_MAX = 3600  # seconds
+MAIL_SEND_LEASE = timedelta(minutes=2)  # a message stuck in "sending" longer than this is retried
+MAIL_POLL_INTERVAL = 5  # seconds; picks up retries that became due
+
+mail_rate_limiter = RateLimiter(MAIL_RATE_LIMIT)
+mail_wakeup = asyncio.Event()
+
+async def enqueue_email_job(kind: str, reference_id: str, messages: List[dict], skipped: List[dict]) -> dict:
+    """Store a job and its messages; each message has params (the provider
+    payload), optional metadata and an optional notification to create once sent"""
+    now = datetime.now(timezone.utc).isoformat()
+    job = {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "reference_id": reference_id,
+        "status": "queued" if messages else "completed",
+        "total": len(messages),
+        "sent": 0,
+        "failed": 0,
+        "skipped": skipped,
+        "created_at": now,
+        "completed_at": None if messages else now
+    }
+    await db.email_jobs.insert_one(job)
+    if messages:
+        await db.email_outbox.insert_many([{
+            "id": str(uuid.uuid4()),
+            "job_id": job["id"],
+            "params": message["params"],
+            "metadata": message.get("metadata", {}),
+            "notification": message.get("notification"),
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "locked_until": None,
+            "claim_id": None,
+            "batch_key": None,
+            "last_error": None,
+            "provider_id": None,
+            "created_at": now,
+            "sent_at": None
+        } for message in messages])
+        mail_wakeup.set()
+    job.pop("_id", None)
+    return job
+
+def due_outbox_filter(now: datetime) -> dict:
+    """Messages due for a (re)try, or ones whose worker died mid-send"""
+    return {"$or": [
+        {"status": "pending", "next_attempt_at": {"$lte": now.isoformat()}},
+        {"status": "sending", "locked_until": {"$lt": now.isoformat()}}
+    ]}
+
+async def claim_outbox_batch() -> List[dict]:
+    """Take due messages for one provider call. New messages form a batch of
+    up to MAIL_BATCH_SIZE and get its idempotency key (batch_key); a batch that
+    was already tried is only ever taken again whole, so its key always covers
+    the same messages. The update re-checks the due filter, so a message
+    another worker claimed in between is skipped."""
+    now = datetime.now(timezone.utc)
+    due = await db.email_outbox.find(due_outbox_filter(now), {"_id": 0, "id": 1, "batch_key": 1}) \
+        .sort("next_attempt_at", ASCENDING).limit(MAIL_BATCH_SIZE).to_list(MAIL_BATCH_SIZE)
+    if not due:
+        return []
+    claim_id = str(uuid.uuid4())
+    lease = {"status": "sending", "claim_id": claim_id, "locked_until": (now + MAIL_SEND_LEASE).isoformat()}
+    batch_key = due[0].get("batch_key")
+    if batch_key:
+        selector = {"batch_key": batch_key}
+    else:
+        selector = {"id": {"$in": [message["id"] for message in due if not message.get("batch_key")]}}
+        lease["batch_key"] = claim_id
+    await db.email_outbox.update_many(
+        {**selector, **due_outbox_filter(now)},
+        {"$set": lease, "$inc": {"attempts": 1}}
+    )
+    batch = await db.email_outbox.find({"claim_id": claim_id}, {"_id": 0}).to_list(None)
+    if batch_key and len(batch) < await db.email_outbox.count_documents({"batch_key": batch_key}):
+        # Another worker took part of the batch; hand ours back rather than reuse the key for a subset
+        await db.email_outbox.update_many(
+            {"claim_id": claim_id},
+            {"$set": {"status": "pending", "locked_until": None}, "$inc": {"attempts": -1}}
+        )
+        return []
+    return batch
+
+async def finish_outbox_message(message: dict, status: str, provider_id: Optional[str] = None, error: Optional[str] = None):
+    now = datetime.now(timezone.utc).isoformat()
+    await db.email_outbox.update_one(
+        {"id": message["id"]},
+        {"$set": {
+            "status": status,
+            "locked_until": None,
+            "provider_id": provider_id,
+            "last_error": error,
+            "sent_at": now if status == "sent" else None
+        }}
+    )
+    if status == "sent" and message.get("notification"):
+        notification = message["notification"]
+        await create_notification(
+            notification["type"], notification["title"], notification["message"],
+            notification.get("reference_type"), notification.get("reference_id")
+        )
     
+    job = await db.email_jobs.find_one_and_update(
+        {"id": message["job_id"]},
+        {"$inc": {status: 1}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if job and job["sent"] + job["failed"] >= job["total"]:
+        await db.email_jobs.update_one(
+            {"id": job["id"], "status": {"$ne": "completed"}},
+            {"$set": {"status": "completed", "completed_at": now}}
+        )
+
+async def retry_outbox_batch(batch: List[dict], error: Exception):
+    retry_after = error.retry_after if isinstance(error, TransientMailError) else None
+    if retry_after:
+        mail_rate_limiter.pause(retry_after)
+    # One delay for the whole batch: it is only claimed again whole, under the same idempotency key
+    delay = max(retry_delay(max(m["attempts"] for m in batch), MAIL_RETRY_BASE, MAIL_RETRY_MAX), retry_after or 0)
+    next_attempt_at = (datetime.now(timezone.utc) + timedelta(seconds=delay)).isoformat()
+    for message in batch:
+        if message["attempts"] >= MAIL_MAX_ATTEMPTS:
+            logger.error(f"Email send error to {message['params']['to']}, giving up: {str(error)}")
+            await finish_outbox_message(message, "failed", error=str(error))
+            continue
+        await db.email_outbox.update_one(
+            {"id": message["id"]},
+            {"$set": {"status": "pending", "locked_until": None, "last_error": str(error), "next_attempt_at": next_attempt_at}}
+        )
+    logger.warning(f"Email batch of {len(batch)} failed, retrying in {delay:.0f}s: {str(error)}")
+
+async def deliver_outbox_batch(batch: List[dict]):
+    """Send a claimed batch in a single provider call"""
+    await mail_rate_limiter.acquire()
+    try:
+        # Stored with the batch, so resending it after a lost response is not delivered twice
+        results = await mail_transport.send_batch([m["params"] for m in batch], idempotency_key=batch[0]["batch_key"])
+    except PermanentMailError as e:
+        logger.error(f"Email batch of {len(batch)} rejected: {str(e)}")
+        for message in batch:
+            await finish_outbox_message(message, "failed", error=str(e))
+        return
+    except Exception as e:
+        await retry_outbox_batch(batch, e)
+        return
+    for message, (provider_id, error) in zip(batch, results):
+        if error:
+            logger.error(f"Email send error to {message['params']['to']}: {error}")
+            await finish_outbox_message(message, "failed", error=error)
+        else:
+            await finish_outbox_message(message, "sent", provider_id=provider_id)
+
+async def email_worker():
+    while True:
+        mail_wakeup.clear()
+        try:
+            batch = await claim_outbox_batch()
+            if batch:
+                await deliver_outbox_batch(batch)
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Email worker error: {str(e)}")
+        try:
+            await asyncio.wait_for(mail_wakeup.wait(), MAIL_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+@api_router.get("/email-jobs/{job_id}")
+async def get_email_job(job_id: str):
+    job = await db.email_jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="E-posta işi bulunamadı")
+    messages = await db.email_outbox.find(
+        {"job_id": job_id},
+        {"_id": 0, "id": 1, "metadata": 1, "status": 1, "attempts": 1, "last_error": 1,
+         "next_attempt_at": 1, "provider_id": 1, "sent_at": 1}
+    ).sort("created_at", ASCENDING).to_list(None)
+    job["messages"] = messages
+    return job
+
+# --- Dashboard Routes ---
+DASHBOARD_CACHE_TTL = 5  # seconds
+DASHBOARD_CACHE_MAX_STALE = 60  # seconds
+dashboard_cache = StaleWhileRevalidateCache(DASHBOARD_CACHE_TTL, DASHBOARD_CACHE_MAX_STALE)
+
+async def count_by_status(collection) -> Dict[str, int]:
+    """Document counts per status in a single aggregation"""
+    rows = await collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]).to_list(None)
+    return {row["_id"]: row["count"] for row in rows}
+
+async def load_dashboard_stats():
     # Upcoming deadlines (next 7 days)
     now = datetime.now(timezone.utc)
     next_week = now + timedelta(days=7)
-    
-    upcoming_orders = await db.orders.find({
-        "status": {"$in": ["pending", "confirmed", "in_production"]},
-        "expected_delivery": {
-            "$gte": now.isoformat(),
-            "$lte": next_week.isoformat()
-        }
-    }, {"_id": 0}).to_list(10)
-    
-    # Pending quotes
-    pending_quotes = await db.quote_requests.count_documents({"status": "requested"})
-    
-    # Unread notifications
-    unread_notifications = await db.notifications.count_documents({"is_read": False})
+    open_order_statuses = ["pending", "confirmed", "in_production"]
+    
+    project_counts, part_counts, order_counts, total_suppliers, upcoming_orders, pending_quotes, unread_notifications = await asyncio.gather(
+        count_by_status(db.projects),
+        count_by_status(db.parts),
+        count_by_status(db.orders),
+        db.suppliers.estimated_document_count(),
+        db.orders.find({
+            "status": {"$in": open_order_statuses},
+            "expected_delivery": {
+                "$gte": now.isoformat(),
+                "$lte": next_week.isoformat()
+            }
+        }, {"_id": 0}).to_list(10),
+        db.quote_requests.count_documents({"status": "requested"}),
+        get_notification_state()
+    )
     
     return {
-        "projects": {"total": total_projects, "active": active_projects},
-        "parts": {"total": total_parts, "in_production": parts_in_production},
-        "orders": {"total": total_orders, "pending": pending_orders},
+        "projects": {
+            "total": sum(project_counts.values()),
+            "active": project_counts.get("planning", 0) + project_counts.get("in_progress", 0)
+        },
+        "parts": {"total": sum(part_counts.values()), "in_production": part_counts.get("in_production", 0)},
+        "orders": {
+            "total": sum(order_counts.values()),
+            "pending": sum(order_counts.get(status, 0) for status in open_order_statuses)
+        },
         "suppliers": {"total": total_suppliers},
         "pending_quotes": pending_quotes,
         "upcoming_orders": upcoming_orders,
-        "unread_notifications": unread_notifications
+        "unread_notifications": unread_notifications["unread"]
     }
 
+@api_router.get("/dashboard/stats")
+async def get_dashboard_stats():
+    return await dashboard_cache.get("stats", load_dashboard_stats)
+
 @api_router.get("/dashboard/gantt/{project_id}")
-async def get_gantt_data(project_id: str):
-    """Get Gantt chart data for a project"""
-    project = await db.projects.find_one({"id": project_id}, {"_id": 0})
+async def get_gantt_data(project_id: str, request: Request):
+    """Resource-constrained schedule of the project's part operations, with
+    slack per task and the critical path. Cached per project version."""
+    # The version is read before the parts, so a concurrent write can only
+    # make the cached schedule newer than its version, never older
+    project, settings = await asyncio.gather(
+        db.projects.find_one({"id": project_id}, {"_id": 0}),
+        db.settings.find_one({"id": "settings"}, {"_id": 0, "resource_capacity": 1})
+    )
     if not project:
         raise HTTPException(status_code=404, detail="Proje bulunamadı")
+    capacity = (settings or {}).get("resource_capacity") or {}
     
-    parts = await db.parts.find({"project_id": project_id}, {"_id": 0}).to_list(1000)
+    body, etag = await derived_views.get(
+        "gantt", project_id, project.get("version", 0),
+        lambda: build_gantt_view(project, capacity),
+        # Capacity changes reschedule without touching the project
+        extra=dump_json(capacity)
+    )
+    return json_bytes_response(request, body, etag, "no-cache")
+
+async def build_gantt_view(project: dict, capacity: dict) -> tuple:
+    """Gantt response body and its ETag"""
+    parts = await db.parts.find(
+        {"project_id": project["id"]},
+        {"_id": 0, "id": 1, "name": 1, "code": 1, "manufacturing_methods": 1}
+    ).sort("created_at", ASCENDING).to_list(None)
     
-    gantt_data = []
-    current_date = datetime.fromisoformat(project["start_date"].replace("Z", "+00:00"))
+    schedule = await asyncio.to_thread(schedule_parts, parts, MANUFACTURING_METHODS, capacity)
     
-    for part in parts:
-        part_start = current_date
-        methods = part.get("manufacturing_methods", [])
-        
-        for method_code in methods:
-            method = MANUFACTURING_METHODS.get(method_code)
-            if method:
-                duration = method.get("duration_days", 2)
-                end_date = part_start + timedelta(days=duration)
-                
-                gantt_data.append({
-                    "id": f"{part['id']}_{method_code}",
-                    "part_id": part["id"],
-                    "part_name": part["name"],
-                    "part_code": part["code"],
-                    "method_code": method_code,
-                    "method_name": method["name"],
-                    "category": method["category"],
-                    "start": part_start.isoformat(),
-                    "end": end_date.isoformat(),
-                    "duration_days": duration
-                })
-                
-                part_start = end_date
+    # Day offsets to dates; few distinct days, so format each once
+    project_start = datetime.fromisoformat(project["start_date"].replace("Z", "+00:00"))
+    dates = {}
     
-    return {
+    def date_at(day: int) -> str:
+        if day not in dates:
+            dates[day] = (project_start + timedelta(days=day)).isoformat()
+        return dates[day]
+    
+    for task in schedule["tasks"]:
+        task["start"] = date_at(task["start_day"])
+        task["end"] = date_at(task["end_day"])
+    
+    body = dump_json({
         "project": project,
-        "tasks": gantt_data
-    }
+        "tasks": schedule["tasks"],
+        "critical_path": schedule["critical_path"],
+        "makespan_days": schedule["makespan_days"],
+        "end": date_at(schedule["makespan_days"]),
+        "capacity": schedule["capacity"]
+    })
+    return body, content_etag(body)
 
 # --- Excel Import/Export Routes ---
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', '2'))
+EXPORT_BATCH_SIZE = 500
+EXPORT_QUEUE_SIZE = 16
+export_executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="excel-export")
+
+async def stream_parts_workbook(project_id: str):
+    """Run the workbook writer in the export pool and yield its bytes as they come"""
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue(maxsize=EXPORT_QUEUE_SIZE)
+    cancelled = threading.Event()
+    cursor = db.parts.find({"project_id": project_id}, {"_id": 0}).sort("created_at", 1).batch_size(EXPORT_BATCH_SIZE)
+    
+    def fetch_batch():
+        if cancelled.is_set():
+            raise ExportCancelled()
+        return asyncio.run_coroutine_threadsafe(cursor.to_list(EXPORT_BATCH_SIZE), loop).result()
+    
+    def emit(chunk):
+        if cancelled.is_set():
+            raise ExportCancelled()
+        # Blocks the worker while the queue is full, so a slow client throttles the export
+        asyncio.run_coroutine_threadsafe(chunks.put(chunk), loop).result()
+    
+    def run():
+        try:
+            write_parts_workbook(fetch_batch, emit)
+        finally:
+            if not cancelled.is_set():
+                emit(None)
+    
+    future = loop.run_in_executor(export_executor, run)
+    try:
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                break
+            yield chunk
+        await future
+    finally:
+        if not future.done():
+            cancelled.set()
+            # Unblock a pending put so the worker notices the cancellation
+            while not chunks.empty():
+                chunks.get_nowait()
+            await asyncio.wait([future])
+
+# Finished exports are kept on local disk, one file per project version
+EXPORT_CACHE_DIR = UPLOADS_DIR / "exports"
+EXPORT_CACHE_DIR.mkdir(exist_ok=True)
+
+EXPORT_CACHE_NAME = re.compile(r"-v(\d+)\.xlsx$")
+
+def export_cache_path(project_id: str, version: int) -> Path:
+    return EXPORT_CACHE_DIR / f"{project_id}-v{version}.xlsx"
+
+def export_etag(project_id: str, version: int) -> str:
+    return f'"{project_id}-v{version}"'
+
+async def discard_cached_exports(project_id: str, below: Optional[int] = None):
+    """Remove the project's cached exports older than version `below` (all if None).
+    Newer ones are kept: an export of an older version can finish last."""
+    def discard():
+        for path in EXPORT_CACHE_DIR.glob(f"{project_id}-v*.xlsx"):
+            match = EXPORT_CACHE_NAME.search(path.name)
+            if match and (below is None or int(match.group(1)) < below):
+                path.unlink(missing_ok=True)
+    
+    await asyncio.to_thread(discard)
+
+async def cache_parts_workbook(project_id: str, version: int):
+    """Stream the workbook while writing it to the export cache. The file
+    appears under its final name only once complete; an abandoned export is
+    dropped."""
+    path = export_cache_path(project_id, version)
+    temp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    handle = await asyncio.to_thread(open, temp, "wb")
+    complete = False
+    try:
+        async for chunk in stream_parts_workbook(project_id):
+            await asyncio.to_thread(handle.write, chunk)
+            yield chunk
+        complete = True
+    finally:
+        await asyncio.to_thread(handle.close)
+        if complete:
+            await asyncio.to_thread(os.replace, temp, path)
+            await discard_cached_exports(project_id, below=version)
+        else:
+            await asyncio.to_thread(temp.unlink, missing_ok=True)
+
 @api_router.get("/export/parts/{project_id}")
-async def export_parts_to_excel(project_id: str):
-    """Export project parts to Excel file"""
+async def export_parts_to_excel(project_id: str, request: Request):
+    """Export project parts to Excel file, from the cache while the project is unchanged"""
     project = await db.projects.find_one({"id": project_id}, {"_id": 0})
     if not project:
         raise HTTPException(status_code=404, detail="Proje bulunamadı")
     
-    parts = await db.parts.find({"project_id": project_id}, {"_id": 0}).to_list(1000)
-    
-    # Create workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Parça Listesi"
-    
-    # Header style
-    header_fill = PatternFill(start_color="1F4E79", end_color="1F4E79", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # Headers
-    headers = ["Parça Kodu", "Parça Adı", "Adet", "Malzeme", "Form Tipi", "Ölçü 1", "Ölçü 2", "Ölçü 3", "İmalat 1", "İmalat 2", "İmalat 3", "İmalat 4", "İmalat 5", "Notlar"]
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = thin_border
-    
-    # Data rows
-    for row_idx, part in enumerate(parts, 2):
-        dims = part.get("dimensions", {}) or {}
-        methods = part.get("manufacturing_methods", [])
-        
-        # Get dimension values based on form type
-        dim_values = []
-        form_type = part.get("form_type", "")
-        if form_type == "prizmatik":
-            dim_values = [dims.get("width"), dims.get("height"), dims.get("length")]
-        elif form_type == "silindirik":
-            dim_values = [dims.get("diameter"), dims.get("length"), None]
-        elif form_type == "boru":
-            dim_values = [dims.get("outer_diameter"), dims.get("inner_diameter"), dims.get("length")]
-        else:
-            dim_values = [None, None, None]
-        
-        row_data = [
-            part.get("code", ""),
-            part.get("name", ""),
-            part.get("quantity", 0),
-            part.get("material", ""),
-            form_type,
-            dim_values[0] if len(dim_values) > 0 else None,
-            dim_values[1] if len(dim_values) > 1 else None,
-            dim_values[2] if len(dim_values) > 2 else None,
-            methods[0] if len(methods) > 0 else None,
-            methods[1] if len(methods) > 1 else None,
-            methods[2] if len(methods) > 2 else None,
-            methods[3] if len(methods) > 3 else None,
-            methods[4] if len(methods) > 4 else None,
-            part.get("notes", "")
-        ]
-        
-        for col, value in enumerate(row_data, 1):
-            cell = ws.cell(row=row_idx, column=col, value=value)
-            cell.border = thin_border
-    
-    # Adjust column widths
-    for col in range(1, len(headers) + 1):
-        ws.column_dimensions[get_column_letter(col)].width = 15
-    
-    # Save to bytes
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
     filename = f"{project['code']}_parcalar.xlsx"
+    version = project.get("version", 0)
+    path = export_cache_path(project_id, version)
+    etag = export_etag(project_id, version)
+    
+    if await asyncio.to_thread(path.is_file):
+        try:
+            return await conditional_file_response(request, path, filename, XLSX_MEDIA_TYPE, etag, "private, no-cache")
+        except FileNotFoundError:
+            pass  # replaced by a newer version in the meantime; build it again
     
     return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        cache_parts_workbook(project_id, version),
+        media_type=XLSX_MEDIA_TYPE,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "ETag": etag,
+            "Cache-Control": "private, no-cache"
+        }
     )
 
 @api_router.get("/export/template")
@@ -1231,6 +2730,8 @@ async def export_parts_template():
         headers={"Content-Disposition": "attachment; filename=parca_sablonu.xlsx"}
     )
 
+IMPORT_CHUNK_SIZE = 1000
+
 @api_router.post("/import/parts/{project_id}")
 async def import_parts_from_excel(project_id: str, file: UploadFile = File(...)):
     """Import parts from Excel file"""
@@ -1243,111 +2744,99 @@ async def import_parts_from_excel(project_id: str, file: UploadFile = File(...))
     
     try:
         contents = await file.read()
-        wb = openpyxl.load_workbook(BytesIO(contents))
-        ws = wb.active
-        
-        imported = 0
-        errors = []
-        
-        for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
-            if not row[0] or not row[1] or not row[2]:
-                continue  # Skip empty rows
-            
-            try:
-                code = str(row[0]).strip()
-                name = str(row[1]).strip()
-                quantity = int(row[2]) if row[2] else 1
-                material = str(row[3]).strip() if row[3] else None
-                form_type = str(row[4]).strip().lower() if row[4] else None
-                
-                # Parse dimensions based on form type
-                dimensions = {}
-                if form_type == "prizmatik":
-                    dimensions = {
-                        "width": float(row[5]) if row[5] else None,
-                        "height": float(row[6]) if row[6] else None,
-                        "length": float(row[7]) if row[7] else None
-                    }
-                elif form_type == "silindirik":
-                    dimensions = {
-                        "diameter": float(row[5]) if row[5] else None,
-                        "length": float(row[6]) if row[6] else None
-                    }
-                elif form_type == "boru":
-                    dimensions = {
-                        "outer_diameter": float(row[5]) if row[5] else None,
-                        "inner_diameter": float(row[6]) if row[6] else None,
-                        "length": float(row[7]) if row[7] else None
-                    }
-                
-                # Parse manufacturing methods
-                methods = []
-                for i in range(8, 13):
-                    if row[i]:
-                        methods.append(str(row[i]).strip())
-                
-                notes = str(row[13]).strip() if len(row) > 13 and row[13] else None
-                
-                # Check for duplicate code
-                existing = await db.parts.find_one({"project_id": project_id, "code": code})
-                if existing:
-                    errors.append(f"Satır {row_idx}: '{code}' kodu zaten mevcut")
-                    continue
-                
-                # Create part
-                part = {
-                    "id": str(uuid.uuid4()),
-                    "project_id": project_id,
-                    "code": code,
-                    "name": name,
-                    "quantity": quantity,
-                    "material": material,
-                    "form_type": form_type,
-                    "dimensions": dimensions,
-                    "manufacturing_methods": methods,
-                    "status": "pending",
-                    "notes": notes,
-                    "created_at": datetime.now(timezone.utc).isoformat()
-                }
-                
-                await db.parts.insert_one(part)
-                imported += 1
-                
-            except Exception as e:
-                errors.append(f"Satır {row_idx}: {str(e)}")
-        
-        return {
-            "success": True,
-            "imported": imported,
-            "errors": errors,
-            "message": f"{imported} parça başarıyla eklendi" + (f", {len(errors)} hata" if errors else "")
-        }
-        
+        rows, errors = await asyncio.to_thread(parse_parts_workbook, contents)
     except Exception as e:
         logger.error(f"Excel import error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Excel dosyası okunamadı: {str(e)}")
+    
+    # Duplicates against the project: one $in query for every code in the file
+    codes = list({fields["code"] for _, fields in rows})
+    existing_codes = set()
+    for i in range(0, len(codes), IMPORT_CHUNK_SIZE):
+        cursor = db.parts.find(
+            {"project_id": project_id, "code": {"$in": codes[i:i + IMPORT_CHUNK_SIZE]}},
+            {"_id": 0, "code": 1}
+        )
+        existing_codes.update([doc["code"] async for doc in cursor])
+    
+    # Duplicates inside the file: first occurrence wins
+    seen_rows = {}
+    new_parts = []
+    row_numbers = []
+    now = datetime.now(timezone.utc).isoformat()
+    for row_idx, fields in rows:
+        code = fields["code"]
+        if code in existing_codes:
+            errors.append((row_idx, f"Satır {row_idx}: '{code}' kodu zaten mevcut"))
+            continue
+        if code in seen_rows:
+            errors.append((row_idx, f"Satır {row_idx}: '{code}' kodu dosyada tekrar ediyor (satır {seen_rows[code]})"))
+            continue
+        seen_rows[code] = row_idx
+        new_parts.append({
+            "id": str(uuid.uuid4()),
+            "project_id": project_id,
+            **fields,
+            "status": "pending",
+            "created_at": now
+        })
+        row_numbers.append(row_idx)
+    
+    imported = 0
+    for i in range(0, len(new_parts), IMPORT_CHUNK_SIZE):
+        chunk = new_parts[i:i + IMPORT_CHUNK_SIZE]
+        try:
+            result = await db.parts.insert_many(chunk, ordered=False)
+            imported += len(result.inserted_ids)
+        except BulkWriteError as e:
+            # The unique (project_id, code) index catches codes added concurrently
+            imported += e.details.get("nInserted", 0)
+            for write_error in e.details.get("writeErrors", []):
+                part = chunk[write_error["index"]]
+                row_idx = row_numbers[i + write_error["index"]]
+                if write_error.get("code") == 11000:
+                    errors.append((row_idx, f"Satır {row_idx}: '{part['code']}' kodu zaten mevcut"))
+                else:
+                    errors.append((row_idx, f"Satır {row_idx}: {write_error.get('errmsg', '')}"))
+    
+    if imported:
+        await bump_project_version(project_id)
+    errors = [message for _, message in sorted(errors)]
+    
+    return {
+        "success": True,
+        "imported": imported,
+        "errors": errors,
+        "message": f"{imported} parça başarıyla eklendi" + (f", {len(errors)} hata" if errors else "")
+    }
 
 # --- Quote Email Routes ---
 class QuoteEmailRequest(BaseModel):
     quote_request_id: str
     supplier_ids: List[str]
     
-@api_router.post("/send-quote-emails")
-async def send_quote_emails(request: QuoteEmailRequest):
-    """Send quote request emails to selected suppliers with form link"""
-    if not resend_api_key:
+@api_router.post("/send-quote-emails", status_code=202)
+async def send_quote_emails(request: QuoteEmailRequest, loaders: Loaders = Depends(get_loaders)):
+    """Queue quote request emails to selected suppliers with form link; poll
+    /email-jobs/{job_id} for delivery progress"""
+    if not mail_transport.configured:
         raise HTTPException(status_code=500, detail="E-posta servisi yapılandırılmamış. RESEND_API_KEY ekleyin.")
     
-    quote_request = await db.quote_requests.find_one({"id": request.quote_request_id}, {"_id": 0})
+    supplier_ids = list(dict.fromkeys(request.supplier_ids))
+    quote_request, suppliers, settings = await asyncio.gather(
+        loaders.quote_requests.load(request.quote_request_id),
+        loaders.suppliers.load_map(supplier_ids),
+        loaders.settings.load("settings")
+    )
     if not quote_request:
         raise HTTPException(status_code=404, detail="Teklif talebi bulunamadı")
+    settings = settings or {}
     
-    part = await db.parts.find_one({"id": quote_request["part_id"]}, {"_id": 0})
+    part = await loaders.parts.load(quote_request["part_id"])
     if not part:
         raise HTTPException(status_code=404, detail="Parça bulunamadı")
     
-    project = await db.projects.find_one({"id": part["project_id"]}, {"_id": 0})
-    settings = await db.settings.find_one({"id": "settings"}, {"_id": 0}) or {}
+    project = await loaders.projects.load(part["project_id"])
     
     method = MANUFACTURING_METHODS.get(quote_request.get("manufacturing_method", ""), {})
     material = MATERIALS.get(part.get("material", ""), {})
@@ -1355,154 +2844,92 @@ async def send_quote_emails(request: QuoteEmailRequest):
     # Get app URL from environment or use default
     app_url = os.environ.get('APP_URL', 'https://prodplan-9.preview.emergentagent.com')
     
-    sent_emails = []
-    failed_emails = []
+    subject = f"Teklif Talebi - {part.get('code', '')} - {project.get('name', '') if project else ''}"
+    # Everything except the supplier's name, form link and token is the same for all recipients
+    notes = quote_request.get('notes')
+    quote_body = QUOTE_REQUEST_HTML.partial(
+        company_name=settings.get('company_name', 'ProManufakt'),
+        project_name=project.get('name', '-') if project else '-',
+        project_code=project.get('code', '-') if project else '-',
+        part_name=part.get('name', '-'),
+        part_code=part.get('code', '-'),
+        quantity=part.get('quantity', 0),
+        material_name=material.get('name', part.get('material', '-')),
+        method_code=method.get('code', ''),
+        method_name=method.get('name', quote_request.get('manufacturing_method', '-')),
+        method_description=method.get('description', ''),
+        deadline=quote_request.get('deadline', '-')[:10],
+        notes=Markup(f'<p style="color: #666;"><strong>Not:</strong> {html.escape(notes)}</p>') if notes else '',
+        company_email=settings.get('company_email', ''),
+        company_phone=settings.get('company_phone', ''),
+        company_address=settings.get('company_address', '')
+    )
     
-    for supplier_id in request.supplier_ids:
-        supplier = await db.suppliers.find_one({"id": supplier_id}, {"_id": 0})
+    messages = []
+    form_tokens = []
+    skipped = []
+    
+    for supplier_id in supplier_ids:
+        supplier = suppliers.get(supplier_id)
         if not supplier:
-            failed_emails.append({"supplier_id": supplier_id, "error": "Tedarikçi bulunamadı"})
+            skipped.append({"supplier_id": supplier_id, "error": "Tedarikçi bulunamadı"})
             continue
         
         # Generate unique form token
         form_token = str(uuid.uuid4())[:8].upper()
-        
-        # Store token in quote request for validation
-        await db.quote_requests.update_one(
-            {"id": request.quote_request_id},
-            {"$push": {"form_tokens": {"supplier_id": supplier_id, "token": form_token, "created_at": datetime.now(timezone.utc).isoformat()}}}
-        )
+        form_tokens.append({"supplier_id": supplier_id, "token": form_token, "created_at": datetime.now(timezone.utc).isoformat()})
         
         # Form link
         form_link = f"{app_url}/quote-form/{request.quote_request_id}?supplier={supplier_id}&token={form_token}"
         
-        # Build email HTML
-        html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <style>
-        body {{ font-family: 'Segoe UI', Arial, sans-serif; line-height: 1.6; color: #333; }}
-        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-        .header {{ background: #1F4E79; color: white; padding: 20px; text-align: center; }}
-        .content {{ padding: 20px; background: #f9f9f9; }}
-        .section {{ background: white; padding: 15px; margin: 10px 0; border-left: 4px solid #1F4E79; }}
-        .label {{ color: #666; font-size: 12px; text-transform: uppercase; }}
-        .value {{ font-weight: bold; font-size: 16px; }}
-        .button {{ display: inline-block; background: #F97316; color: white; padding: 15px 30px; text-decoration: none; border-radius: 5px; font-weight: bold; margin: 20px 0; }}
-        .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
-        table {{ width: 100%; border-collapse: collapse; }}
-        td {{ padding: 8px; border-bottom: 1px solid #eee; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>TEKLİF TALEBİ</h1>
-            <p>{settings.get('company_name', 'ProManufakt')}</p>
-        </div>
-        
-        <div class="content">
-            <p>Sayın <strong>{supplier.get('contact_person', supplier['name'])}</strong>,</p>
-            
-            <p>Aşağıdaki işlem için fiyat teklifinizi talep ediyoruz:</p>
-            
-            <div class="section">
-                <p class="label">PROJE</p>
-                <p class="value">{project.get('name', '-') if project else '-'} ({project.get('code', '-') if project else '-'})</p>
-            </div>
-            
-            <div class="section">
-                <p class="label">PARÇA BİLGİLERİ</p>
-                <table>
-                    <tr><td>Parça Adı:</td><td><strong>{part.get('name', '-')}</strong></td></tr>
-                    <tr><td>Parça Kodu:</td><td><strong>{part.get('code', '-')}</strong></td></tr>
-                    <tr><td>Miktar:</td><td><strong>{part.get('quantity', 0)} adet</strong></td></tr>
-                    <tr><td>Malzeme:</td><td><strong>{material.get('name', part.get('material', '-'))}</strong></td></tr>
-                </table>
-            </div>
-            
-            <div class="section">
-                <p class="label">İSTENEN İŞLEM</p>
-                <p class="value">{method.get('code', '')} - {method.get('name', quote_request.get('manufacturing_method', '-'))}</p>
-                <p style="color: #666; font-size: 14px;">{method.get('description', '')}</p>
-            </div>
-            
-            <div class="section">
-                <p class="label">TERMİN</p>
-                <p class="value">Teklif Son Tarih: {quote_request.get('deadline', '-')[:10]}</p>
-            </div>
-            
-            <center>
-                <a href="{form_link}" class="button">TEKLİF FORMUNU DOLDUR</a>
-            </center>
-            
-            <p style="text-align: center; color: #666; font-size: 12px;">
-                Form Şifresi: <strong>{form_token}</strong>
-            </p>
-            
-            {f'<p style="color: #666;"><strong>Not:</strong> {quote_request.get("notes", "")}</p>' if quote_request.get('notes') else ''}
-        </div>
-        
-        <div class="footer">
-            <p>{settings.get('company_name', 'ProManufakt')}</p>
-            <p>{settings.get('company_email', '')} | {settings.get('company_phone', '')}</p>
-            <p>{settings.get('company_address', '')}</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
+        html_content = quote_body.render(
+            contact_name=supplier.get('contact_person', supplier['name']),
+            form_link=form_link,
+            form_token=form_token
+        )
         
-        try:
-            email_params = {
+        messages.append({
+            "params": {
                 "from": SENDER_EMAIL,
                 "to": [supplier["email"]],
-                "subject": f"Teklif Talebi - {part.get('code', '')} - {project.get('name', '') if project else ''}",
+                "subject": subject,
                 "html": html_content
-            }
-            
-            result = await asyncio.to_thread(resend.Emails.send, email_params)
-            sent_emails.append({
+            },
+            "metadata": {
                 "supplier_id": supplier_id,
                 "supplier_name": supplier["name"],
-                "email": supplier["email"],
-                "email_id": result.get("id")
-            })
-            
-            # Create notification
-            await db.notifications.insert_one({
-                "id": str(uuid.uuid4()),
+                "email": supplier["email"]
+            },
+            "notification": {
                 "type": "email_sent",
                 "title": "Teklif E-postası Gönderildi",
                 "message": f"{supplier['name']} tedarikçisine teklif talebi gönderildi",
                 "reference_type": "quote_request",
-                "reference_id": request.quote_request_id,
-                "is_read": False,
-                "created_at": datetime.now(timezone.utc).isoformat()
-            })
-            
-        except Exception as e:
-            logger.error(f"Email send error to {supplier['email']}: {str(e)}")
-            failed_emails.append({
-                "supplier_id": supplier_id,
-                "supplier_name": supplier["name"],
-                "error": str(e)
-            })
+                "reference_id": request.quote_request_id
+            }
+        })
+    
+    # Store tokens in quote request for validation
+    if form_tokens:
+        await db.quote_requests.update_one(
+            {"id": request.quote_request_id},
+            {"$push": {"form_tokens": {"$each": form_tokens}}}
+        )
+    
+    job = await enqueue_email_job("quote_request", request.quote_request_id, messages, skipped)
     
     return {
-        "success": len(sent_emails) > 0,
-        "sent": sent_emails,
-        "failed": failed_emails,
-        "message": f"{len(sent_emails)} e-posta gönderildi" + (f", {len(failed_emails)} başarısız" if failed_emails else "")
+        "job_id": job["id"],
+        "queued": [message["metadata"] for message in messages],
+        "failed": skipped,
+        "message": f"{len(messages)} e-posta gönderim kuyruğuna alındı" + (f", {len(skipped)} başarısız" if skipped else "")
     }
 
 # --- Public Quote Form Routes ---
 @api_router.get("/quote-form/{quote_request_id}")
-async def get_quote_form_data(quote_request_id: str, supplier: str, token: str):
+async def get_quote_form_data(quote_request_id: str, supplier: str, token: str, loaders: Loaders = Depends(get_loaders)):
     """Get quote form data for supplier to fill"""
-    quote_request = await db.quote_requests.find_one({"id": quote_request_id}, {"_id": 0})
+    quote_request = await loaders.quote_requests.load(quote_request_id)
     if not quote_request:
         raise HTTPException(status_code=404, detail="Teklif talebi bulunamadı")
     
@@ -1512,9 +2939,11 @@ async def get_quote_form_data(quote_request_id: str, supplier: str, token: str):
     if not valid_token:
         raise HTTPException(status_code=403, detail="Geçersiz form linki")
     
-    part = await db.parts.find_one({"id": quote_request["part_id"]}, {"_id": 0})
-    supplier_data = await db.suppliers.find_one({"id": supplier}, {"_id": 0})
-    project = await db.projects.find_one({"id": part["project_id"]}, {"_id": 0}) if part else None
+    part, supplier_data = await asyncio.gather(
+        loaders.parts.load(quote_request["part_id"]),
+        loaders.suppliers.load(supplier)
+    )
+    project = await loaders.projects.load(part["project_id"]) if part else None
     
     method = MANUFACTURING_METHODS.get(quote_request.get("manufacturing_method", ""), {})
     material = MATERIALS.get(part.get("material", ""), {}) if part else {}
@@ -1539,9 +2968,9 @@ class PublicQuoteSubmit(BaseModel):
     notes: Optional[str] = None
 
 @api_router.post("/quote-form/submit")
-async def submit_quote_form(data: PublicQuoteSubmit):
+async def submit_quote_form(data: PublicQuoteSubmit, loaders: Loaders = Depends(get_loaders)):
     """Submit quote response from supplier form"""
-    quote_request = await db.quote_requests.find_one({"id": data.quote_request_id}, {"_id": 0})
+    quote_request = await loaders.quote_requests.load(data.quote_request_id)
     if not quote_request:
         raise HTTPException(status_code=404, detail="Teklif talebi bulunamadı")
     
@@ -1552,14 +2981,17 @@ async def submit_quote_form(data: PublicQuoteSubmit):
         raise HTTPException(status_code=403, detail="Geçersiz form linki")
     
     # Check if already submitted
-    existing = await db.quote_responses.find_one({
-        "quote_request_id": data.quote_request_id,
-        "supplier_id": data.supplier_id
-    })
+    existing, part, supplier = await asyncio.gather(
+        db.quote_responses.find_one({
+            "quote_request_id": data.quote_request_id,
+            "supplier_id": data.supplier_id
+        }, {"_id": 1}),
+        loaders.parts.load(quote_request["part_id"]),
+        loaders.suppliers.load(data.supplier_id)
+    )
     if existing:
         raise HTTPException(status_code=400, detail="Bu tedarikçi zaten teklif vermiş")
     
-    part = await db.parts.find_one({"id": quote_request["part_id"]}, {"_id": 0})
     quantity = part.get("quantity", 1) if part else 1
     
     quote_response = {
@@ -1586,17 +3018,13 @@ async def submit_quote_form(data: PublicQuoteSubmit):
     )
     
     # Create notification
-    supplier = await db.suppliers.find_one({"id": data.supplier_id}, {"_id": 0})
-    await db.notifications.insert_one({
-        "id": str(uuid.uuid4()),
-        "type": "quote_received",
-        "title": "Yeni Teklif Alındı",
-        "message": f"{supplier.get('name', 'Tedarikçi')} teklif gönderdi - {data.unit_price} {data.currency}",
-        "reference_type": "quote_response",
-        "reference_id": quote_response["id"],
-        "is_read": False,
-        "created_at": datetime.now(timezone.utc).isoformat()
-    })
+    await create_notification(
+        "quote_received",
+        "Yeni Teklif Alındı",
+        f"{(supplier or {}).get('name', 'Tedarikçi')} teklif gönderdi - {data.unit_price} {data.currency}",
+        "quote_response",
+        quote_response["id"]
+    )
     
     return {
         "success": True,
@@ -1604,6 +3032,45 @@ async def submit_quote_form(data: PublicQuoteSubmit):
         "quote_response_id": quote_response["id"]
     }
 
+# --- Admin Routes ---
+@api_router.get("/admin/indexes")
+async def get_index_usage():
+    """Report usage stats of every index so unused ones can be dropped"""
+    report = {}
+    for collection_name, indexes in COLLECTION_INDEXES.items():
+        declared = {index.document["name"] for index in indexes}
+        try:
+            stats = await db[collection_name].aggregate([{"$indexStats": {}}]).to_list(None)
+        except OperationFailure as e:
+            logger.error(f"Index stats error on {collection_name}: {str(e)}")
+            stats = []
+        
+        # $indexStats yields one document per index per host; sum them up
+        usage = {}
+        for stat in stats:
+            accesses = stat.get("accesses", {})
+            since = accesses.get("since")
+            item = usage.setdefault(stat["name"], {
+                "name": stat["name"],
+                "key": dict(stat.get("key", {})),
+                "ops": 0,
+                "since": since.isoformat() if isinstance(since, datetime) else since,
+                "declared": stat["name"] in declared or stat["name"] == "_id_"
+            })
+            item["ops"] += int(accesses.get("ops", 0))
+        
+        items = list(usage.values())
+        for item in items:
+            item["unused"] = item["ops"] == 0 and item["name"] != "_id_"
+        items.sort(key=lambda x: x["ops"])
+        
+        present = {item["name"] for item in items}
+        report[collection_name] = {
+            "indexes": items,
+            "missing": sorted(declared - present)
+        }
+    return report
+
 # Include router
 app.include_router(api_router)
 
@@ -1613,8 +3080,27 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Has-More", "X-Next-Cursor"],
 )
 
+def forget_background_task(task: asyncio.Task):
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error(f"Background task failed: {task.exception()}")
+
+@app.on_event("startup")
+async def startup_db():
+    await ensure_indexes()
+    await seed_code_counters()
+    workers = [email_worker() for _ in range(MAIL_WORKERS)]
+    # Hashing existing uploads can take a while; don't hold up startup
+    for coro in (migrate_uploads_to_blobs(), upload_session_sweeper(), tail_notification_changes(),
+                 notification_maintenance(), *workers):
+        task = asyncio.create_task(coro)
+        background_tasks.add(task)
+        task.add_done_callback(forget_background_task)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+    preview_executor.shutdown(wait=False, cancel_futures=True)
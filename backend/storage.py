@@ -0,0 +1,157 @@
+# ProManufakt - Dosya Depolama (File Storage)
+# Yüklenen dosyalar için yerel disk veya S3 uyumlu (AWS S3, MinIO) depolama
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Optional
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from fastapi import Request
+from fastapi.responses import RedirectResponse, Response
+
+from uploads import conditional_file_response
+
+
+class LocalStorage:
+    """Files under a directory on the API host (the original behaviour)"""
+
+    name = "local"
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self.path(key).is_file)
+
+    async def put_file(self, source: Path, key: str, content_type: str):
+        """Move a local temp file to `key`"""
+        destination = self.path(key)
+
+        def move():
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, destination)
+
+        await asyncio.to_thread(move)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return str(self.path(key))
+
+    async def get_bytes(self, key: str) -> bytes:
+        return await asyncio.to_thread(self.path(key).read_bytes)
+
+    async def put_bytes(self, key: str, data: bytes, content_type: str):
+        destination = self.path(key)
+
+        def write():
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            temp = destination.with_name(f".{destination.name}.tmp")
+            temp.write_bytes(data)
+            os.replace(temp, destination)
+
+        await asyncio.to_thread(write)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self.path(key).unlink, missing_ok=True)
+
+    async def download_response(self, request: Request, key: str, download_name: str, media_type: str,
+                                etag: Optional[str], cache_control: str) -> Response:
+        path = self.path(key)
+        if etag is None:
+            stat = await asyncio.to_thread(path.stat)
+            etag = f'W/"{int(stat.st_mtime)}-{stat.st_size}"'
+        return await conditional_file_response(request, path, download_name, media_type, etag, cache_control)
+
+
+class S3Storage:
+    """S3-compatible bucket; downloads are redirected to presigned URLs so the
+    bytes never pass through the API (S3 itself answers Range/conditional GETs)"""
+
+    name = "s3"
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, region: Optional[str] = None,
+                 prefix: str = "", presign_expires: int = 300):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.presign_expires = presign_expires
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path" if endpoint_url else "auto"})
+        )
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    async def exists(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=self.object_key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    async def put_file(self, source: Path, key: str, content_type: str):
+        """Upload a local temp file to `key`, then remove the temp file"""
+        await asyncio.to_thread(
+            self.client.upload_file, str(source), self.bucket, self.object_key(key),
+            ExtraArgs={"ContentType": content_type}
+        )
+        await asyncio.to_thread(Path(source).unlink, missing_ok=True)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    async def get_bytes(self, key: str) -> bytes:
+        def read():
+            obj = self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))
+            return obj["Body"].read()
+
+        return await asyncio.to_thread(read)
+
+    async def put_bytes(self, key: str, data: bytes, content_type: str):
+        await asyncio.to_thread(
+            self.client.put_object, Bucket=self.bucket, Key=self.object_key(key), Body=data, ContentType=content_type
+        )
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=self.object_key(key))
+
+    async def download_response(self, request: Request, key: str, download_name: str, media_type: str,
+                                etag: Optional[str], cache_control: str) -> Response:
+        url = await asyncio.to_thread(
+            self.client.generate_presigned_url,
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self.object_key(key),
+                "ResponseContentType": media_type,
+                "ResponseContentDisposition": f'attachment; filename="{download_name}"',
+                "ResponseCacheControl": cache_control
+            },
+            ExpiresIn=self.presign_expires
+        )
+        return RedirectResponse(url, status_code=307)
+
+
+def create_storage(local_root: Path):
+    """Pick the backend from STORAGE_BACKEND (local | s3)"""
+    backend = os.environ.get('STORAGE_BACKEND', 'local').lower()
+    if backend == "s3":
+        return S3Storage(
+            bucket=os.environ['S3_BUCKET'],
+            endpoint_url=os.environ.get('S3_ENDPOINT_URL') or None,
+            region=os.environ.get('S3_REGION') or None,
+            prefix=os.environ.get('S3_PREFIX', ''),
+            presign_expires=int(os.environ.get('S3_PRESIGN_EXPIRES', '300'))
+        )
+    if backend != "local":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+    return LocalStorage(local_root)
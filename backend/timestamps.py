@@ -0,0 +1,12 @@
+# ProManufakt - Zaman Damgaları (Timestamps)
+# Kayıtlardaki ISO 8601 zaman damgaları karşılaştırma ve hesaplama için saniyeye çevrilir
+
+from datetime import datetime, timezone
+
+
+def parse_timestamp(value: str) -> float:
+    """Seconds since the epoch; timestamps without an offset are taken as UTC"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
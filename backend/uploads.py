@@ -0,0 +1,332 @@
+# ProManufakt - Dosya Yükleme (File Uploads)
+# Multipart gövde parça parça okunur, diske tek geçişte yazılır ve SHA-256 hesaplanır
+
+import asyncio
+import hashlib
+import os
+import re
+import time
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+FILE_FIELD = b"file"
+# Headers, boundaries and form fields on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _unsupported_extension(allowed_extensions: set) -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"Desteklenmeyen dosya formatı. İzin verilen: {', '.join(allowed_extensions)}"
+    )
+
+
+def _too_large(max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Dosya boyutu sınırı aşıldı (en fazla {max_size // (1024 * 1024)} MB)"
+    )
+
+
+class _FileSink:
+    """Temp file plus running hash; all methods are called off the event loop"""
+
+    def __init__(self, directory: Path):
+        self.temp_path = directory / f".{uuid.uuid4().hex}.part"
+        self.handle = open(self.temp_path, "wb")
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, pieces: list):
+        for piece in pieces:
+            self.handle.write(piece)
+            self.sha256.update(piece)
+            self.size += len(piece)
+
+    def close(self):
+        self.handle.close()
+
+    def discard(self):
+        self.handle.close()
+        self.temp_path.unlink(missing_ok=True)
+
+
+async def receive_file(request: Request, directory: Path, max_size: int, allowed_extensions: set) -> dict:
+    """Stream the `file` field of a multipart request into a temp file in
+    `directory`. Returns temp_path, original_name, extension, size and sha256;
+    the caller moves temp_path into storage or removes it with `discard_file`."""
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="multipart/form-data bekleniyor")
+
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > max_size + MULTIPART_OVERHEAD:
+        raise _too_large(max_size)
+
+    state = {
+        "header_field": b"",
+        "header_value": b"",
+        "headers": {},
+        "in_file": False,
+        "filename": None,
+        "file_seen": False,
+        "pieces": [],
+        "received": 0,
+        "error": None,
+    }
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["in_file"] = False
+
+    def on_header_field(data, start, end):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["header_field"].lower()] = state["header_value"]
+        state["header_field"] = b""
+        state["header_value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        if disposition.get(b"name") == FILE_FIELD and b"filename" in disposition and not state["file_seen"]:
+            state["in_file"] = True
+            state["file_seen"] = True
+            state["filename"] = disposition[b"filename"].decode("utf-8", "replace")
+            if Path(state["filename"]).suffix.lower() not in allowed_extensions:
+                state["error"] = _unsupported_extension(allowed_extensions)
+
+    def on_part_data(data, start, end):
+        if state["in_file"] and state["error"] is None:
+            state["received"] += end - start
+            if state["received"] > max_size:
+                state["error"] = _too_large(max_size)
+                return
+            state["pieces"].append(bytes(data[start:end]))
+
+    def on_part_end():
+        state["in_file"] = False
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    sink = await asyncio.to_thread(_FileSink, directory)
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if state["error"] is not None:
+                raise state["error"]
+            if state["pieces"]:
+                pieces, state["pieces"] = state["pieces"], []
+                await asyncio.to_thread(sink.write, pieces)
+        parser.finalize()
+        if not state["file_seen"]:
+            raise HTTPException(status_code=400, detail="Dosya bulunamadı")
+        await asyncio.to_thread(sink.close)
+    except BaseException:
+        await asyncio.to_thread(sink.discard)
+        raise
+
+    return {
+        "temp_path": sink.temp_path,
+        "original_name": state["filename"],
+        "extension": Path(state["filename"]).suffix.lower(),
+        "size": sink.size,
+        "sha256": sink.sha256.hexdigest()
+    }
+
+
+async def discard_file(received: Optional[dict]):
+    if received:
+        await asyncio.to_thread(Path(received["temp_path"]).unlink, missing_ok=True)
+
+
+def sweep_temp_files(directory: Path, max_age: float) -> int:
+    """Remove temp files that requests left in `directory` because the worker
+    died mid-upload. Blocking; returns how many were removed."""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in directory.glob(".*.part"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def hash_file(path: Path) -> tuple:
+    """SHA-256 and size of a file on disk (blocking)"""
+    sha256 = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(block)
+            size += len(block)
+    return sha256.hexdigest(), size
+
+
+async def write_chunk(request: Request, path: Path, offset: int, max_size: int) -> int:
+    """Write the raw request body at `offset`, discarding anything after it
+    (an earlier, interrupted attempt). Returns the number of bytes written."""
+    def open_at_offset():
+        handle = open(path, "r+b" if path.exists() else "wb")
+        handle.seek(offset)
+        handle.truncate()
+        return handle
+
+    handle = await asyncio.to_thread(open_at_offset)
+    written = 0
+    try:
+        async for chunk in request.stream():
+            written += len(chunk)
+            if written > max_size:
+                raise HTTPException(status_code=413, detail=f"Parça boyutu sınırı aşıldı ({max_size} bayt)")
+            if chunk:
+                await asyncio.to_thread(handle.write, chunk)
+    finally:
+        await asyncio.to_thread(handle.close)
+    return written
+
+
+# ===================== DOWNLOADS =====================
+
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+RANGE_SPEC = re.compile(r"(\d*)\s*-\s*(\d*)", re.ASCII)
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range into inclusive (start, end). Returns None
+    when the header should be ignored (malformed or multiple ranges)."""
+    unit, _, spec = header.partition("=")
+    match = RANGE_SPEC.fullmatch(spec.strip())
+    if unit.strip().lower() != "bytes" or not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else None
+    if end is not None and start > end:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison, as required for If-None-Match"""
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def if_range_matches(header: str, etag: str) -> bool:
+    """Strong comparison, as required for If-Range: weak validators never match"""
+    validator = header.strip()
+    return not validator.startswith("W/") and not etag.startswith("W/") and validator == etag
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _read_range(path: Path, start: int, end: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+async def _iterate_range(path: Path, start: int, end: int):
+    blocks = _read_range(path, start, end)
+    while True:
+        block = await asyncio.to_thread(next, blocks, None)
+        if block is None:
+            break
+        yield block
+
+
+async def conditional_file_response(request: Request, path: Path, download_name: str, media_type: str,
+                                    etag: str, cache_control: str) -> Response:
+    """Serve a file honouring If-None-Match, If-Modified-Since, Range and If-Range"""
+    stat = await asyncio.to_thread(path.stat)
+    size = stat.st_size
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+
+    if _not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # A stale If-Range validator means the client's partial copy is outdated
+    if range_header and (if_range is None or if_range_matches(if_range, etag)):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            headers["Content-Disposition"] = f'attachment; filename="{download_name}"'
+            return StreamingResponse(
+                _iterate_range(path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers=headers
+            )
+
+    return FileResponse(path=path, filename=download_name, media_type=media_type, headers=headers, stat_result=stat)
@@ -32,7 +32,11 @@ export function GanttChart({ project, tasks, onTaskClick }) {
 
   // Calculate date range
   const startDate = new Date(project.start_date);
-  const endDate = new Date(project.end_date);
+  // The schedule may run past the planned end date
+  const endDate = new Date(tasks.reduce(
+    (latest, task) => Math.max(latest, new Date(task.end).getTime()),
+    new Date(project.end_date).getTime()
+  ));
   const totalDays = Math.ceil((endDate - startDate) / (1000 * 60 * 60 * 24)) + 10;
   
   // Group tasks by part
@@ -206,6 +210,7 @@ export function GanttChart({ project, tasks, onTaskClick }) {
                                 'absolute rounded-sm cursor-pointer transition-all shadow-sm hover:shadow-md',
                                 colors.bg,
                                 'text-white text-xs font-medium flex items-center px-2 overflow-hidden',
+                                task.critical && 'ring-2 ring-red-500',
                                 hoveredTask === task.id && 'ring-2 ring-offset-1 ring-primary'
                               )}
                               style={{
@@ -229,6 +234,11 @@ export function GanttChart({ project, tasks, onTaskClick }) {
                               <p className="font-medium">{task.method_name}</p>
                               <p className="text-xs text-muted-foreground">Kod: {task.method_code}</p>
                               <p className="text-xs">Süre: {task.duration_days} gün</p>
+                              {task.slack_days !== undefined && (
+                                <p className="text-xs">
+                                  {task.critical ? 'Kritik yolda' : `Bolluk: ${task.slack_days} gün`}
+                                </p>
+                              )}
                               <p className="text-xs">
                                 {new Date(task.start).toLocaleDateString('tr-TR')} - {new Date(task.end).toLocaleDateString('tr-TR')}
                               </p>
@@ -34,12 +34,24 @@ export function Layout({ children }) {
 
   useEffect(() => {
     loadUnreadCount();
-  }, [location]);
+    // New notifications and reads arrive as unread-count deltas; reload after a reconnect
+    const source = new EventSource(notificationsApi.streamUrl);
+    let connected = false;
+    source.onopen = () => {
+      if (connected) loadUnreadCount();
+      connected = true;
+    };
+    source.addEventListener('unread', (event) => {
+      const { delta } = JSON.parse(event.data);
+      setUnreadCount(count => Math.max(count + delta, 0));
+    });
+    return () => source.close();
+  }, []);
 
   const loadUnreadCount = async () => {
     try {
-      const response = await notificationsApi.getAll(false);
-      setUnreadCount(response.data.length);
+      const response = await notificationsApi.getUnreadCount();
+      setUnreadCount(response.data.unread);
     } catch (error) {
       console.error('Failed to load notifications:', error);
     }
@@ -45,6 +45,7 @@ export const quotesApi = {
   createResponse: (data) => api.post('/quote-responses', data),
   getComparison: (requestId) => api.get(`/quote-comparison/${requestId}`),
   sendEmails: (data) => api.post('/send-quote-emails', data),
+  getEmailJob: (jobId) => api.get(`/email-jobs/${jobId}`),
   getFormData: (requestId, supplierId, token) => api.get(`/quote-form/${requestId}`, { params: { supplier: supplierId, token } }),
   submitForm: (data) => api.post('/quote-form/submit', data),
 };
@@ -60,8 +61,10 @@ export const ordersApi = {
 // Notifications
 export const notificationsApi = {
   getAll: (isRead) => api.get('/notifications', { params: { is_read: isRead } }),
+  getUnreadCount: () => api.get('/notifications/unread-count'),
   markRead: (id) => api.put(`/notifications/${id}/read`),
   markAllRead: () => api.put('/notifications/read-all'),
+  streamUrl: `${API_BASE}/notifications/stream`,
 };
 
 // Currency Rates
@@ -89,6 +92,7 @@ export const staticDataApi = {
   getManufacturingMethods: () => api.get('/manufacturing-methods'),
   getStatuses: () => api.get('/statuses'),
   getCurrencies: () => api.get('/currencies'),
+  getBootstrap: () => api.get('/bootstrap'),
 };
 
 // Email
@@ -13,6 +13,12 @@ export function NotificationsPage() {
 
   useEffect(() => {
     loadNotifications();
+    const source = new EventSource(notificationsApi.streamUrl);
+    source.addEventListener('notification', (event) => {
+      const notification = JSON.parse(event.data);
+      setNotifications(prev => [notification, ...prev.filter(n => n.id !== notification.id)]);
+    });
+    return () => source.close();
   }, []);
 
   const loadNotifications = async () => {
@@ -57,21 +57,19 @@ export function ProjectDetailPage() {
 
   const loadData = async () => {
     try {
-      const [projectRes, partsRes, materialsRes, formTypesRes, methodsRes, ganttRes] = await Promise.all([
+      const [projectRes, partsRes, bootstrapRes, ganttRes] = await Promise.all([
         projectsApi.getOne(projectId),
         partsApi.getAll(projectId),
-        staticDataApi.getMaterials(),
-        staticDataApi.getFormTypes(),
-        staticDataApi.getManufacturingMethods(),
+        staticDataApi.getBootstrap(),
         dashboardApi.getGantt(projectId)
       ]);
       
       setProject(projectRes.data);
       setProjectForm(projectRes.data);
       setParts(partsRes.data);
-      setMaterials(materialsRes.data);
-      setFormTypes(formTypesRes.data);
-      setMethods(methodsRes.data);
+      setMaterials(bootstrapRes.data.materials);
+      setFormTypes(bootstrapRes.data.form_types);
+      setMethods(bootstrapRes.data.manufacturing_methods);
       setGanttData(ganttRes.data);
     } catch (error) {
       toast.error('Proje yüklenirken hata oluştu');
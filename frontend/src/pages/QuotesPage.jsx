@@ -180,8 +180,8 @@ export function QuotesPage() {
         supplier_ids: emailSuppliers
       });
       
-      if (response.data.sent && response.data.sent.length > 0) {
-        toast.success(`${response.data.sent.length} tedarikçiye e-posta gönderildi`);
+      if (response.data.queued && response.data.queued.length > 0) {
+        toast.success(`${response.data.queued.length} tedarikçiye e-posta gönderim kuyruğuna alındı`);
       }
       if (response.data.failed && response.data.failed.length > 0) {
         toast.warning(`${response.data.failed.length} e-posta gönderilemedi`);
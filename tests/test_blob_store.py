@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from storage import LocalStorage
+
+
+@pytest.fixture
+def blob_env(tmp_path, monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "storage", LocalStorage(tmp_path / "store"))
+    asyncio.run(db.blobs.create_indexes(server.COLLECTION_INDEXES["blobs"]))
+    return db, server.storage, tmp_path
+
+
+def received_file(tmp_path, content: bytes, name: str) -> dict:
+    path = tmp_path / name
+    path.write_bytes(content)
+    sha256, size = server.hash_file(path)
+    return {"temp_path": path, "sha256": sha256, "size": size, "extension": ".pdf", "original_name": name}
+
+
+def test_store_and_release_share_one_copy(blob_env):
+    db, storage, tmp_path = blob_env
+
+    async def run():
+        first = await server.store_blob(received_file(tmp_path, b"%PDF same", "a.pdf"))
+        second = await server.store_blob(received_file(tmp_path, b"%PDF same", "b.pdf"))
+        assert first == second
+        key = server.blob_key(first[:64])
+        assert (await db.blobs.find_one({"id": first[:64]}))["ref_count"] == 2
+
+        await server.release_file(first)
+        assert await storage.exists(key)
+        await server.release_file(second)
+        assert not await storage.exists(key)
+        assert await db.blobs.find_one({"id": first[:64]}) is None
+
+    asyncio.run(run())
+
+
+def test_store_during_release_keeps_the_bytes(blob_env, monkeypatch):
+    """release_file reaches the byte deletion, then a store_blob of the same
+    content runs before the bytes are gone: the new reference must end up
+    with its bytes"""
+    db, storage, tmp_path = blob_env
+    original_delete = storage.delete
+
+    async def run():
+        filename = await server.store_blob(received_file(tmp_path, b"%PDF race", "a.pdf"))
+        sha256 = filename[:64]
+        key = server.blob_key(sha256)
+        concurrent = {}
+
+        async def delete_with_interleaved_store(delete_key):
+            if delete_key == key and "task" not in concurrent:
+                concurrent["task"] = asyncio.create_task(
+                    server.store_blob(received_file(tmp_path, b"%PDF race", "b.pdf"))
+                )
+                # Let the store run as far as it can while the bytes still exist
+                for _ in range(20):
+                    await asyncio.sleep(0)
+            await original_delete(delete_key)
+
+        monkeypatch.setattr(storage, "delete", delete_with_interleaved_store)
+        await server.release_file(filename)
+        assert await asyncio.wait_for(concurrent["task"], 5) == filename
+
+        blob = await db.blobs.find_one({"id": sha256})
+        assert blob["ref_count"] == 1
+        assert "deleting_at" not in blob
+        assert await storage.exists(key)
+
+    asyncio.run(run())
+
+
+def test_abandoned_deletion_is_taken_over(blob_env):
+    db, storage, tmp_path = blob_env
+
+    async def run():
+        await db.blobs.insert_one({"id": "f" * 64, "ref_count": 0, "deleting_at": "2000-01-01T00:00:00+00:00"})
+        await asyncio.wait_for(server.acquire_blob("f" * 64, 10), 5)
+        blob = await db.blobs.find_one({"id": "f" * 64})
+        assert blob["ref_count"] == 1
+        assert "deleting_at" not in blob
+
+    asyncio.run(run())
+
+
+def test_concurrent_drawing_replacements_release_the_old_drawing_once(blob_env, monkeypatch):
+    db, storage, tmp_path = blob_env
+    monkeypatch.setattr(server, "schedule_thumbnail", lambda filename: None)
+
+    async def run():
+        shared = await server.store_blob(received_file(tmp_path, b"%PDF shared", "a.pdf"))
+        await server.store_blob(received_file(tmp_path, b"%PDF shared", "b.pdf"))
+        await db.parts.insert_many([
+            {"id": "A", "project_id": None, "technical_drawing_filename": shared},
+            {"id": "B", "project_id": None, "technical_drawing_filename": shared},
+        ])
+        # Both requests read part A before either replaced its drawing
+        part = await db.parts.find_one({"id": "A"}, {"_id": 0})
+        results = await asyncio.gather(
+            server.attach_technical_drawing(part, received_file(tmp_path, b"%PDF first", "c.pdf")),
+            server.attach_technical_drawing(part, received_file(tmp_path, b"%PDF second", "d.pdf")),
+        )
+
+        assert (await db.blobs.find_one({"id": shared[:64]}))["ref_count"] == 1
+        assert await storage.exists(server.blob_key(shared[:64]))
+        current = (await db.parts.find_one({"id": "A"}))["technical_drawing_filename"]
+        assert current in [result["filename"] for result in results]
+        blobs = {blob["id"]: blob["ref_count"] async for blob in db.blobs.find()}
+        assert blobs == {shared[:64]: 1, current[:64]: 1}
+
+    asyncio.run(run())
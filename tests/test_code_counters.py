@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+YEAR = datetime.now().year
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", db)
+    for name in ("counters", "migrations"):
+        asyncio.run(db[name].create_indexes(server.COLLECTION_INDEXES[name]))
+    return db
+
+
+def test_bulk_allocation_reserves_consecutive_codes(db):
+    async def run():
+        first = await server.allocate_codes("PRJ", 3)
+        second = await server.allocate_codes("PRJ")
+        other = await server.allocate_codes("SIP", 2)
+        return first, second, other
+
+    first, second, other = asyncio.run(run())
+    assert first == [f"PRJ-{YEAR}-001", f"PRJ-{YEAR}-002", f"PRJ-{YEAR}-003"]
+    assert second == [f"PRJ-{YEAR}-004"]
+    assert other == [f"SIP-{YEAR}-001", f"SIP-{YEAR}-002"]
+
+
+def test_concurrent_allocations_never_share_a_code(db):
+    async def run():
+        batches = await asyncio.gather(*(server.allocate_codes("SIP", count) for count in (1, 5, 2, 1, 3)))
+        return [code for batch in batches for code in batch]
+
+    codes = asyncio.run(run())
+    assert sorted(codes) == [f"SIP-{YEAR}-{seq:03d}" for seq in range(1, 13)]
+
+
+def test_seeding_continues_after_the_highest_existing_code(db):
+    async def run():
+        await db.projects.insert_many([
+            {"id": "1", "code": f"PRJ-{YEAR}-007"},
+            {"id": "2", "code": f"PRJ-{YEAR}-1042"},
+            {"id": "3", "code": f"PRJ-{YEAR}-099"},
+            {"id": "4", "code": "PRJ-2020-015"},
+            {"id": "5", "code": f"PRJ-{YEAR}-9999-copy"},
+            {"id": "6", "code": f"SIP-{YEAR}-500"},
+            {"id": "7"},
+        ])
+        await db.orders.insert_one({"id": "8", "code": f"SIP-{YEAR}-041"})
+        # A counter that is already ahead of the existing codes is kept
+        await db.counters.insert_one({"id": "PRJ-2020", "prefix": "PRJ", "year": 2020, "seq": 30})
+
+        await server.seed_code_counters()
+        counters = {c["id"]: c["seq"] async for c in db.counters.find()}
+
+        # The migration runs once: later codes are not re-scanned
+        await db.projects.insert_one({"id": "9", "code": f"PRJ-{YEAR}-5000"})
+        await server.seed_code_counters()
+        return counters, await server.generate_project_code(), await server.generate_order_code()
+
+    counters, project_code, order_code = asyncio.run(run())
+    assert counters == {f"PRJ-{YEAR}": 1042, "PRJ-2020": 30, f"SIP-{YEAR}": 41}
+    assert project_code == f"PRJ-{YEAR}-1043"
+    assert order_code == f"SIP-{YEAR}-042"
+
+
+def test_created_projects_get_distinct_codes(db):
+    asyncio.run(db.projects.insert_one({"id": "old", "code": f"PRJ-{YEAR}-010"}))
+    asyncio.run(server.seed_code_counters())
+    client = TestClient(server.app)
+    codes = [
+        client.post("/api/projects", json={"name": f"Proje {i}", "start_date": "2026-01-05", "end_date": "2026-02-01"}).json()["code"]
+        for i in range(3)
+    ]
+    assert codes == [f"PRJ-{YEAR}-011", f"PRJ-{YEAR}-012", f"PRJ-{YEAR}-013"]
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from currency import DEFAULT_RATES, RateHistory
+
+
+@pytest.fixture
+def client(monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "currency_rates_cache", server.StaleWhileRevalidateCache(
+        server.CURRENCY_RATES_CACHE_TTL, server.CURRENCY_RATES_CACHE_MAX_STALE
+    ))
+    return db, TestClient(server.app)
+
+
+def test_new_rate_is_read_back_with_rates_other_workers_wrote(client):
+    db, client = client
+    assert client.post("/api/currency-rates", json={"usd_to_try": 34.0, "eur_to_try": 37.0}).status_code == 200
+    assert client.get("/api/currency-rates").json()["usd_to_try"] == 34.0
+
+    # Another worker records a rate this worker has not cached yet
+    asyncio.run(db.currency_rates.insert_one({
+        "id": "other", "usd_to_try": 35.0, "eur_to_try": 38.0, "updated_at": "2000-01-01T00:00:00+00:00"
+    }))
+    saved = client.post("/api/currency-rates", json={"usd_to_try": 36.0, "eur_to_try": 39.0}).json()
+    assert client.get("/api/currency-rates").json()["id"] == saved["id"]
+
+    history = asyncio.run(server.currency_history())
+    assert [doc["usd_to_try"] for doc in history.docs] == [35.0, 34.0, 36.0]
+
+
+def rate(updated_at: str, usd: float, eur: float = 40.0) -> dict:
+    return {"usd_to_try": usd, "eur_to_try": eur, "updated_at": updated_at}
+
+
+# Entered out of order; two on 2026-02-01 and two with the very same timestamp
+HISTORY = RateHistory([
+    rate("2026-02-01T15:00:00+00:00", 31.0),
+    rate("2026-01-01T00:00:00Z", 30.0),
+    rate("2026-02-01T09:00:00+00:00", 30.5),
+    rate("2026-03-01T00:00:00+00:00", 32.0),
+    rate("2026-03-01T00:00:00+00:00", 32.5),
+])
+
+
+@pytest.mark.parametrize("when, usd", [
+    # Before the first entry the earliest rate is used
+    ("2025-06-01T00:00:00+00:00", 30.0),
+    # Exactly on an entry's timestamp that entry is already in effect
+    ("2026-01-01T00:00:00+00:00", 30.0),
+    ("2026-02-01T09:00:00+00:00", 30.5),
+    ("2026-01-31T23:59:59+00:00", 30.0),
+    # Same day: the rate in effect at that time of day
+    ("2026-02-01T12:00:00+00:00", 30.5),
+    ("2026-02-01T15:00:00+00:00", 31.0),
+    # Same timestamp twice: the one entered last wins
+    ("2026-03-01T00:00:00+00:00", 32.5),
+    ("2027-01-01T00:00:00+00:00", 32.5),
+    # No offset is read as UTC, an offset is honoured
+    ("2026-02-01T12:00:00", 30.5),
+    ("2026-02-01T19:00:00+03:00", 31.0),
+])
+def test_rates_at_and_rates_for_agree(when, usd):
+    assert HISTORY.rates_at(when) == {"TRY": 1.0, "USD": usd, "EUR": 40.0}
+    assert HISTORY.rates_for(["USD"], [when]).tolist() == [usd]
+
+
+def test_convert_many_uses_each_amounts_own_date():
+    totals = HISTORY.convert_many(
+        [100, 100, 100, 100],
+        ["USD", "EUR", "TRY", "GBP"],
+        ["2026-01-15T00:00:00+00:00", "2026-01-15T00:00:00+00:00", "2026-01-15T00:00:00+00:00", "2026-03-02T00:00:00+00:00"]
+    )
+    assert totals.tolist() == [3000.0, 4000.0, 100.0, 100.0]
+
+
+def test_empty_history_uses_default_rates():
+    history = RateHistory([])
+    assert history.latest is None
+    assert history.rates_at("2026-01-01T00:00:00+00:00") == {"TRY": 1.0, **DEFAULT_RATES}
+    assert history.rates_for(["USD", "TRY"], ["2026-01-01T00:00:00+00:00"] * 2).tolist() == [DEFAULT_RATES["USD"], 1.0]
+    assert history.rates_for([], []).tolist() == []
+
+
+def test_latest_is_the_most_recent_entry():
+    assert HISTORY.latest["usd_to_try"] == 32.5
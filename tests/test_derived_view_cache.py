@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from server import DerivedViewCache
+
+
+def test_concurrent_misses_share_one_load():
+    cache = DerivedViewCache(8)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        results = await asyncio.gather(*(cache.get("gantt", "p", 1, load) for _ in range(5)))
+        assert results == [1] * 5
+        assert await cache.get("gantt", "p", 1, load) == 1
+
+    asyncio.run(run())
+    assert len(calls) == 1
+
+
+def test_cancelled_caller_does_not_fail_the_others():
+    cache = DerivedViewCache(8)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            return "view"
+
+        first = asyncio.create_task(cache.get("gantt", "p", 1, load))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.get("gantt", "p", 1, load))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert await second == "view"
+        # The result was stored even though the caller that started it left
+        assert await cache.get("gantt", "p", 1, load) == "view"
+
+    asyncio.run(run())
+
+
+def test_only_the_newest_version_is_kept():
+    cache = DerivedViewCache(8)
+
+    async def value(v):
+        return v
+
+    async def run():
+        await cache.get("gantt", "p", 1, lambda: value("v1"))
+        await cache.get("gantt", "p", 2, lambda: value("v2"))
+        # A late result for an older version is returned but not stored
+        assert await cache.get("gantt", "p", 1, lambda: value("late")) == "late"
+        assert list(cache._entries) == [("gantt", "p", 2, None)]
+
+    asyncio.run(run())
+
+
+def test_failed_load_is_retried():
+    cache = DerivedViewCache(8)
+    attempts = []
+
+    async def load():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ValueError("boom")
+        return "ok"
+
+    async def run():
+        with pytest.raises(ValueError):
+            await cache.get("gantt", "p", 1, load)
+        assert await cache.get("gantt", "p", 1, load) == "ok"
+
+    asyncio.run(run())
@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from mailer import MemoryTransport, RateLimiter, TransientMailError
+
+
+class FlakyTransport(MemoryTransport):
+    """Records every batch call with its key; the first call fails"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    async def send_batch(self, messages, idempotency_key=None):
+        self.calls.append(([message["to"] for message in messages], idempotency_key))
+        if len(self.calls) == 1:
+            raise TransientMailError("timeout")
+        return await super().send_batch(messages, idempotency_key)
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    transport = FlakyTransport()
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "mail_transport", transport)
+    monkeypatch.setattr(server, "mail_rate_limiter", RateLimiter(1000))
+    monkeypatch.setattr(server, "MAIL_BATCH_SIZE", 2)
+    return db, transport
+
+
+async def make_due(db, addresses):
+    now = datetime.now(timezone.utc).isoformat()
+    await db.email_outbox.update_many({"params.to": {"$in": addresses}}, {"$set": {"next_attempt_at": now}})
+
+
+def test_retried_batch_keeps_its_messages_and_key(outbox):
+    db, transport = outbox
+
+    async def run():
+        await server.enqueue_email_job("test", "ref", [{"params": {"to": address}} for address in "abc"], [])
+        await server.deliver_outbox_batch(await server.claim_outbox_batch())
+        # The failed batch is due again, behind the message it left waiting
+        await make_due(db, ["a", "b"])
+        for _ in range(2):
+            await server.deliver_outbox_batch(await server.claim_outbox_batch())
+        assert await server.claim_outbox_batch() == []
+        return await db.email_outbox.find({}, {"_id": 0}).to_list(None)
+
+    messages = asyncio.run(run())
+    (first, key), (lone, lone_key), (retry, retry_key) = transport.calls
+    assert first == retry == ["a", "b"]
+    assert retry_key == key
+    assert lone == ["c"] and lone_key != key
+    assert [message["to"] for message in transport.sent] == ["c", "a", "b"]
+    assert all(message["status"] == "sent" for message in messages)
+
+
+def test_partly_claimed_batch_is_handed_back(outbox):
+    db, transport = outbox
+
+    async def run():
+        await server.enqueue_email_job("test", "ref", [{"params": {"to": address}} for address in "ab"], [])
+        await server.deliver_outbox_batch(await server.claim_outbox_batch())
+        await make_due(db, ["a", "b"])
+        # Another worker holds "b"
+        locked_until = (datetime.now(timezone.utc) + timedelta(minutes=1)).isoformat()
+        await db.email_outbox.update_one({"params.to": "b"}, {"$set": {"status": "sending", "locked_until": locked_until}})
+        assert await server.claim_outbox_batch() == []
+        return await db.email_outbox.find_one({"params.to": "a"}, {"_id": 0})
+
+    message = asyncio.run(run())
+    assert message["status"] == "pending"
+    assert message["attempts"] == 1
+    assert len(transport.calls) == 1
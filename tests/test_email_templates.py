@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from email_templates import CompiledTemplate, Field, Markup
+from mailer import MemoryTransport
+
+
+def test_compile_splits_text_and_fields():
+    template = CompiledTemplate.compile("<p>{{ a }}-{{b}}{{  a  }}</p>")
+    assert template.chunks == ["<p>", "a", "-", "b", "", "a", "</p>"]
+    assert all(isinstance(template.chunks[i], Field) for i in (1, 3, 5))
+    assert template.fields == {"a", "b"}
+    assert template.render(a=1, b=2) == "<p>1-21</p>"
+
+
+def test_partial_merges_filled_fields_into_the_text():
+    template = CompiledTemplate.compile("<h1>{{ title }}</h1><p>{{ name }}</p><i>{{ title }}</i>")
+    partial = template.partial(title="Teklif")
+    assert partial.chunks == ["<h1>Teklif</h1><p>", "name", "</p><i>Teklif</i>"]
+    assert partial.fields == {"name"}
+    assert partial.render(name="Ayşe") == template.render(title="Teklif", name="Ayşe")
+    # Filling every field leaves a single literal
+    assert template.partial(title="T", name="N").chunks == ["<h1>T</h1><p>N</p><i>T</i>"]
+
+
+def test_values_are_escaped_unless_markup():
+    template = CompiledTemplate.compile('<a href="{{ link }}">{{ name }}</a>{{ notes }}')
+    partial = template.partial(notes=Markup("<p><strong>Not:</strong></p>"), name="<script>alert(1)</script>")
+    rendered = partial.render(link='https://x/?a=1&b="2"')
+    assert rendered == (
+        '<a href="https://x/?a=1&amp;b=&quot;2&quot;">&lt;script&gt;alert(1)&lt;/script&gt;</a>'
+        "<p><strong>Not:</strong></p>"
+    )
+
+
+def test_missing_field_is_an_error_and_values_read_like_the_old_f_strings():
+    template = CompiledTemplate.compile("{{ a }} | {{ b }}")
+    with pytest.raises(KeyError, match="b"):
+        template.render(a="x")
+    with pytest.raises(KeyError, match="b"):
+        template.partial(a="x").render()
+    assert template.render(a=None, b=0, unused="ignored") == "None | 0"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    transport = MemoryTransport()
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "mail_transport", transport)
+    asyncio.run(db.parts.insert_one({"id": "P", "project_id": "gone", "name": "Flanş", "code": "P-1", "quantity": 3}))
+    asyncio.run(db.quote_requests.insert_one({
+        "id": "Q", "part_id": "P", "manufacturing_method": "unknown", "deadline": "2026-03-01T00:00:00+00:00"
+    }))
+    asyncio.run(db.suppliers.insert_one({"id": "S", "name": "<script>alert(1)</script> Ltd", "email": "s@example.com"}))
+    return db, TestClient(server.app)
+
+
+def test_quote_email_escapes_supplier_name_and_keeps_the_old_defaults(client):
+    db, client = client
+    response = client.post("/api/send-quote-emails", json={"quote_request_id": "Q", "supplier_ids": ["S", "missing"]})
+    assert response.status_code == 202
+    assert response.json()["failed"] == [{"supplier_id": "missing", "error": "Tedarikçi bulunamadı"}]
+
+    message = asyncio.run(db.email_outbox.find_one({}))
+    body = message["params"]["html"]
+    assert "<script>" not in body
+    assert "Sayın <strong>&lt;script&gt;alert(1)&lt;/script&gt; Ltd</strong>" in body
+    assert "{{" not in body
+    # No project, settings, method or material: the same fallbacks the inline template used
+    assert '<p class="value">- (-)</p>' in body
+    assert "<p>ProManufakt</p>" in body
+    assert "<p> | </p>" in body
+    assert '<p class="value"> - unknown</p>' in body
+    assert "<tr><td>Malzeme:</td><td><strong>-</strong></td></tr>" in body
+    assert "Teklif Son Tarih: 2026-03-01" in body
+    assert "Not:" not in body
@@ -0,0 +1,53 @@
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "EXPORT_CACHE_DIR", tmp_path)
+    # Without the context manager the startup workers are not started
+    client = TestClient(server.app)
+    project = client.post("/api/projects", json={"name": "Proje", "start_date": "2026-01-05", "end_date": "2026-02-01"}).json()
+    response = client.post("/api/parts", json={"project_id": project["id"], "name": "Flanş", "code": "P1", "quantity": 2})
+    assert response.status_code == 200
+    return client, project["id"], tmp_path
+
+
+def test_streamed_and_cached_export_share_the_etag(client):
+    client, project_id, cache_dir = client
+    first = client.get(f"/api/export/parts/{project_id}")
+    assert first.status_code == 200
+    assert first.headers["etag"] == f'"{project_id}-v1"'
+    assert [path.name for path in cache_dir.iterdir()] == [f"{project_id}-v1.xlsx"]
+
+    second = client.get(f"/api/export/parts/{project_id}")
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.content == first.content
+    assert client.get(f"/api/export/parts/{project_id}", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+
+def test_late_export_of_an_older_version_keeps_the_newer_file(client):
+    client, project_id, cache_dir = client
+    (cache_dir / f"{project_id}-v0.xlsx").write_bytes(b"older")
+    (cache_dir / f"{project_id}-v5.xlsx").write_bytes(b"newer")
+    (cache_dir / "other-project-v0.xlsx").write_bytes(b"other")
+
+    assert client.get(f"/api/export/parts/{project_id}").status_code == 200
+    assert sorted(path.name for path in cache_dir.iterdir()) == sorted([
+        f"{project_id}-v1.xlsx", f"{project_id}-v5.xlsx", "other-project-v0.xlsx"
+    ])
+
+
+def test_a_write_moves_the_export_to_a_new_version(client):
+    client, project_id, cache_dir = client
+    first = client.get(f"/api/export/parts/{project_id}")
+    client.post("/api/parts", json={"project_id": project_id, "name": "Mil", "code": "P2", "quantity": 1})
+    second = client.get(f"/api/export/parts/{project_id}")
+    assert second.headers["etag"] == f'"{project_id}-v2"'
+    assert second.content != first.content
+    assert [path.name for path in cache_dir.iterdir()] == [f"{project_id}-v2.xlsx"]
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo import ASCENDING, IndexModel
+
+import server
+
+PLAIN = IndexModel([("project_id", ASCENDING), ("code", ASCENDING)], name="project_id_code")
+UNIQUE = IndexModel([("project_id", ASCENDING), ("code", ASCENDING)], name="project_id_code", unique=True)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+
+def test_rebuild_refuses_when_duplicates_exist(db):
+    async def run():
+        await db.parts.create_indexes([PLAIN])
+        await db.parts.insert_many([
+            {"project_id": "p", "code": "A"},
+            {"project_id": "p", "code": "A"},
+            {"project_id": "p", "code": "B"},
+        ])
+        assert await server.find_duplicate_key(db.parts, UNIQUE) == {"project_id": "p", "code": "A"}
+        await server.rebuild_index(db.parts, UNIQUE)
+        info = await db.parts.index_information()
+        # The old definition is untouched and nothing temporary is left behind
+        assert "project_id_code" in info and not info["project_id_code"].get("unique")
+        assert "project_id_code_rebuild" not in info
+
+    asyncio.run(run())
+
+
+def test_rebuild_replaces_the_definition(db):
+    async def run():
+        await db.parts.create_indexes([PLAIN])
+        await db.parts.insert_many([{"project_id": "p", "code": "A"}, {"project_id": "p", "code": "B"}])
+        await server.rebuild_index(db.parts, UNIQUE)
+        info = await db.parts.index_information()
+        assert info["project_id_code"].get("unique")
+        assert "project_id_code_rebuild" not in info
+
+    asyncio.run(run())
+
+
+def test_lease_admits_one_holder_until_released_or_expired(db):
+    async def run():
+        assert await server.acquire_lease("rebuild", 60)
+        assert not await server.acquire_lease("rebuild", 60)
+        await server.release_lease("rebuild")
+        assert await server.acquire_lease("rebuild", -1)
+        # An expired lease can be taken over
+        assert await server.acquire_lease("rebuild", 60)
+
+    asyncio.run(run())
@@ -0,0 +1,52 @@
+import asyncio
+
+import boto3
+import pytest
+from fastapi import HTTPException
+from moto import mock_aws
+from starlette.requests import Request
+
+import server
+from storage import LocalStorage, S3Storage
+
+
+def make_request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+
+
+@pytest.fixture
+def s3_backend(tmp_path, monkeypatch):
+    """S3 as the blob backend, with a not yet migrated legacy file on local disk"""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="uploads")
+        monkeypatch.setattr(server, "storage", S3Storage("uploads", region="us-east-1"))
+        monkeypatch.setattr(server, "legacy_storage", LocalStorage(tmp_path))
+        (tmp_path / "part-1_drawing.pdf").write_bytes(b"%PDF legacy")
+        yield tmp_path
+
+
+def test_legacy_file_is_served_from_local_disk(s3_backend):
+    response = asyncio.run(server.get_file("part-1_drawing.pdf", make_request()))
+    assert response.status_code == 200
+    assert str(response.path) == str(s3_backend / "part-1_drawing.pdf")
+
+
+def test_blob_names_still_resolve_to_the_bucket(s3_backend):
+    backend, key = server.resolve_upload("a" * 64 + ".pdf")
+    assert backend is server.storage
+    assert key == f"blobs/aa/{'a' * 64}"
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(server.get_file("a" * 64 + ".pdf", make_request()))
+    assert error.value.status_code == 404
+
+
+def test_releasing_a_legacy_file_deletes_the_local_copy(s3_backend):
+    asyncio.run(server.release_file("part-1_drawing.pdf"))
+    assert not (s3_backend / "part-1_drawing.pdf").exists()
+
+
+def test_unsafe_names_are_rejected():
+    assert server.resolve_upload("../server.py") is None
+    assert server.resolve_upload(".hidden") is None
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from loaders import EntityLoader, Loaders
+
+
+class RecordingCollection:
+    """Counts the queries sent to a collection; can fail the next one"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.queries = []
+        self.fail_next = False
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        if self.fail_next:
+            self.fail_next = False
+            raise RuntimeError("connection lost")
+        return self.collection.find(query, projection)
+
+
+@pytest.fixture
+def parts():
+    collection = AsyncMongoMockClient()["test"]["parts"]
+    asyncio.run(collection.insert_many([{"id": f"p{i}", "name": f"Parça {i}"} for i in range(3)]))
+    return RecordingCollection(collection)
+
+
+def test_loads_in_one_tick_share_one_in_query(parts):
+    async def run():
+        loader = EntityLoader(parts)
+        return await asyncio.gather(*(loader.load(entity_id) for entity_id in ["p0", "p1", "missing", "p0", "p2"]))
+
+    docs = asyncio.run(run())
+    assert parts.queries == [{"id": {"$in": ["p0", "p1", "missing", "p2"]}}]
+    assert [doc["name"] if doc else None for doc in docs] == ["Parça 0", "Parça 1", None, "Parça 0", "Parça 2"]
+    assert docs[0] is docs[3]
+    assert "_id" not in docs[0]
+
+
+def test_later_loads_only_query_new_ids(parts):
+    async def run():
+        loader = EntityLoader(parts)
+        await loader.load_many(["p0", "missing"])
+        again = await loader.load_many(["p0", "missing"])
+        mapped = await loader.load_map(["p0", "p1", "missing", "p1"])
+        return again, mapped
+
+    again, mapped = asyncio.run(run())
+    assert again[0]["id"] == "p0" and again[1] is None
+    assert sorted(mapped) == ["p0", "p1"]
+    assert parts.queries == [{"id": {"$in": ["p0", "missing"]}}, {"id": {"$in": ["p1"]}}]
+
+
+def test_failed_query_reaches_every_caller_and_is_retried(parts):
+    async def run():
+        loader = EntityLoader(parts)
+        parts.fail_next = True
+        results = await asyncio.gather(loader.load("p0"), loader.load("p1"), return_exceptions=True)
+        return results, await loader.load("p0")
+
+    results, retried = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried["id"] == "p0"
+    assert len(parts.queries) == 2
+
+
+def test_loaders_keep_one_loader_per_collection():
+    loaders = Loaders(AsyncMongoMockClient()["test"])
+    assert loaders.parts is loaders.parts
+    assert loaders.parts is not loaders.suppliers
+    with pytest.raises(AttributeError):
+        loaders._private
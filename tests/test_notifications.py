@@ -0,0 +1,79 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+
+class ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+@pytest.fixture(autouse=True)
+def env(monkeypatch):
+    monkeypatch.setattr(server, "db", AsyncMongoMockClient()["test"])
+    monkeypatch.setattr(server, "notification_hub", server.EventHub(server.NOTIFICATION_STREAM_QUEUE_SIZE))
+
+
+def parse_sse(message: str) -> tuple:
+    lines = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+    return lines["event"], json.loads(lines["data"])
+
+
+def test_format_sse_matches_rest_serialization():
+    when = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    message = server.format_sse("notification", {"title": "Sipariş teslim alındı", "at": when})
+    assert message.endswith("\n\n")
+    assert message.startswith("event: notification\ndata: ")
+    assert "Sipariş teslim alındı" in message
+    assert message.split("data: ", 1)[1].strip() == server.dump_json({"title": "Sipariş teslim alındı", "at": when}).decode()
+
+
+def test_unread_counter_and_stream_follow_create_read_and_read_all():
+    async def unread():
+        return (await server.get_unread_notification_count())["unread"]
+
+    async def run():
+        response = await server.stream_notifications(ConnectedRequest())
+        stream = response.body_iterator
+        assert (await stream.__anext__()).startswith("retry: ")
+
+        created = [await server.create_notification("order", f"Bildirim {i}", "Mesaj") for i in range(3)]
+        assert await unread() == 3
+
+        await server.mark_notification_read(created[0].id)
+        await server.mark_notification_read(created[0].id)
+        assert await unread() == 2
+
+        await server.mark_all_notifications_read()
+        assert await unread() == 0
+        # Read-all only moves the watermark
+        assert await server.db.notifications.count_documents({"is_read": False}) == 2
+        listed = json.loads((await server.get_notifications(is_read=None)).body)
+        assert all(notification["is_read"] for notification in listed)
+        assert json.loads((await server.get_notifications(is_read=False)).body) == []
+
+        # Newer than the watermark, so unread again
+        latest = await server.create_notification("order", "Yeni", "Mesaj")
+        assert await unread() == 1
+        assert [n["id"] for n in json.loads((await server.get_notifications(is_read=False)).body)] == [latest.id]
+        await server.mark_all_notifications_read()
+        assert await unread() == 0
+
+        events = [parse_sse(await stream.__anext__()) for _ in range(11)]
+        await stream.aclose()
+        return events
+
+    events = asyncio.run(run())
+    assert [event for event, _ in events] == [
+        "notification", "unread", "notification", "unread", "notification", "unread",
+        "unread", "unread", "notification", "unread", "unread",
+    ]
+    deltas = [data["delta"] for event, data in events if event == "unread"]
+    assert deltas == [1, 1, 1, -1, -2, 1, -1]
+    assert events[0][1]["title"] == "Bildirim 0"
+    assert not server.notification_hub._subscribers
@@ -0,0 +1,66 @@
+import asyncio
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+
+@pytest.fixture
+def client(monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", db)
+    # Two suppliers share each created_at, so ties are broken on id
+    suppliers = [
+        {"id": f"s{i}", "name": f"Tedarikçi {i}", "specializations": ["turning"] if i % 2 else [],
+         "created_at": f"2026-01-0{1 + i // 2}T00:00:00+00:00"}
+        for i in range(7)
+    ]
+    asyncio.run(db.suppliers.insert_many(suppliers))
+    return TestClient(server.app)
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def test_pages_walk_newest_first_without_gaps_or_repeats(client):
+    ids, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/suppliers", params=params)
+        assert response.status_code == 200
+        ids += [doc["id"] for doc in response.json()]
+        pages += 1
+        if response.headers["X-Has-More"] == "false":
+            assert "X-Next-Cursor" not in response.headers
+            break
+        cursor = response.headers["X-Next-Cursor"]
+    assert pages == 4
+    assert ids == ["s6", "s5", "s4", "s3", "s2", "s1", "s0"]
+
+
+def test_cursor_applies_to_filters_and_ndjson(client):
+    first = client.get("/api/suppliers", params={"limit": 1, "specialization": "turning"})
+    assert [doc["id"] for doc in first.json()] == ["s5"]
+    cursor = first.headers["X-Next-Cursor"]
+
+    rest = client.get("/api/suppliers", params={"specialization": "turning", "cursor": cursor, "stream": "ndjson"})
+    assert rest.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in rest.text.splitlines()] == ["s3", "s1"]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    raw_cursor(["2026-01-01T00:00:00+00:00"]),
+    raw_cursor([{"$gt": ""}, {"$ne": None}]),
+    raw_cursor(["2026-01-01T00:00:00+00:00", {"$ne": None}]),
+    raw_cursor([1, 2]),
+])
+def test_malformed_cursor_is_rejected(client, cursor):
+    response = client.get("/api/suppliers", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Geçersiz sayfa imleci"
@@ -0,0 +1,28 @@
+import asyncio
+import io
+
+import pytest
+
+import server
+
+PIL = pytest.importorskip("PIL")
+
+
+def test_thumbnail_renders_in_the_preview_pool():
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 400), "red").save(buffer, format="PNG")
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(server.preview_executor, server.render_thumbnail, buffer.getvalue(), ".png", 128)
+
+    data = asyncio.run(run())
+    thumbnail = Image.open(io.BytesIO(data))
+    assert thumbnail.format == "WEBP"
+    assert thumbnail.size == (128, 64)
+
+
+def test_preview_pool_does_not_fork_the_server():
+    assert server.preview_executor._mp_context.get_start_method() == "forkserver"
@@ -0,0 +1,115 @@
+from scheduling import schedule_parts
+
+METHODS = {
+    "cut": {"name": "Kesim", "category": "Kesim", "duration_days": 2},
+    "weld": {"name": "Kaynak", "category": "Kaynak", "duration_days": 3},
+    "paint": {"name": "Boya", "category": "Yüzey İşlemi", "duration_days": 1},
+    "buy": {"name": "Satın Alma", "category": "Hazır Malzeme", "duration_days": 4},
+    "check": {"name": "Kontrol", "category": "Kontrol", "duration_days": 0},
+}
+
+
+def part(part_id, *methods):
+    return {"id": part_id, "name": part_id.upper(), "code": part_id.upper(), "manufacturing_methods": list(methods)}
+
+
+def by_id(schedule):
+    return {task["id"]: task for task in schedule["tasks"]}
+
+
+def assert_feasible(schedule, capacity):
+    tasks = schedule["tasks"]
+    # Each part's operations run in order
+    for a, b in zip(tasks, tasks[1:]):
+        if a["part_id"] == b["part_id"]:
+            assert a["end_day"] <= b["start_day"]
+    # No work centre runs two operations at once
+    for category, limit in capacity.items():
+        if not limit:
+            continue
+        lanes = {}
+        for task in (t for t in tasks if t["category"] == category and t["duration_days"]):
+            lanes.setdefault(task["lane"], []).append((task["start_day"], task["end_day"]))
+        assert len(lanes) <= limit
+        for spans in lanes.values():
+            spans.sort()
+            assert all(end <= start for (_, end), (start, _) in zip(spans, spans[1:]))
+
+
+def test_capacity_one_serialises_the_category():
+    parts = [part("a", "weld"), part("b", "weld"), part("c", "weld")]
+    schedule = schedule_parts(parts, METHODS, {"Kaynak": 1})
+    starts = sorted(task["start_day"] for task in schedule["tasks"])
+    assert starts == [0, 3, 6]
+    assert schedule["makespan_days"] == 9
+    assert {task["lane"] for task in schedule["tasks"]} == {0}
+    assert_feasible(schedule, schedule["capacity"])
+
+
+def test_unlimited_capacity_runs_everything_at_once():
+    parts = [part("a", "weld"), part("b", "weld"), part("c", "weld")]
+    schedule = schedule_parts(parts, METHODS, {"Kaynak": 0})
+    assert [task["start_day"] for task in schedule["tasks"]] == [0, 0, 0]
+    assert schedule["makespan_days"] == 3
+    assert schedule["capacity"]["Kaynak"] == 0
+    # Purchased material is unlimited by default
+    schedule = schedule_parts([part("a", "buy"), part("b", "buy")], METHODS)
+    assert schedule["makespan_days"] == 4
+
+
+def test_longest_remaining_work_goes_first():
+    parts = [part("short", "weld"), part("long", "weld", "buy")]
+    tasks = by_id(schedule_parts(parts, METHODS, {"Kaynak": 1}))
+    assert tasks["long_weld"]["start_day"] == 0
+    assert tasks["short_weld"]["start_day"] == 3
+
+
+def test_zero_duration_operations():
+    parts = [part("a", "check", "cut", "check"), part("b", "check")]
+    schedule = schedule_parts(parts, METHODS, {"Kontrol": 1, "Kesim": 1})
+    tasks = by_id(schedule)
+    assert tasks["a_check"]["start_day"] == tasks["a_check"]["end_day"] == 0
+    assert tasks["a_cut"]["start_day"] == 0
+    # A repeated method gets its own task id
+    assert tasks["a_check_2"]["start_day"] == 2
+    assert tasks["b_check"]["duration_days"] == 0
+    assert schedule["makespan_days"] == 2
+    assert all(task["slack_days"] >= 0 for task in schedule["tasks"])
+    assert_feasible(schedule, schedule["capacity"])
+
+
+def test_critical_path_and_slack():
+    # b has more work left, so it gets the single welder first
+    parts = [part("a", "weld"), part("b", "weld", "paint")]
+    schedule = schedule_parts(parts, METHODS, {"Kaynak": 1})
+    tasks = by_id(schedule)
+    assert schedule["makespan_days"] == 6
+    # a waits for the welder, not for a predecessor of its own
+    assert schedule["critical_path"] == ["b_weld", "a_weld"]
+    assert tasks["b_weld"]["slack_days"] == 0 and tasks["a_weld"]["slack_days"] == 0
+    assert tasks["b_paint"]["start_day"] == 3
+    assert tasks["b_paint"]["slack_days"] == 2
+    assert not tasks["b_paint"]["critical"]
+    for task in schedule["tasks"]:
+        assert task["critical"] == (task["slack_days"] == 0)
+
+
+def test_critical_path_is_a_tight_chain_of_zero_slack_tasks():
+    # a: cut(2) -> weld(3); b: cut(2) -> paint(1); one cutter
+    parts = [part("a", "cut", "weld"), part("b", "cut", "paint")]
+    schedule = schedule_parts(parts, METHODS, {"Kesim": 1, "Kaynak": 1, "Yüzey İşlemi": 1})
+    path = schedule["critical_path"]
+    tasks = by_id(schedule)
+    assert path == ["a_cut", "b_cut", "b_paint"]
+    assert tasks[path[0]]["start_day"] == 0
+    assert tasks[path[-1]]["end_day"] == schedule["makespan_days"] == 5
+    for previous, following in zip(path, path[1:]):
+        assert tasks[previous]["end_day"] == tasks[following]["start_day"]
+    assert all(tasks[task_id]["slack_days"] == 0 for task_id in path)
+    assert_feasible(schedule, schedule["capacity"])
+
+
+def test_unknown_methods_are_skipped_and_empty_input():
+    assert schedule_parts([part("a", "nope")], METHODS)["tasks"] == []
+    empty = schedule_parts([], METHODS)
+    assert empty["makespan_days"] == 0 and empty["critical_path"] == []
@@ -0,0 +1,84 @@
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+import boto3
+import pytest
+from moto import mock_aws
+from starlette.requests import Request
+
+from storage import LocalStorage, S3Storage
+
+BUCKET = "promanufakt-test"
+
+
+def make_request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        yield S3Storage(BUCKET, region="us-east-1", prefix="uploads/")
+
+
+def test_s3_put_exists_get_delete(s3, tmp_path):
+    async def run():
+        source = tmp_path / "drawing.pdf"
+        source.write_bytes(b"%PDF-1.4 drawing")
+        await s3.put_file(source, "blobs/ab/abc", "application/pdf")
+        # The staged temp file is removed once uploaded
+        assert not source.exists()
+        assert await s3.exists("blobs/ab/abc")
+        assert await s3.get_bytes("blobs/ab/abc") == b"%PDF-1.4 drawing"
+
+        await s3.put_bytes("blobs/ab/abc.thumb-256.webp", b"webp", "image/webp")
+        assert await s3.exists("blobs/ab/abc.thumb-256.webp")
+
+        await s3.delete("blobs/ab/abc")
+        assert not await s3.exists("blobs/ab/abc")
+        assert s3.local_path("blobs/ab/abc") is None
+
+    asyncio.run(run())
+
+
+def test_s3_objects_live_under_the_prefix(s3):
+    async def run():
+        await s3.put_bytes("blobs/cd/cde", b"data", "application/octet-stream")
+        listed = boto3.client("s3", region_name="us-east-1").list_objects_v2(Bucket=BUCKET)
+        assert [obj["Key"] for obj in listed["Contents"]] == ["uploads/blobs/cd/cde"]
+
+    asyncio.run(run())
+
+
+def test_s3_download_redirects_to_a_presigned_url(s3):
+    async def run():
+        await s3.put_bytes("blobs/ef/efg", b"%PDF", "application/pdf")
+        response = await s3.download_response(
+            make_request(), "blobs/ef/efg", "resim.pdf", "application/pdf", '"etag"', "public, max-age=60"
+        )
+        assert response.status_code == 307
+        url = urlparse(response.headers["location"])
+        query = parse_qs(url.query)
+        assert url.path.endswith(f"/{BUCKET}/uploads/blobs/ef/efg") or url.path.endswith("/uploads/blobs/ef/efg")
+        assert query["response-content-type"] == ["application/pdf"]
+        assert query["response-content-disposition"] == ['attachment; filename="resim.pdf"']
+        assert query["response-cache-control"] == ["public, max-age=60"]
+        assert "X-Amz-Signature" in query
+
+    asyncio.run(run())
+
+
+def test_local_storage_round_trip(tmp_path):
+    async def run():
+        storage = LocalStorage(tmp_path)
+        await storage.put_bytes("blobs/01/012", b"bytes", "application/octet-stream")
+        assert await storage.exists("blobs/01/012")
+        assert await storage.get_bytes("blobs/01/012") == b"bytes"
+        await storage.delete("blobs/01/012")
+        assert not await storage.exists("blobs/01/012")
+
+    asyncio.run(run())
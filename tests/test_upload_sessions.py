@@ -0,0 +1,162 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from storage import LocalStorage
+
+CONTENT = b"%PDF-1.4 resumable upload"
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    sessions_dir = tmp_path / "sessions"
+    sessions_dir.mkdir()
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "storage", LocalStorage(tmp_path / "store"))
+    monkeypatch.setattr(server, "UPLOAD_SESSIONS_DIR", sessions_dir)
+    monkeypatch.setattr(server, "UPLOAD_CHUNK_SIZE", 10)
+    monkeypatch.setattr(server, "schedule_thumbnail", lambda filename: None)
+    asyncio.run(db.parts.insert_one({"id": "A", "project_id": None, "name": "Flanş", "additional_documents": []}))
+    return db, sessions_dir, tmp_path
+
+
+def create_session(client, kind="drawing", size=len(CONTENT)):
+    response = client.post("/api/uploads/sessions", json={"part_id": "A", "kind": kind, "filename": "resim.pdf", "size": size})
+    assert response.status_code == 200
+    return response.json()
+
+
+def send_chunks(client, session):
+    for index in range(session["total_chunks"]):
+        chunk = CONTENT[index * 10:(index + 1) * 10]
+        response = client.patch(f"/api/uploads/sessions/{session['id']}/chunks/{index}", content=chunk)
+        assert response.status_code == 200
+    return response.json()
+
+
+def test_create_rejects_unknown_part_kind_and_extension(env):
+    client = TestClient(server.app)
+    def create(**fields):
+        return client.post("/api/uploads/sessions", json={"part_id": "A", "filename": "resim.pdf", "size": 10, **fields})
+    assert create(part_id="missing").status_code == 404
+    assert create(kind="video").status_code == 400
+    assert create(filename="resim.exe").status_code == 400
+    assert create(size=server.MAX_FILE_SIZE + 1).status_code == 413
+
+
+def test_chunks_resume_and_complete_as_drawing(env):
+    db, sessions_dir, tmp_path = env
+    client = TestClient(server.app)
+    session = create_session(client)
+    assert session["total_chunks"] == 3
+    url = f"/api/uploads/sessions/{session['id']}"
+
+    assert client.patch(f"{url}/chunks/1", content=CONTENT[10:20]).status_code == 409
+    assert client.patch(f"{url}/chunks/0", content=CONTENT[:5]).status_code == 400
+    assert client.get(url).json()["next_chunk"] == 0
+    assert client.post(f"{url}/complete").status_code == 409
+
+    status = send_chunks(client, session)
+    assert status["received"] == len(CONTENT)
+    # A retried chunk that already arrived is acknowledged without rewriting
+    assert client.patch(f"{url}/chunks/0", content=CONTENT[:10]).json()["next_chunk"] == 3
+    assert client.get(url).json()["received"] == len(CONTENT)
+
+    result = client.post(f"{url}/complete").json()
+    assert result["sha256"] == server.hashlib.sha256(CONTENT).hexdigest()
+    part = asyncio.run(db.parts.find_one({"id": "A"}))
+    assert part["technical_drawing_filename"] == result["filename"]
+    assert client.get(url).status_code == 404
+    assert client.post(f"{url}/complete").status_code == 404
+    assert list(sessions_dir.iterdir()) == []
+
+
+def test_complete_as_document(env):
+    db, sessions_dir, tmp_path = env
+    client = TestClient(server.app)
+    session = create_session(client, kind="document")
+    send_chunks(client, session)
+    assert client.post(f"/api/uploads/sessions/{session['id']}/complete").status_code == 200
+    part = asyncio.run(db.parts.find_one({"id": "A"}))
+    assert [doc["original_name"] for doc in part["additional_documents"]] == ["resim.pdf"]
+
+
+def test_abort_removes_session_and_partial_file(env):
+    db, sessions_dir, tmp_path = env
+    client = TestClient(server.app)
+    session = create_session(client)
+    url = f"/api/uploads/sessions/{session['id']}"
+    client.patch(f"{url}/chunks/0", content=CONTENT[:10])
+    assert server.upload_session_path(session["id"]).exists()
+
+    assert client.delete(url).status_code == 200
+    assert not server.upload_session_path(session["id"]).exists()
+    assert client.get(url).status_code == 404
+    assert client.delete(url).status_code == 404
+
+
+def test_concurrent_writes_of_one_chunk_are_serialised(env):
+    client = TestClient(server.app)
+    session = create_session(client)
+    url = f"/api/uploads/sessions/{session['id']}/chunks/0"
+
+    async def run():
+        first_started = asyncio.Event()
+        release_first = asyncio.Event()
+
+        async def slow_body():
+            yield CONTENT[:5]
+            first_started.set()
+            await release_first.wait()
+            yield CONTENT[5:10]
+
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            first = asyncio.create_task(http.patch(url, content=slow_body()))
+            await first_started.wait()
+            second = await http.patch(url, content=b"X" * 10)
+            release_first.set()
+            return await first, second
+
+    first, second = asyncio.run(run())
+    assert second.status_code == 409
+    assert first.status_code == 200 and first.json()["next_chunk"] == 1
+    assert server.upload_session_path(session["id"]).read_bytes() == CONTENT[:10]
+    # The claim is released, so the next chunk can be written
+    assert client.patch(f"/api/uploads/sessions/{session['id']}/chunks/1", content=CONTENT[10:20]).status_code == 200
+
+
+def test_completion_alongside_direct_upload_releases_the_old_drawing_once(env):
+    db, sessions_dir, tmp_path = env
+    client = TestClient(server.app)
+    session = create_session(client)
+    send_chunks(client, session)
+
+    async def run():
+        old_path = tmp_path / "old.pdf"
+        old_path.write_bytes(b"%PDF shared")
+        sha256, size = server.hash_file(old_path)
+        shared = await server.store_blob({"temp_path": old_path, "sha256": sha256, "size": size, "extension": ".pdf", "original_name": "old.pdf"})
+        await db.blobs.update_one({"id": sha256}, {"$inc": {"ref_count": 1}})
+        await db.parts.update_one({"id": "A"}, {"$set": {"technical_drawing_filename": shared}})
+        await db.parts.insert_one({"id": "B", "project_id": None, "technical_drawing_filename": shared})
+
+        direct_path = tmp_path / "direct.pdf"
+        direct_path.write_bytes(b"%PDF direct")
+        sha256, size = server.hash_file(direct_path)
+        direct = {"temp_path": direct_path, "sha256": sha256, "size": size, "extension": ".pdf", "original_name": "direct.pdf"}
+        part = await db.parts.find_one({"id": "A"}, {"_id": 0})
+        await asyncio.gather(
+            server.complete_upload_session(session["id"]),
+            server.attach_technical_drawing(part, direct),
+        )
+        current = (await db.parts.find_one({"id": "A"}))["technical_drawing_filename"]
+        return shared, current, {blob["id"]: blob["ref_count"] async for blob in db.blobs.find()}
+
+    shared, current, blobs = asyncio.run(run())
+    assert blobs == {shared[:64]: 1, current[:64]: 1}
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import os
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from uploads import (
+    RangeNotSatisfiable, conditional_file_response, if_range_matches, parse_range, receive_file, sweep_temp_files
+)
+
+BOUNDARY = "----promanufakt7MA4YWxkTrZu0gW"
+ALLOWED = {".pdf", ".step"}
+CONTENT = b"%PDF-1.4\r\n------promanufakt not a boundary\r\n" + bytes(range(256)) * 4
+
+
+def multipart(*parts) -> bytes:
+    body = b""
+    for name, filename, content in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def make_request(chunks, content_type=f"multipart/form-data; boundary={BOUNDARY}", error=None) -> Request:
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+    async def receive():
+        if error is not None and len(messages) == 1:
+            raise error
+        return messages.pop(0)
+
+    scope = {"type": "http", "method": "POST", "headers": [(b"content-type", content_type.encode())]}
+    return Request(scope, receive)
+
+
+def split(body: bytes, size: int) -> list:
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def receive(tmp_path, chunks, max_size=10_000, **request_options):
+    return asyncio.run(receive_file(make_request(chunks, **request_options), tmp_path, max_size, ALLOWED))
+
+
+def leftovers(tmp_path) -> list:
+    return list(tmp_path.glob(".*.part"))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 45, 4096])
+def test_file_survives_any_chunking(tmp_path, chunk_size):
+    body = multipart(("note", None, b"ilk alan"), ("file", "resim.PDF", CONTENT), ("file", "ikinci.pdf", b"ignored"))
+    received = receive(tmp_path, split(body, chunk_size))
+    assert received["temp_path"].read_bytes() == CONTENT
+    assert received["size"] == len(CONTENT)
+    assert received["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+    assert received["original_name"] == "resim.PDF"
+    assert received["extension"] == ".pdf"
+
+
+def test_boundary_split_across_chunks(tmp_path):
+    body = multipart(("file", "resim.pdf", CONTENT))
+    closing = body.rindex(f"\r\n--{BOUNDARY}--".encode())
+    # Cut inside the closing delimiter, after a prefix that looks like the start of it
+    chunks = [body[:closing + 5], body[closing + 5:closing + 20], body[closing + 20:]]
+    assert receive(tmp_path, chunks)["temp_path"].read_bytes() == CONTENT
+
+
+def test_size_limit_cuts_off_and_removes_the_temp_file(tmp_path):
+    body = multipart(("file", "resim.pdf", CONTENT))
+    with pytest.raises(HTTPException) as error:
+        receive(tmp_path, split(body, 64), max_size=len(CONTENT) - 1)
+    assert error.value.status_code == 413
+    assert leftovers(tmp_path) == []
+    assert receive(tmp_path, split(body, 64), max_size=len(CONTENT))["size"] == len(CONTENT)
+
+
+def test_declared_length_over_the_limit_is_rejected_before_reading(tmp_path):
+    request = make_request([b"unused"])
+    request.scope["headers"].append((b"content-length", str(10 ** 9).encode()))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(receive_file(request, tmp_path, 1000, ALLOWED))
+    assert error.value.status_code == 413
+
+
+@pytest.mark.parametrize("body, status, detail", [
+    (multipart(("file", "virus.exe", b"MZ")), 400, "Desteklenmeyen dosya formatı"),
+    (multipart(("note", None, b"no file")), 400, "Dosya bulunamadı"),
+    (multipart(("file", None, b"field without filename")), 400, "Dosya bulunamadı"),
+])
+def test_rejected_bodies_leave_no_temp_file(tmp_path, body, status, detail):
+    with pytest.raises(HTTPException) as error:
+        receive(tmp_path, split(body, 16))
+    assert error.value.status_code == status
+    assert error.value.detail.startswith(detail)
+    assert leftovers(tmp_path) == []
+
+
+def test_non_multipart_request_is_rejected(tmp_path):
+    with pytest.raises(HTTPException) as error:
+        receive(tmp_path, [b"{}"], content_type="application/json")
+    assert error.value.status_code == 400
+
+
+def test_cancelled_request_removes_the_temp_file(tmp_path):
+    body = multipart(("file", "resim.pdf", CONTENT))
+    with pytest.raises(asyncio.CancelledError):
+        receive(tmp_path, split(body, 64), error=asyncio.CancelledError())
+    assert leftovers(tmp_path) == []
+
+
+def test_sweep_removes_only_stale_temp_files(tmp_path):
+    stale, fresh, blob = tmp_path / ".old.part", tmp_path / ".new.part", tmp_path / "kept.part"
+    for path in (stale, fresh, blob):
+        path.write_bytes(b"x")
+    old = time.time() - 7200
+    os.utime(stale, (old, old))
+    os.utime(blob, (old, old))
+
+    assert sweep_temp_files(tmp_path, 3600) == 1
+    assert sorted(path.name for path in tmp_path.iterdir()) == [".new.part", "kept.part"]
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-4", (0, 4)),
+    ("bytes=5-", (5, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=90-500", (90, 99)),
+    ("bytes=99-99", (99, 99)),
+    ("BYTES = 1 - 2", (1, 2)),
+    ("bytes=5-2", None),
+    ("bytes=0-1,3-4", None),
+    ("bytes=-", None),
+    ("bytes=--5", None),
+    ("bytes=+1-2", None),
+    ("bytes=1_0-20", None),
+    ("items=0-4", None),
+    ("bytes", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header, size", [("bytes=-0", 100), ("bytes=100-", 100), ("bytes=150-200", 100), ("bytes=-5", 0)])
+def test_parse_range_not_satisfiable(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
+
+
+ETAG = '"abc123"'
+BODY = bytes(range(100))
+
+
+@pytest.fixture
+def download(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(BODY)
+    app = FastAPI()
+
+    @app.get("/file")
+    async def get_file(request: Request):
+        return await conditional_file_response(request, path, "file.bin", "application/octet-stream", ETAG, "no-cache")
+
+    client = TestClient(app)
+    return lambda **headers: client.get("/file", headers=headers)
+
+
+def test_range_request_gets_partial_content(download):
+    response = download(range="bytes=10-19")
+    assert response.status_code == 206
+    assert response.content == BODY[10:20]
+    assert response.headers["content-range"] == "bytes 10-19/100"
+    assert response.headers["content-length"] == "10"
+
+
+def test_unsatisfiable_range_gets_416(download):
+    response = download(range="bytes=100-")
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */100"
+
+
+@pytest.mark.parametrize("header", ["bytes=0-1,3-4", "bytes=5-2"])
+def test_multiple_or_invalid_ranges_fall_back_to_the_whole_file(download, header):
+    response = download(range=header)
+    assert response.status_code == 200
+    assert response.content == BODY
+
+
+@pytest.mark.parametrize("header", [ETAG, f"W/{ETAG}", f'"other", {ETAG}', "*"])
+def test_if_none_match_gets_304(download, header):
+    response = download(**{"if-none-match": header})
+    assert response.status_code == 304
+    assert response.headers["etag"] == ETAG
+
+
+def test_if_modified_since(download):
+    last_modified = download().headers["last-modified"]
+    assert download(**{"if-modified-since": last_modified}).status_code == 304
+    assert download(**{"if-modified-since": "Thu, 01 Jan 1970 00:00:00 GMT"}).status_code == 200
+    # If-None-Match takes precedence
+    assert download(**{"if-modified-since": last_modified, "if-none-match": '"other"'}).status_code == 200
+
+
+@pytest.mark.parametrize("if_range, status", [
+    (ETAG, 206),
+    (f"W/{ETAG}", 200),
+    ('"other"', 200),
+    ("Thu, 01 Jan 1970 00:00:00 GMT", 200),
+])
+def test_if_range_needs_a_strong_match(download, if_range, status):
+    response = download(range="bytes=0-9", **{"if-range": if_range})
+    assert response.status_code == status
+    assert response.content == (BODY[:10] if status == 206 else BODY)
+
+
+def test_if_range_rejects_weak_validators_on_either_side():
+    assert if_range_matches(' "v1" ', '"v1"')
+    assert not if_range_matches('W/"v1"', 'W/"v1"')
+    assert not if_range_matches('"v1"', 'W/"v1"')
+    assert not if_range_matches('W/"v1"', '"v1"')